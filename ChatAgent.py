@@ -2,9 +2,17 @@
 
 import os
 import argparse
-from openai import OpenAI
 
-client = OpenAI()
+# The OpenAI client is created on first use, importing openai costs about a second
+client = None
+
+def GetClient():
+    global client
+    if client is None:
+        from openai import OpenAI
+
+        client = OpenAI()
+    return client
 
 def SetupAgent():
     if not os.getenv("OPENAI_API_KEY"):
@@ -12,7 +20,7 @@ def SetupAgent():
 
 def Query(prompt, model="gpt-4", system_message="You are a helpful assistant."):
     try:
-        response = client.chat.completions.create(
+        response = GetClient().chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": system_message},
@@ -23,10 +31,38 @@ def Query(prompt, model="gpt-4", system_message="You are a helpful assistant."):
     except Exception as e:
         return f"❌ Error: {e}"
 
+def StreamQuery(prompt, model="gpt-4", system_message="You are a helpful assistant."):
+    """Yield the answer as the model generates it, instead of waiting for the whole response."""
+    try:
+        stream = GetClient().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        yield f"❌ Error: {e}"
+
+def Answer(prompt, stream=True, **kwargs):
+    """Print the answer, token by token when streaming, and return it."""
+    if not stream:
+        answer = Query(prompt, **kwargs)
+        print(answer)
+        return answer
+    from streaming import print_stream
+
+    return print_stream(StreamQuery(prompt, **kwargs))
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Simple ChatGPT CLI")
     parser.add_argument("-q", "--query", help="Prompt to ask ChatGPT")
     parser.add_argument("-sys", "--system", help="System message to guide the assistant", default="You are an expert assistant.")
+    parser.add_argument("--no-stream", action="store_true", help="Print the answer only once it is complete")
     args = parser.parse_args()
 
     SetupAgent()
@@ -34,13 +70,12 @@ if __name__ == "__main__":
     print(f"🧠 System Message: {args.system}")
 
     if args.query:
-        answer = Query(args.query, system_message=args.system)
-        print(answer)
+        Answer(args.query, stream=not args.no_stream, system_message=args.system)
     else:
         while True:
             user_input = input("You: ")
             if user_input.lower() in ["exit", "quit"]:
                 print("👋 Goodbye!")
                 break
-            answer = Query(user_input, system_message=args.system)
-            print("ChatGPT:", answer)
\ No newline at end of file
+            print("ChatGPT: ", end="", flush=True)
+            Answer(user_input, stream=not args.no_stream, system_message=args.system)
\ No newline at end of file
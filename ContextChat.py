@@ -10,6 +10,8 @@ Usage:
 import argparse
 import sys
 
+from streaming import print_stream
+
 
 def process_query(query):
     """
@@ -23,6 +25,19 @@ def process_query(query):
     return f"You asked: {query}"
 
 
+def stream_query(query):
+    """
+    Yield the response to a user query in pieces, as a chat model streams its answer.
+    
+    @param query - The user's input query
+    @returns An iterator of response text chunks
+    """
+    words = process_query(query).split(" ")
+    yield words[0]
+    for word in words[1:]:
+        yield " " + word
+
+
 def interactive_mode():
     """
     Run the program in interactive mode, continuously prompting for input.
@@ -36,8 +51,7 @@ def interactive_mode():
                 print("Ending chat session. Goodbye!")
                 break
                 
-            response = process_query(query)
-            print(response)
+            print_stream(stream_query(query), log=False)
             
         except KeyboardInterrupt:
             print("\nSession terminated by user. Goodbye!")
@@ -61,8 +75,7 @@ def main():
     if args.interactive:
         interactive_mode()
     elif args.query:
-        response = process_query(args.query)
-        print(response)
+        print_stream(stream_query(args.query), log=False)
     else:
         print("No query provided. Run with -h for help.")
         parser.print_help()
@@ -1,5 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
+import os
 import sys
 import json
 
@@ -7,34 +8,69 @@ import json
 # https://github.com/Ruben-van-Breda/python-web-scrapper
 # Usage
 # python3 SimpleScrap.py "https://www.siperb.com/kb/article/understanding-sip-transactions-dialogs-and-sessions/" > Siperb.json
+# python3 SimpleScrap.py <url> -state crawl_state.sqlite3   (conditional request, unchanged pages are not re-parsed)
+# python3 SimpleScrap.py <url> -extractor main              (lxml, main content only, see WebScrapper/extractors.py)
 
 
 
-def simple_scrape(url: str) -> dict:
+def simple_scrape(url: str, store=None, extractor=None) -> dict:
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0'
         }
+        # Pages recorded by another extractor are fetched and extracted again
+        fingerprint = "bs4"
+        if extractor is not None:
+            from extractors import extractor_fingerprint
+            fingerprint = extractor_fingerprint(extractor)
+        if store is not None:
+            headers.update(store.conditional_headers(url, fingerprint))
         response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        content = soup.get_text(separator=' ', strip=True)
-        return {
-            "url": url,
-            "title": soup.title.string if soup.title else "",
-            "content": content
-        }
+        if store is not None:
+            record = store.unchanged(url, response.status_code,
+                                     None if response.status_code == 304 else response.text, fingerprint)
+            if record:
+                print(f"⏭️  Unchanged: {url}", file=sys.stderr)
+                return record["result"]
+
+        if extractor is not None:
+            result, links = extractor(url, response.text)
+        else:
+            soup = BeautifulSoup(response.text, 'html.parser')
+            content = soup.get_text(separator=' ', strip=True)
+            result = {
+                "url": url,
+                "title": soup.title.string if soup.title else "",
+                "content": content
+            }
+        if store is not None:
+            store.record(url, response.headers, response.text, result, [], fingerprint)
+        return result
 
     except Exception as e:
         print(f"❌ Failed to scrape: {e}", file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python WebScrap.py https://example.com", file=sys.stderr)
+    args = sys.argv[1:]
+    if len(args) % 2 != 1 or any(flag not in ("-state", "-extractor") for flag in args[1::2]):
+        print("Usage: python WebScrap.py https://example.com [-state crawl_state.sqlite3] [-extractor bs4|lxml|main]",
+              file=sys.stderr)
         sys.exit(1)
 
-    url = sys.argv[1]
-    data = simple_scrape(url)
+    url = args[0]
+    options = dict(zip(args[1::2], args[2::2]))
+    store = None
+    extractor = None
+    if options:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "WebScrapper"))
+        from crawl_store import CrawlStore
+        from extractors import get_extractor
+        if "-state" in options:
+            store = CrawlStore(options["-state"])
+        if "-extractor" in options:
+            extractor = get_extractor(options["-extractor"])
+    data = simple_scrape(url, store=store, extractor=extractor)
     print(json.dumps(data, indent=2))
\ No newline at end of file
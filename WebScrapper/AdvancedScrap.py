@@ -2,11 +2,16 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import sys
 import json
 import os
+import time
+import asyncio
+import inspect
+
+from crawl_store import CrawlStore, STATE_FILENAME
+from extractors import bs4_extract, extractor_fingerprint, get_extractor, split_template_filter, EXTRACTORS
 
 visited_urls = set()
 failed_urls = []
@@ -16,61 +21,124 @@ def sanitize_filename(url):
     path = parsed.path.strip("/").replace("/", "_")
     return path if path else "index"
 
-def simple_scrape(url: str, recursive=False, output_dir=None, max_depth=2) -> list:
+def in_scope(link, base_domain, base_path):
+    parsed_link = urlparse(link)
+    return (
+        parsed_link.netloc == base_domain and
+        (
+            parsed_link.path == base_path or
+            parsed_link.path.startswith(base_path + '/')
+        ) and
+        not parsed_link.fragment
+    )
+
+# Original extraction: the whole page text via html.parser
+parse_page = bs4_extract
+
+def result_path(url, output_dir):
+    return os.path.join(output_dir, sanitize_filename(url) + ".txt")
+
+def save_result(result, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = result_path(result["url"], output_dir)
+    with open(filepath, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Saved to: {filepath}")
+
+def log_failures(failed, output_dir):
+    if failed and output_dir:
+        fail_log = os.path.join(output_dir, "failed.txt")
+        with open(fail_log, "w") as f:
+            f.write("\n".join(failed))
+        print(f"❌ Logged {len(failed)} failed URLs to {fail_log}")
+
+def extract_page(extractor, template_filter, url, html):
+    """Extract a page, returning the result to record (before template filtering), the final result and the links."""
+    recorded, links = extractor(url, html)
+    result = template_filter.filter(url, recorded) if template_filter is not None else recorded
+    return recorded, result, links
+
+def unchanged_page(store, current_url, status, body, output_dir, fingerprint=None, template_filter=None):
+    """
+    Return the stored page when the response shows it did not change and it was
+    extracted as `fingerprint` says, restoring a deleted output file.
+
+    The stored result goes through `template_filter` like a fetched page would,
+    so a re-crawl counts and strips template blocks the same as a fresh crawl.
+    """
+    record = store.unchanged(current_url, status, body, fingerprint) if store is not None else None
+    if record:
+        print(f"⏭️  Unchanged: {current_url}")
+        if template_filter is not None:
+            record = dict(record, result=template_filter.filter(current_url, record["result"]))
+        if output_dir and not os.path.exists(result_path(current_url, output_dir)):
+            save_result(record["result"], output_dir)
+    return record
+
+def open_store(output_dir, state_path=None):
+    """Open the crawl state given by -state, defaulting to a hidden file in the output directory."""
+    if state_path is None and output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        state_path = os.path.join(output_dir, STATE_FILENAME)
+    return CrawlStore(state_path) if state_path else None
+
+def simple_scrape(url: str, recursive=False, output_dir=None, max_depth=2, store=None, extractor=parse_page) -> list:
     results = []
     base_parsed = urlparse(url)
     base_domain = base_parsed.netloc
     base_path = base_parsed.path.rstrip('/')
+    # Results are recorded before template filtering, which runs on every page
+    extractor, template_filter = split_template_filter(extractor)
+    fingerprint = extractor_fingerprint(extractor)
+    if store is not None:
+        store.begin(url)
 
     def scrape(current_url, depth):
         if current_url in visited_urls or depth > max_depth:
             return
         visited_urls.add(current_url)
-        print(f"Visiting: {current_url} [Depth: {depth}]")
 
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(current_url, headers=headers, timeout=10)
-
-            if response.status_code == 404:
-                print(f"⚠️  Skipping 404: {current_url}", file=sys.stderr)
-                failed_urls.append(current_url)
-                return
-
-            response.raise_for_status()
+            record = (store.lookup(current_url, fingerprint)
+                      if store is not None and store.is_done(current_url) else None)
+            if record:
+                # Already processed before an interrupted run, only follow its links
+                result, links = record["result"], record["links"]
+                if template_filter is not None:
+                    result = template_filter.filter(current_url, result)
+            else:
+                print(f"Visiting: {current_url} [Depth: {depth}]")
+                headers = {'User-Agent': 'Mozilla/5.0'}
+                if store is not None:
+                    headers.update(store.conditional_headers(current_url, fingerprint))
+                    store.add_to_frontier(current_url, depth)
+                response = requests.get(current_url, headers=headers, timeout=10)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            content = soup.get_text(separator=' ', strip=True)
+                if response.status_code == 404:
+                    print(f"⚠️  Skipping 404: {current_url}", file=sys.stderr)
+                    failed_urls.append(current_url)
+                    return
 
-            result = {
-                "url": current_url,
-                "title": soup.title.string if soup.title else "",
-                "content": content
-            }
+                record = unchanged_page(store, current_url, response.status_code,
+                                        None if response.status_code == 304 else response.text, output_dir,
+                                        fingerprint, template_filter)
+                if record:
+                    result, links = record["result"], record["links"]
+                else:
+                    response.raise_for_status()
+                    recorded, result, links = extract_page(extractor, template_filter, current_url, response.text)
+                    if output_dir:
+                        save_result(result, output_dir)
+                    if store is not None:
+                        store.record(current_url, response.headers, response.text, recorded, links, fingerprint)
+                if store is not None:
+                    store.mark_done(current_url)
 
             results.append(result)
 
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-                filename = sanitize_filename(current_url) + ".txt"
-                filepath = os.path.join(output_dir, filename)
-                with open(filepath, 'w') as f:
-                    json.dump(result, f, indent=2)
-                print(f"✅ Saved to: {filepath}")
-
             if recursive and depth < max_depth:
-                for link_tag in soup.find_all('a', href=True):
-                    link = urljoin(current_url, link_tag['href'])
-                    parsed_link = urlparse(link)
-
-                    if (
-                        parsed_link.netloc == base_domain and
-                        (
-                            parsed_link.path == base_path or
-                            parsed_link.path.startswith(base_path + '/')
-                        ) and
-                        not parsed_link.fragment
-                    ):
+                for link in links:
+                    if in_scope(link, base_domain, base_path):
                         scrape(link, depth + 1)
 
         except Exception as e:
@@ -78,18 +146,206 @@ def simple_scrape(url: str, recursive=False, output_dir=None, max_depth=2) -> li
             failed_urls.append(current_url)
 
     scrape(url, depth=0)
+    if store is not None:
+        store.finish()
+    log_failures(failed_urls, output_dir)
 
-    if failed_urls and output_dir:
-        fail_log = os.path.join(output_dir, "failed.txt")
-        with open(fail_log, "w") as f:
-            f.write("\n".join(failed_urls))
-        print(f"❌ Logged {len(failed_urls)} failed URLs to {fail_log}")
+    return results
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces request starts by `delay` seconds."""
+
+    def __init__(self, per_host=4, delay=0.0):
+        self.per_host = per_host
+        self.delay = delay
+        self.semaphores = {}
+        self.locks = {}
+        self.next_start = {}
+
+    def __call__(self, host):
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.per_host)
+            self.locks[host] = asyncio.Lock()
+        return self.semaphores[host]
 
+    async def wait_turn(self, host):
+        async with self.locks[host]:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+async def async_crawl(url: str, recursive=False, output_dir=None, max_depth=2, workers=16,
+                      per_host=4, delay=0.0, timeout=10, max_pages=None, store=None,
+                      extractor=parse_page, on_page=None):
+    """
+    Crawl breadth-first with a pool of async workers.
+
+    Follows the same domain and path-prefix scope as simple_scrape. Requests share
+    one connection pool, at most `per_host` run against a host at a time, and
+    request starts to a host are spaced by `delay` seconds.
+
+    Args:
+        url: Start URL
+        recursive: Follow in-scope links
+        output_dir: Save each page as JSON in this directory
+        max_depth: Maximum link depth from the start URL
+        workers: Number of concurrent workers
+        per_host: Maximum concurrent requests per host
+        delay: Politeness delay between requests to the same host, in seconds
+        timeout: Request timeout in seconds
+        max_pages: Stop adding URLs to the frontier after this many
+        store: Optional CrawlStore for conditional requests and a resumable frontier
+        extractor: Callable (url, html) -> (result, links), see extractors.py
+        on_page: Optional callback receiving each result as soon as it is extracted, awaited if it
+            returns an awaitable, it runs on the event loop and must not block
+
+    Returns:
+        (results, stats) where stats has pages, unchanged, failed, seconds and pages_per_sec, plus
+        gone_urls (pages answering 404 or 410) and complete (every in-scope page was reached: no
+        failures, no max_pages cut-off and not resumed from a checkpoint)
+    """
+    import aiohttp
+
+    base_parsed = urlparse(url)
+    base_domain = base_parsed.netloc
+    base_path = base_parsed.path.rstrip('/')
+    # Results are recorded before template filtering, which runs on every page
+    extractor, template_filter = split_template_filter(extractor)
+    fingerprint = extractor_fingerprint(extractor)
+
+    results = []
+    failed = []
+    gone = []
+    unchanged = []
+    truncated = False
+    frontier = asyncio.Queue()
+    pending = store.begin(url) if store is not None else []
+    resumed = bool(pending)
+    if pending:
+        print(f"🔁 Resuming crawl with {len(pending)} URLs in the frontier")
+        seen = store.seen()
+    else:
+        pending = [(url, 0)]
+        seen = {url}
+        if store is not None:
+            store.add_to_frontier(url, 0)
+    for entry in pending:
+        frontier.put_nowait(entry)
+    limiter = HostLimiter(per_host, delay)
+    loop = asyncio.get_running_loop()
+
+    async def fetch(session, current_url, depth):
+        nonlocal truncated
+        host = urlparse(current_url).netloc
+        print(f"Visiting: {current_url} [Depth: {depth}]")
+        headers = store.conditional_headers(current_url, fingerprint) if store is not None else {}
+        async with limiter(host):
+            await limiter.wait_turn(host)
+            async with session.get(current_url, headers=headers) as response:
+                if response.status in (404, 410):
+                    print(f"⚠️  Skipping {response.status}: {current_url}", file=sys.stderr)
+                    failed.append(current_url)
+                    gone.append(current_url)
+                    return
+                if response.status != 304:
+                    response.raise_for_status()
+                html = None if response.status == 304 else await response.text(errors="replace")
+
+        record = unchanged_page(store, current_url, response.status, html, output_dir, fingerprint,
+                                template_filter)
+        if record:
+            result, links = record["result"], record["links"]
+            unchanged.append(current_url)
+        else:
+            if html is None:
+                raise ValueError("304 Not Modified for a page that is not in the crawl store")
+            # Parsing is CPU-bound, keep it off the event loop
+            recorded, result, links = await loop.run_in_executor(None, extract_page, extractor, template_filter,
+                                                                 current_url, html)
+            if output_dir:
+                save_result(result, output_dir)
+            if store is not None:
+                store.record(current_url, response.headers, html, recorded, links, fingerprint)
+        results.append(result)
+        if on_page is not None:
+            handed_over = on_page(result)
+            if inspect.isawaitable(handed_over):
+                await handed_over
+
+        if recursive and depth < max_depth:
+            for link in links:
+                if link in seen or not in_scope(link, base_domain, base_path):
+                    continue
+                if max_pages is not None and len(seen) >= max_pages:
+                    truncated = True
+                    break
+                seen.add(link)
+                frontier.put_nowait((link, depth + 1))
+                if store is not None:
+                    store.add_to_frontier(link, depth + 1)
+        if store is not None:
+            store.mark_done(current_url)
+
+    async def worker(session):
+        while True:
+            current_url, depth = await frontier.get()
+            try:
+                await fetch(session, current_url, depth)
+            except Exception as e:
+                print(f"❌ Failed to scrape {current_url}: {e}", file=sys.stderr)
+                failed.append(current_url)
+            finally:
+                frontier.task_done()
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=workers)
+    session_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=session_timeout,
+                                     headers={'User-Agent': 'Mozilla/5.0'}) as session:
+        tasks = [asyncio.create_task(worker(session)) for _ in range(workers)]
+        await frontier.join()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    seconds = time.perf_counter() - started
+
+    if store is not None:
+        store.finish()
+    log_failures(failed, output_dir)
+    stats = {
+        "pages": len(results),
+        "unchanged": len(unchanged),
+        "failed": len(failed),
+        "gone_urls": gone,
+        "complete": not (truncated or resumed or len(failed) > len(gone)),
+        "seconds": seconds,
+        "pages_per_sec": len(results) / seconds if seconds else 0.0,
+    }
+    return results, stats
+
+def concurrent_scrape(url: str, recursive=False, output_dir=None, max_depth=2, **kwargs) -> list:
+    results, stats = asyncio.run(async_crawl(url, recursive, output_dir, max_depth, **kwargs))
+    print(f"⏱️  Crawled {stats['pages']} pages in {stats['seconds']:.1f}s "
+          f"({stats['pages_per_sec']:.1f} pages/sec, {stats['unchanged']} unchanged, "
+          f"{stats['failed']} failed)", file=sys.stderr)
     return results
 
+def flag_value(name, cast, default):
+    if name not in sys.argv:
+        return default
+    try:
+        return cast(sys.argv[sys.argv.index(name) + 1])
+    except (IndexError, ValueError):
+        print(f"❌ Missing or invalid value for {name}", file=sys.stderr)
+        sys.exit(1)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python AdvancedScrap.py <url> [-o output_dir] [-depth N]", file=sys.stderr)
+        print("Usage: python AdvancedScrap.py <url> [-o output_dir] [-depth N] "
+              "[-workers N] [-per-host N] [-delay S] [-max-pages N] [-state file] [-no-state] "
+              f"[-extractor {'|'.join(EXTRACTORS)}] [-strip-templates]", file=sys.stderr)
         sys.exit(1)
 
     raw_url = sys.argv[1]
@@ -110,10 +366,29 @@ if __name__ == "__main__":
             print("❌ Missing or invalid number for -depth", file=sys.stderr)
             sys.exit(1)
 
+    # -workers switches to the concurrent crawler
+    workers = flag_value("-workers", int, None)
+    per_host = flag_value("-per-host", int, 4)
+    delay = flag_value("-delay", float, 0.0)
+    max_pages = flag_value("-max-pages", int, None)
+    state_path = flag_value("-state", str, None)
+    store = None if "-no-state" in sys.argv else open_store(output_dir, state_path)
+    try:
+        extractor = get_extractor(flag_value("-extractor", str, "bs4"), "-strip-templates" in sys.argv)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
     recursive = raw_url.endswith("/*")
     url = raw_url.rstrip("/*")
 
-    data = simple_scrape(url, recursive=recursive, output_dir=output_dir, max_depth=max_depth)
+    if workers:
+        data = concurrent_scrape(url, recursive=recursive, output_dir=output_dir, max_depth=max_depth,
+                                 workers=workers, per_host=per_host, delay=delay, max_pages=max_pages, store=store,
+                                 extractor=extractor)
+    else:
+        data = simple_scrape(url, recursive=recursive, output_dir=output_dir, max_depth=max_depth, store=store,
+                             extractor=extractor)
 
     if not output_dir:
         print(json.dumps(data, indent=2))
\ No newline at end of file
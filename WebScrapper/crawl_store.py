@@ -0,0 +1,170 @@
+"""
+CrawlStore - Persistent HTTP validators and resumable crawl state for the scrapers.
+
+Per URL it records the ETag, Last-Modified, a hash of the body, the extracted
+links and the last result with the fingerprint of the extractor that produced
+it, so a re-crawl can send conditional requests and skip pages that did not
+change (304, or an identical body). A page extracted with other settings
+counts as changed and is fetched and extracted again. It also
+checkpoints the frontier of the current crawl, so an interrupted crawl
+resumes where it stopped instead of starting over.
+
+Usage:
+    store = CrawlStore("output/.crawl_state.sqlite3")
+    pending = store.begin(start_url)
+    headers = store.conditional_headers(url)
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+from typing import List, Optional, Tuple
+
+STATE_FILENAME = ".crawl_state.sqlite3"
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8", errors="replace")).hexdigest()
+
+
+class CrawlStore:
+    """
+    SQLite-backed crawl state.
+
+    Args:
+        path: SQLite file to keep the state in
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT NOT NULL,"
+            " links TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " fingerprint TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "fingerprint" not in columns:
+            # State written before extractions were fingerprinted, its pages are re-extracted
+            self._conn.execute("ALTER TABLE pages ADD COLUMN fingerprint TEXT")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " url TEXT PRIMARY KEY,"
+            " depth INTEGER NOT NULL,"
+            " done INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    # Frontier checkpoint
+
+    def begin(self, start_url: str) -> List[Tuple[str, int]]:
+        """
+        Start or resume a crawl.
+
+        Returns:
+            Pending (url, depth) entries of an unfinished crawl from the same
+            start URL, or [] after resetting the frontier for a new crawl
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'start_url'").fetchone()
+        if row and row[0] == start_url:
+            pending = self._conn.execute(
+                "SELECT url, depth FROM frontier WHERE done = 0 ORDER BY depth, rowid").fetchall()
+            if pending:
+                return pending
+
+        self._conn.execute("DELETE FROM frontier")
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('start_url', ?)", (start_url,))
+        self._conn.commit()
+        return []
+
+    def seen(self) -> set:
+        """URLs already added to the frontier of the current crawl."""
+        return {row[0] for row in self._conn.execute("SELECT url FROM frontier")}
+
+    def is_done(self, url: str) -> bool:
+        row = self._conn.execute("SELECT done FROM frontier WHERE url = ?", (url,)).fetchone()
+        return bool(row and row[0])
+
+    def add_to_frontier(self, url: str, depth: int) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", (url, depth))
+
+    def mark_done(self, url: str) -> None:
+        """Mark a URL processed, committing it together with the links it added to the frontier."""
+        self._conn.execute("UPDATE frontier SET done = 1 WHERE url = ?", (url,))
+        self._conn.commit()
+
+    def finish(self) -> None:
+        """Clear the frontier once a crawl has completed, so the next run starts over."""
+        self._conn.execute("DELETE FROM frontier")
+        self._conn.commit()
+
+    # Conditional fetches
+
+    def lookup(self, url: str, fingerprint: Optional[str] = None) -> Optional[dict]:
+        """Stored page of a URL, None if there is none or, given a `fingerprint`, it was extracted differently."""
+        row = self._conn.execute(
+            "SELECT etag, last_modified, content_hash, links, result, fingerprint FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if not row or (fingerprint is not None and row[5] != fingerprint):
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_hash": row[2],
+                "links": json.loads(row[3]), "result": json.loads(row[4]), "fingerprint": row[5]}
+
+    def conditional_headers(self, url: str, fingerprint: Optional[str] = None) -> dict:
+        """
+        If-None-Match / If-Modified-Since headers for a previously fetched URL.
+
+        None when the stored result came from another extraction than `fingerprint`,
+        as the body is needed to extract the page again.
+        """
+        row = self._conn.execute("SELECT etag, last_modified, fingerprint FROM pages WHERE url = ?",
+                                 (url,)).fetchone()
+        headers = {}
+        if row and fingerprint is not None and row[2] != fingerprint:
+            return headers
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def unchanged(self, url: str, status: int, body: Optional[str] = None,
+                  fingerprint: Optional[str] = None) -> Optional[dict]:
+        """
+        Return the stored page if a response shows it did not change.
+
+        Args:
+            url: Requested URL
+            status: HTTP status of the response
+            body: Response body, compared by hash when the server ignored the validators
+            fingerprint: Extraction the result must come from, see extractors.extractor_fingerprint
+        """
+        if status != 304 and body is None:
+            return None
+        record = self.lookup(url, fingerprint)
+        if record and (status == 304 or record["content_hash"] == content_hash(body)):
+            return record
+        return None
+
+    def record(self, url: str, headers, body: str, result: dict, links: List[str],
+               fingerprint: Optional[str] = None) -> None:
+        """Store validators, body hash, links and result of a fetched page, and the extraction `fingerprint`."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pages"
+            " (url, etag, last_modified, content_hash, links, result, fetched_at, fingerprint)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, headers.get("ETag"), headers.get("Last-Modified"), content_hash(body),
+             json.dumps(links), json.dumps(result), time.time(), fingerprint)
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
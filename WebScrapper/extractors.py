@@ -0,0 +1,251 @@
+"""
+Extractors - Pluggable HTML-to-text extraction for the scrapers.
+
+An extractor turns (url, html) into the scraped result and the page links:
+
+    result, links = extractor(url, html)
+
+Available extractors:
+    bs4   BeautifulSoup with html.parser, the whole page text (original behaviour)
+    lxml  lxml parser, without scripts, navigation, footers and cookie banners
+    main  lxml, keeping only the main content block of the page
+
+Any extractor can be wrapped with a TemplateFilter, which drops text blocks
+(menus, footers, sidebars) that repeat across pages of the same site.
+
+Usage:
+    extractor = get_extractor("main", strip_templates=True)
+    result, links = extractor(url, html)
+"""
+
+import re
+import hashlib
+import threading
+from collections import defaultdict
+from urllib.parse import urljoin, urlparse
+from typing import List, Tuple
+
+# Elements that never hold page content
+DROP_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "form", "nav", "aside")
+
+# Page-level <header>/<footer>, the ones inside <article>/<main> hold titles and bylines
+SITE_CHROME = "//header[not(ancestor::article or ancestor::main)] | //footer[not(ancestor::article or ancestor::main)]"
+
+# class/id fragments of site chrome
+BOILERPLATE = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|masthead|footer|sidebar|breadcrumbs?|cookies?|consent|banner|"
+    r"popup|modal|share|social|newsletter|subscribe|related|comments?)($|[\s_-])",
+    re.IGNORECASE
+)
+
+# Elements whose text is split into separate blocks
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "table", "tr", "td", "th",
+              "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "dd", "dt", "dl", "br"}
+
+
+def bs4_extract(url: str, html: str) -> Tuple[dict, List[str]]:
+    """Whole page text with BeautifulSoup and html.parser."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    result = {
+        "url": url,
+        "title": soup.title.string if soup.title else "",
+        "content": soup.get_text(separator=' ', strip=True)
+    }
+    links = [urljoin(url, link_tag['href']) for link_tag in soup.find_all('a', href=True)]
+    return result, links
+
+
+def _blocks(element) -> List[str]:
+    """Split the text of an lxml element into whitespace-normalized blocks."""
+    parts = []
+    current = []
+
+    def flush():
+        text = " ".join(" ".join(current).split())
+        if text:
+            parts.append(text)
+        current.clear()
+
+    def walk(node):
+        block = isinstance(node.tag, str) and node.tag in BLOCK_TAGS
+        if block:
+            flush()
+        if node.text and isinstance(node.tag, str):
+            current.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                current.append(child.tail)
+        if block:
+            flush()
+
+    walk(element)
+    flush()
+    return parts
+
+
+def _content_length(element) -> int:
+    """Length of the text outside links."""
+    links = sum(len(a.text_content()) for a in element.iter("a"))
+    return len(element.text_content()) - links
+
+
+def _main_block(body):
+    """Pick <main>/<article>, otherwise descend into the container holding most of the non-link text."""
+    for xpath in ("//main", "//*[@role='main']", "//article"):
+        found = body.xpath(xpath)
+        if found:
+            return max(found, key=lambda e: len(e.text_content()))
+
+    best, best_length = body, _content_length(body)
+    while True:
+        children = [(child, _content_length(child)) for child in best
+                    if isinstance(child.tag, str) and child.tag in ("div", "section", "td", "table", "tr")]
+        if not children:
+            return best
+        child, length = max(children, key=lambda pair: pair[1])
+        if length < 0.7 * best_length:
+            return best
+        best, best_length = child, length
+
+
+class LxmlExtractor:
+    """
+    lxml-based extractor that drops site chrome.
+
+    Args:
+        main_content: Keep only the main content block instead of the whole body
+    """
+
+    def __init__(self, main_content: bool = False):
+        self.main_content = main_content
+
+    def __call__(self, url: str, html: str) -> Tuple[dict, List[str]]:
+        import lxml.html
+
+        if not html.strip():
+            return {"url": url, "title": "", "content": ""}, []
+        # lxml rejects str input with an XML encoding declaration
+        doc = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"),
+                                            parser=lxml.html.HTMLParser(encoding="utf-8"))
+        title = doc.findtext(".//title") or ""
+        links = [urljoin(url, href) for href in doc.xpath("//a/@href")]
+
+        for element in list(doc.iter(*DROP_TAGS)) + doc.xpath(SITE_CHROME):
+            element.drop_tree()
+        for element in doc.xpath("//*[@class or @id]"):
+            if element.getparent() is None or element.tag in ("html", "body", "main", "article"):
+                continue
+            marker = f"{element.get('class', '')} {element.get('id', '')}"
+            if BOILERPLATE.search(marker):
+                element.drop_tree()
+
+        body = doc.find("body") if doc.find("body") is not None else doc
+        root = _main_block(body) if self.main_content else body
+        result = {"url": url, "title": title.strip(), "content": "\n".join(_blocks(root))}
+        return result, links
+
+
+class TemplateFilter:
+    """
+    Drops text blocks that repeat across pages of the same site.
+
+    Works on the newline-separated blocks of the lxml extractors. Streaming: a
+    block is removed once it has been seen on `min_pages` distinct pages of the
+    same host, so the first pages of a crawl keep their template.
+
+    Args:
+        extractor: Extractor to wrap
+        min_pages: Number of pages a block must appear on to count as template
+        min_chars: Shorter blocks are kept, they are too generic to fingerprint
+    """
+
+    def __init__(self, extractor, min_pages: int = 3, min_chars: int = 20):
+        self.extractor = extractor
+        self.min_pages = min_pages
+        self.min_chars = min_chars
+        self._pages = defaultdict(lambda: defaultdict(set))
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, html: str) -> Tuple[dict, List[str]]:
+        result, links = self.extractor(url, html)
+        return self.filter(url, result), links
+
+    def filter(self, url: str, result: dict) -> dict:
+        """Count the blocks of an extracted result and drop the ones that are template."""
+        host = urlparse(url).netloc
+
+        kept = []
+        with self._lock:
+            seen = self._pages[host]
+            for block in result["content"].split("\n"):
+                if len(block) < self.min_chars:
+                    kept.append(block)
+                    continue
+                key = hashlib.sha1(block.encode("utf-8")).digest()
+                seen[key].add(url)
+                if len(seen[key]) < self.min_pages:
+                    kept.append(block)
+
+        return dict(result, content="\n".join(kept))
+
+
+def split_template_filter(extractor):
+    """
+    Split off a TemplateFilter.
+
+    Returns:
+        (extractor, TemplateFilter or None): the extractor whose results can be stored and
+        reused, and the filter to apply on top of them
+    """
+    if isinstance(extractor, TemplateFilter):
+        return extractor.extractor, extractor
+    return extractor, None
+
+
+EXTRACTORS = {
+    "bs4": lambda: bs4_extract,
+    "lxml": lambda: LxmlExtractor(main_content=False),
+    "main": lambda: LxmlExtractor(main_content=True),
+}
+
+
+def extractor_fingerprint(extractor) -> str:
+    """
+    Name and settings of an extractor, stored with crawled pages so that
+    results of another extraction are not reused.
+
+    Custom extractors can set a `fingerprint` attribute, otherwise their
+    qualified name is used.
+    """
+    if isinstance(extractor, TemplateFilter):
+        return (f"{extractor_fingerprint(extractor.extractor)}"
+                f"+templates(min_pages={extractor.min_pages},min_chars={extractor.min_chars})")
+    if isinstance(extractor, LxmlExtractor):
+        return "main" if extractor.main_content else "lxml"
+    if extractor is bs4_extract:
+        return "bs4"
+    fingerprint = getattr(extractor, "fingerprint", None)
+    if fingerprint:
+        return fingerprint
+    name = getattr(extractor, "__qualname__", type(extractor).__qualname__)
+    return f"{getattr(extractor, '__module__', '')}.{name}"
+
+
+def get_extractor(name: str = "bs4", strip_templates: bool = False):
+    """
+    Create an extractor by name.
+
+    Args:
+        name: "bs4", "lxml" or "main"
+        strip_templates: Drop blocks repeated across pages of the same site
+
+    Returns:
+        Callable (url, html) -> (result, links)
+    """
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}', choose from {', '.join(EXTRACTORS)}")
+    extractor = EXTRACTORS[name]()
+    return TemplateFilter(extractor) if strip_templates else extractor
@@ -16,6 +16,6 @@ else
 fi
 
 # Run the scraper
-python3 AdvancedScrap.py "${BASE_URL}*" -o "$OUTPUT_DIR" -depth "$DEPTH" > "$LOG_FILE" 2>&1
+python3 AdvancedScrap.py "${BASE_URL}*" -o "$OUTPUT_DIR" -depth "$DEPTH" -workers 16 -per-host 4 -delay 0.1 -extractor main -strip-templates > "$LOG_FILE" 2>&1
 
 echo "✅ Finished. Logs saved to $LOG_FILE"
\ No newline at end of file
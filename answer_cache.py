@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+AnswerCache - A persistent cache of RetrievalQA answers.
+
+Answers are looked up by the normalized query, and optionally by semantic
+similarity: a new query whose embedding is within `semantic_threshold` cosine
+distance of a cached query reuses that answer. Every entry is tied to a
+fingerprint of the vector store, so re-indexing invalidates it. Entries expire
+after a TTL and the least recently used ones are evicted past `max_entries`.
+
+Usage:
+    from answer_cache import cached_qa_chain
+    qa_chain = cached_qa_chain(create_qa_chain(directory), directory)
+    result = qa_chain({"query": question})
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import List, Optional, Tuple
+
+MANIFEST_FILENAME = "index_manifest.json"
+EMBEDDING_FILENAME = "embedding.json"
+CACHE_FILENAME = "answer_cache.sqlite3"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"[\s?!.]+$", "", " ".join(query.lower().split()))
+
+
+def store_fingerprint(vectorstore, persist_directory: Optional[str] = None) -> str:
+    """
+    Fingerprint the contents of a vector store.
+
+    Uses the index manifest written by chroma_vectorize_data.py when there is
+    one, otherwise the sorted chunk IDs stored in the collection. The recorded
+    embedding provider, model and dimension are included too, so re-embedding
+    the same chunks with another model also invalidates cached answers.
+
+    Args:
+        vectorstore: Chroma, local or vector file store
+        persist_directory: Directory (or vector file) the store was loaded from
+    """
+    digest = hashlib.sha256()
+    manifest = os.path.join(persist_directory or "", MANIFEST_FILENAME)
+    if persist_directory and os.path.isfile(manifest):
+        with open(manifest, 'rb') as f:
+            digest.update(f.read())
+    elif persist_directory and os.path.isfile(persist_directory):
+        stat = os.stat(persist_directory)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    elif hasattr(vectorstore, "_collection"):
+        for chunk_id in sorted(vectorstore._collection.get(include=[])["ids"]):
+            digest.update(chunk_id.encode() + b"\0")
+    else:
+        for chunk_id in sorted(getattr(vectorstore, "ids", [])):
+            digest.update(chunk_id.encode() + b"\0")
+
+    # A vector file records its embeddings in the header, covered by its size and mtime
+    embedding_info = os.path.join(persist_directory or "", EMBEDDING_FILENAME)
+    if persist_directory and os.path.isfile(embedding_info):
+        with open(embedding_info, 'rb') as f:
+            digest.update(b"\0" + f.read())
+    elif getattr(vectorstore, "embeddings", None) is not None:
+        from embedding_providers import describe_embeddings
+
+        digest.update(b"\0" + json.dumps(describe_embeddings(vectorstore.embeddings), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class AnswerCache:
+    """
+    SQLite-backed answer cache with exact and semantic lookup.
+
+    Args:
+        path: SQLite file to store answers in
+        fingerprint: Fingerprint of the vector store the answers came from
+        embeddings: Embedding function for semantic lookup, exact-only when None
+        semantic_threshold: Maximum cosine distance for a semantic hit
+        max_entries: Entries kept before least recently used ones are evicted
+        ttl_seconds: Optional lifetime of an entry
+    """
+
+    def __init__(self, path: str, fingerprint: str, embeddings=None, semantic_threshold: float = 0.05,
+                 max_entries: int = 1000, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.embeddings = embeddings
+        self.semantic_threshold = semantic_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key TEXT PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " sources TEXT NOT NULL,"
+            " embedding BLOB,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Answers from an older version of the store can never be hit again
+        self._conn.execute("DELETE FROM answers WHERE fingerprint != ?", (fingerprint,))
+        self._conn.commit()
+
+    def _key(self, normalized: str) -> str:
+        return hashlib.sha256(f"{self.fingerprint}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _count(self, name: str) -> None:
+        self._conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM answers WHERE created < ?", (time.time() - self.ttl_seconds,))
+
+    def _hit(self, key: str, answer: str, sources: str, kind: str) -> dict:
+        from langchain_core.documents import Document
+
+        self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count(kind)
+        self._conn.commit()
+        # The same shape as a RetrievalQA result
+        documents = [Document(page_content=source.get("content", ""), metadata=source.get("metadata") or {})
+                     for source in json.loads(sources)]
+        return {"result": answer, "source_documents": documents, "cache": kind}
+
+    def _semantic_lookup(self, vector: List[float]):
+        import numpy as np
+
+        query = np.asarray(vector, dtype=np.float32)
+        # Entries embedded with another dimension can't be compared with this query, or ever hit again
+        size = query.nbytes
+        self._conn.execute("UPDATE answers SET embedding = NULL WHERE embedding IS NOT NULL AND length(embedding) != ?",
+                           (size,))
+        rows = self._conn.execute(
+            "SELECT key, answer, sources, embedding FROM answers WHERE embedding IS NOT NULL"
+        ).fetchall()
+        if not rows:
+            return None
+        matrix = np.vstack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ query) / norms
+        best = int(np.argmax(similarities))
+        if 1.0 - similarities[best] <= self.semantic_threshold:
+            return rows[best]
+        return None
+
+    def get(self, query: str, embedding: Optional[List[float]] = None) -> Optional[dict]:
+        """
+        Look up a cached answer.
+
+        Args:
+            query: The user question
+            embedding: Optional query embedding, computed when semantic lookup needs it
+
+        Returns:
+            {"result", "source_documents", "cache"} or None on a miss
+        """
+        return self.lookup(query, embedding)[0]
+
+    def lookup(self, query: str,
+               embedding: Optional[List[float]] = None) -> Tuple[Optional[dict], Optional[List[float]]]:
+        """
+        Look up a cached answer, embedding the query only when there is no exact hit.
+
+        Returns:
+            The hit as returned by get (None on a miss), and the query embedding if one was
+            needed, to pass on to put
+        """
+        key = self._key(normalize_query(query))
+        with self._lock:
+            self._expire()
+            row = self._conn.execute("SELECT answer, sources FROM answers WHERE key = ?", (key,)).fetchone()
+            if row:
+                return self._hit(key, row[0], row[1], "exact_hits"), embedding
+
+        if self.embeddings is not None:
+            embedding = embedding if embedding is not None else self.embeddings.embed_query(query)
+            with self._lock:
+                match = self._semantic_lookup(embedding)
+                if match:
+                    return self._hit(match[0], match[1], match[2], "semantic_hits"), embedding
+
+        with self._lock:
+            self._count("misses")
+            self._conn.commit()
+        return None, embedding
+
+    def put(self, query: str, answer: str, sources: Optional[List[dict]] = None,
+            embedding: Optional[List[float]] = None) -> None:
+        """Store an answer, evicting the least recently used entries past `max_entries`."""
+        if embedding is None and self.embeddings is not None:
+            embedding = self.embeddings.embed_query(query)
+        blob = array("f", embedding).tobytes() if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, fingerprint, query, answer, sources, embedding, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(normalize_query(query)), self.fingerprint, query, answer,
+                 json.dumps(sources or []), blob, now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                " SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return cumulative hit/miss counts, the hit rate and the number of entries."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        stats = {name: counts.get(name, 0) for name in ("exact_hits", "semantic_hits", "misses")}
+        total = sum(stats.values())
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / total if total else 0.0
+        stats["entries"] = entries
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedQAChain:
+    """
+    Callable wrapper that answers from an AnswerCache before running the QA chain.
+
+    Calls look like `qa_chain({"query": ...})` and return the same dict with an
+    extra "cache" key ("exact_hits", "semantic_hits" or None).
+    """
+
+    def __init__(self, qa_chain, cache: AnswerCache):
+        self.qa_chain = qa_chain
+        self.cache = cache
+        self.retriever = qa_chain.retriever
+        # Cache outcome of the last stream_answer call
+        self.last_cache = None
+
+    def __call__(self, inputs: dict) -> dict:
+        query = inputs["query"]
+        cached, embedding = self.cache.lookup(query)
+        if cached:
+            return cached
+
+        result = dict(self.qa_chain(inputs))
+        sources = [{"content": doc.page_content, "metadata": doc.metadata}
+                   for doc in result.get("source_documents", [])]
+        self.cache.put(query, result["result"], sources, embedding=embedding)
+        result["cache"] = None
+        return result
+
+    def stream_answer(self, query: str, source_documents: Optional[list] = None):
+        """
+        Yield a cached answer at once, or stream the chain's answer and cache it when complete.
+
+        Nothing is retrieved on a hit. On a miss the query embedding from the
+        lookup is usually in the embedding cache already, so retrieval doesn't
+        pay for it again.
+        """
+        from chroma_context_agent import stream_answer
+
+        cached, embedding = self.cache.lookup(query)
+        self.last_cache = cached["cache"] if cached else None
+        if cached:
+            if source_documents is not None:
+                source_documents.extend(cached["source_documents"])
+            yield cached["result"]
+            return
+
+        documents = []
+        parts = []
+        for token in stream_answer(self.qa_chain, query, documents):
+            parts.append(token)
+            yield token
+        if source_documents is not None:
+            source_documents.extend(documents)
+        sources = [{"content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+        self.cache.put(query, "".join(parts), sources, embedding=embedding)
+
+
+def cached_qa_chain(qa_chain, persist_directory: str, path: Optional[str] = None, semantic: bool = True,
+                    semantic_threshold: float = 0.05, max_entries: int = 1000,
+                    ttl_seconds: Optional[float] = None) -> CachedQAChain:
+    """
+    Wrap a RetrievalQA chain with an answer cache tied to its vector store.
+
+    Args:
+        qa_chain: Chain created by create_qa_chain
+        persist_directory: Directory (or vector file) of the vector store
+        path: SQLite file, defaults to answer_cache.sqlite3 next to the store
+        semantic: Also reuse answers of near-duplicate queries
+        semantic_threshold: Maximum cosine distance for a semantic hit
+        max_entries: Entries kept before LRU eviction
+        ttl_seconds: Optional lifetime of an entry
+    """
+    vectorstore = qa_chain.retriever.vectorstore
+    if path is None:
+        base = persist_directory if os.path.isdir(persist_directory) else os.path.dirname(os.path.abspath(persist_directory))
+        path = os.path.join(base, CACHE_FILENAME)
+    cache = AnswerCache(
+        path,
+        store_fingerprint(vectorstore, persist_directory),
+        embeddings=vectorstore.embeddings if semantic else None,
+        semantic_threshold=semantic_threshold,
+        max_entries=max_entries,
+        ttl_seconds=ttl_seconds,
+    )
+    return CachedQAChain(qa_chain, cache)
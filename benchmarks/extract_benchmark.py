@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+ExtractBenchmark - Compare the scraper's HTML extractors on saved pages.
+
+Runs every extractor in WebScrapper/extractors.py over a directory of saved
+HTML files and reports the parse time per page and how many characters each
+one removes compared to the original BeautifulSoup whole-page text, i.e. how
+much less text would be chunked and embedded.
+
+Usage:
+    python3 benchmarks/extract_benchmark.py [--fixtures benchmarks/fixtures/html] [--runs 20] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+sys.path.append(os.path.join(ROOT, "WebScrapper"))
+
+from extractors import get_extractor
+
+# (label, extractor name, strip templates)
+CONFIGURATIONS = [
+    ("bs4", "bs4", False),
+    ("lxml", "lxml", False),
+    ("lxml+templates", "lxml", True),
+    ("main", "main", False),
+    ("main+templates", "main", True),
+]
+
+
+def load_fixtures(directory: str) -> List[Tuple[str, str]]:
+    """Return (url, html) pairs, all pages share one host so template stripping applies."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((f"https://fixtures.local/{os.path.basename(path)}", f.read()))
+    return pages
+
+
+def run(pages: List[Tuple[str, str]], runs: int = 20) -> List[dict]:
+    """Time each configuration over all pages, keeping the fastest of `runs` passes."""
+    results = []
+    baseline = None
+    for label, name, strip_templates in CONFIGURATIONS:
+        best = float("inf")
+        chars = 0
+        for _ in range(runs):
+            # A fresh extractor per pass, so template stripping starts from scratch
+            extractor = get_extractor(name, strip_templates=strip_templates)
+            started = time.perf_counter()
+            outputs = [extractor(url, html)[0]["content"] for url, html in pages]
+            best = min(best, time.perf_counter() - started)
+            chars = sum(len(content) for content in outputs)
+        if baseline is None:
+            baseline = chars
+        results.append({
+            "extractor": label,
+            "ms_per_page": best * 1000 / len(pages),
+            "chars": chars,
+            "chars_removed": baseline - chars,
+            "removed_pct": 100.0 * (baseline - chars) / baseline if baseline else 0.0,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML extractors on saved pages')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='Directory of saved .html files')
+    parser.add_argument('--runs', type=int, default=20, help='Passes per extractor, the fastest is kept')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    if not pages:
+        print(f"❌ No .html files in {args.fixtures}", file=sys.stderr)
+        return 1
+    results = run(pages, runs=args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(pages)} pages from {args.fixtures}")
+        for result in results:
+            print(f"{result['extractor']:<16} {result['ms_per_page']:7.2f} ms/page  "
+                  f"{result['chars']:8d} chars  {result['chars_removed']:7d} removed ({result['removed_pct']:.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
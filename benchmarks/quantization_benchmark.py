@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+QuantizationBenchmark - Recall, memory and speed of quantized local search.
+
+Searches the same vectors exactly and with each quantizer in quantization.py,
+with and without full-precision re-ranking, and reports recall@k against the
+exact results, the bytes scanned per vector, the total resident bytes and
+queries per second. Resident bytes count the codes, the quantizer's tables and
+the float32 vectors whenever they are read: always for exact search, and for
+re-ranking, which reads arbitrary rows. A persisted store memory-maps those
+vectors, so the OS can page them out, but a warm store holds them all.
+
+See quantization.py for why int8 saves memory rather than time.
+
+Vectors come from a persisted local store (`--store`), or are generated with
+a low-rank structure like real text embeddings. Queries are stored vectors
+with added noise.
+
+Usage:
+    python3 benchmarks/quantization_benchmark.py [--store ./local_store] [--vectors 20000] [--dim 1536] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from local_vectorstore import LocalVectorStore, _normalize
+
+# (label, quantization, rerank)
+CONFIGURATIONS = [
+    ("exact", None, 0),
+    ("int8", "int8", 0),
+    ("int8+rerank", "int8", 10),
+    ("pq", "pq", 0),
+    ("pq+rerank", "pq", 10),
+]
+
+
+def synthetic_vectors(count: int, dimension: int, rank: int = 64, seed: int = 0) -> np.ndarray:
+    """Normalized vectors on a noisy `rank`-dimensional subspace."""
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(count, rank)).astype(np.float32)
+    basis = rng.normal(size=(rank, dimension)).astype(np.float32)
+    noise = 0.05 * np.sqrt(rank) * rng.normal(size=(count, dimension)).astype(np.float32)
+    return _normalize(latent @ basis + noise)
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float = 0.02, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), count)]
+    return _normalize(picked + noise * rng.normal(size=picked.shape).astype(np.float32))
+
+
+def resident_bytes(store) -> int:
+    """Bytes a warm store holds for search: codes and tables, plus the float32 vectors if they are read."""
+    quantizer = store.quantizer
+    if quantizer is None:
+        return int(store.vectors.nbytes)
+    size = quantizer.codes.nbytes + sum(np.asarray(value).nbytes for value in quantizer.state().values())
+    if store.rerank:
+        size += store.vectors.nbytes
+    return int(size)
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int = 10, rerank: int = 10,
+        subspaces: int = None) -> List[dict]:
+    """Search `queries` with every configuration."""
+    store = LocalVectorStore(None)
+    store.add_vectors(vectors, [""] * len(vectors), ids=[str(i) for i in range(len(vectors))])
+
+    def search():
+        started = time.perf_counter()
+        found = [[int(doc.id) for doc, _ in store.similarity_search_by_vector_with_score(q, k=k)]
+                 for q in queries]
+        return found, time.perf_counter() - started
+
+    results = []
+    exact = None
+    trained = {}
+    for label, method, label_rerank in CONFIGURATIONS:
+        train_seconds = 0.0
+        if method is None:
+            store.quantizer = None
+        elif method in trained:
+            store.quantizer = trained[method]
+        else:
+            started = time.perf_counter()
+            store.quantize(method, **({"subspaces": subspaces} if method == "pq" and subspaces else {}))
+            train_seconds = time.perf_counter() - started
+            trained[method] = store.quantizer
+        store.rerank = rerank if label_rerank else 0
+        found, seconds = search()
+        if exact is None:
+            exact = found
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, exact)])
+        results.append({
+            "configuration": label,
+            f"recall@{k}": float(recall),
+            "bytes_per_vector": store.quantizer.bytes_per_vector() if store.quantizer else 4.0 * vectors.shape[1],
+            "resident_bytes": resident_bytes(store),
+            "qps": len(queries) / seconds,
+            "train_seconds": train_seconds,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quantized search of the local vector store')
+    parser.add_argument('--store', help='Persisted local store to take vectors from')
+    parser.add_argument('--vectors', type=int, default=20000, help='Synthetic vectors when no --store is given')
+    parser.add_argument('--dim', type=int, default=1536, help='Dimension of the synthetic vectors')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('-k', type=int, default=10, help='Results per query')
+    parser.add_argument('--rerank', type=int, default=10, help='Candidates per result re-ranked at full precision')
+    parser.add_argument('--subspaces', type=int, help='Product quantization subspaces, defaults to dim / 16')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if args.store:
+        vectors = np.asarray(LocalVectorStore.load(args.store, None).vectors, dtype=np.float32)
+        if not len(vectors):
+            print(f"❌ No vectors in {args.store}", file=sys.stderr)
+            return 1
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dim)
+    results = run(vectors, make_queries(vectors, args.queries), k=args.k, rerank=args.rerank,
+                  subspaces=args.subspaces)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {args.queries} queries, k={args.k}")
+        for result in results:
+            print(f"{result['configuration']:<12} recall@{args.k} {result[f'recall@{args.k}']:.3f}  "
+                  f"{result['bytes_per_vector']:7.0f} bytes/vector scanned  "
+                  f"{result['resident_bytes'] / 2 ** 20:8.1f} MB resident  {result['qps']:8.1f} QPS  "
+                  f"trained in {result['train_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
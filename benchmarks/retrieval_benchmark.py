@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+RetrievalBenchmark - Quality and speed of every backend and search mode.
+
+Indexes a corpus with each configuration (Chroma, Chroma + BM25 hybrid, the
+local store exact / IVF / int8 / PQ, and BM25 alone) and runs a labelled
+query set against it. Reports recall@k, MRR, p50/p95/p99 latency, QPS with
+concurrent queries, index build time and on-disk size, as text or JSON.
+
+Embeddings come from hashing_embeddings.HashingEmbeddings, so runs are
+deterministic and offline. Queries are JSONL records:
+
+    {"query": "What does dialing *69 do?", "sources": ["feature-codes.txt"], "contains": "*69"}
+
+A chunk is relevant when its source file name is in `sources` and it
+contains `contains` (either may be omitted). Without a query file, queries
+are sampled from the corpus: a sentence is the query and the chunks
+containing it are relevant.
+
+Usage:
+    python3 benchmarks/retrieval_benchmark.py [corpus] [--queries benchmarks/queries/siperb.jsonl] [-k 4] [--json]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from chroma_vectorize_data import create_vector_store, loadVectorstore
+from bm25_index import BM25Index, HybridRetriever, INDEX_FILENAME, RECORDS_FILENAME
+from file_loaders import load_documents
+from hashing_embeddings import HashingEmbeddings
+from text_splitter import SENTENCE_END, make_splitter
+
+DEFAULT_CORPUS = os.path.join(ROOT, "examples", "Siperb", "input")
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "siperb.jsonl")
+BM25_FILES = {INDEX_FILENAME, RECORDS_FILENAME}
+
+# (label, backend, ingest options, search mode)
+CONFIGURATIONS = [
+    ("chroma", "chroma", {}, "dense"),
+    ("chroma+bm25", "chroma", {"lexical": True}, "hybrid"),
+    ("local", "local", {}, "dense"),
+    ("local+ivf", "local", {"ann": True}, "dense"),
+    ("local+int8", "local", {"quantize": "int8"}, "dense"),
+    ("local+pq", "local", {"quantize": "pq"}, "dense"),
+    ("bm25", None, {}, "lexical"),
+]
+
+
+def _key(doc) -> tuple:
+    return os.path.basename(doc.metadata.get("source", "")), doc.page_content
+
+
+def load_queries(path: str) -> List[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def sample_queries(chunks, count: int = 50, seed: int = 0) -> List[dict]:
+    """Use a sentence of a random chunk as query, relevant chunks are those containing it."""
+    rng = random.Random(seed)
+    queries = []
+    for chunk in rng.sample(chunks, min(count, len(chunks))):
+        sentences = [s for s in SENTENCE_END.split(chunk.page_content) if 6 <= len(s.split()) <= 40]
+        if sentences:
+            sentence = rng.choice(sentences).strip()
+            queries.append({"query": sentence, "contains": sentence})
+    return queries
+
+
+def relevant_keys(query: dict, chunks) -> set:
+    sources = set(query.get("sources") or [])
+    contains = query.get("contains")
+    return {_key(chunk) for chunk in chunks
+            if (not sources or os.path.basename(chunk.metadata.get("source", "")) in sources)
+            and (not contains or contains in chunk.page_content)}
+
+
+def directory_size(path: str, include: Callable[[str], bool]) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files if include(name))
+    return total
+
+
+def build(backend: Optional[str], options: dict, mode: str, documents, chunks, path: str,
+          embeddings, k: int) -> tuple:
+    """Index the corpus for one configuration, returning (search function, build seconds, size in bytes)."""
+    started = time.perf_counter()
+    if mode == "lexical":
+        index = BM25Index()
+        index.add([str(i) for i in range(len(chunks))], chunks)
+        index.save(path)
+    else:
+        # The ingest scripts print progress, keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_vector_store(documents, path, embeddings=embeddings, backend=backend,
+                                lexical=options.get("lexical", False), ann=options.get("ann", False),
+                                quantize=options.get("quantize"), splitter=make_splitter())
+    seconds = time.perf_counter() - started
+
+    if mode == "lexical":
+        index = BM25Index.load(path)
+        search = lambda query: [doc for doc, _ in index.search_documents(query, k=k)]
+        size = directory_size(path, lambda name: name in BM25_FILES)
+    else:
+        store = loadVectorstore(path, embeddings, backend=backend)
+        if mode == "hybrid":
+            retriever = HybridRetriever(vectorstore=store, index=BM25Index.load(path), k=k, fetch_k=max(20, 4 * k))
+            search = retriever.invoke
+            size = directory_size(path, lambda name: True)
+        else:
+            search = lambda query: store.similarity_search(query, k=k)
+            size = directory_size(path, lambda name: name not in BM25_FILES)
+    return search, seconds, size
+
+
+def evaluate(search: Callable, queries: List[dict], relevant: List[set], k: int, repeat: int = 3,
+             concurrency: int = 8) -> dict:
+    """recall@k, MRR, latency percentiles of sequential queries, and QPS with `concurrency` threads."""
+    recalls, ranks = [], []
+    for query, keys in zip(queries, relevant):
+        found = [_key(doc) for doc in search(query["query"])][:k]
+        hits = [rank for rank, key in enumerate(found, 1) if key in keys]
+        recalls.append(len(hits) / min(len(keys), k) if keys else 0.0)
+        ranks.append(1.0 / hits[0] if hits else 0.0)
+
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            search(query["query"])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    texts = [query["query"] for query in queries] * repeat
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(search, texts))
+    qps = len(texts) / (time.perf_counter() - started)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {f"recall@{k}": float(np.mean(recalls)), "mrr": float(np.mean(ranks)),
+            "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "qps": qps}
+
+
+def run(corpus: str, queries: Optional[List[dict]] = None, k: int = 4, repeat: int = 3, concurrency: int = 8,
+        configurations=None, dimension: int = 384, work_dir: Optional[str] = None) -> dict:
+    """Benchmark every configuration on `corpus` and return the JSON report."""
+    embeddings = HashingEmbeddings(size=dimension)
+    documents = load_documents(corpus)
+    chunks = make_splitter().split_documents(documents)
+    queries = queries or sample_queries(chunks)
+    relevant = [relevant_keys(query, chunks) for query in queries]
+    unlabelled = sum(1 for keys in relevant if not keys)
+    if unlabelled:
+        print(f"⚠️  {unlabelled} queries match no chunk and count as misses", file=sys.stderr)
+
+    report = {"corpus": os.path.relpath(corpus, ROOT), "documents": len(documents), "chunks": len(chunks),
+              "queries": len(queries), "k": k, "embedding": f"hashing-{dimension}",
+              "concurrency": concurrency, "results": []}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for label, backend, options, mode in configurations or CONFIGURATIONS:
+            search, build_seconds, size = build(backend, options, mode, documents, chunks,
+                                                os.path.join(tmp, label), embeddings, k)
+            result = {"configuration": label, "mode": mode, "build_seconds": build_seconds, "size_bytes": size}
+            result.update(evaluate(search, queries, relevant, k, repeat, concurrency))
+            report["results"].append(result)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark retrieval quality and speed of every backend')
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help='File or directory to index')
+    parser.add_argument('--queries', help='Labelled JSONL queries, sampled from the corpus when omitted '
+                                          '(defaults to benchmarks/queries/siperb.jsonl for the Siperb corpus)')
+    parser.add_argument('-k', type=int, default=4, help='Results per query')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the queries for latency and QPS')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads issuing queries for the QPS run')
+    parser.add_argument('--dim', type=int, default=384, help='Dimension of the hashing embeddings')
+    parser.add_argument('--only', nargs='+', choices=[c[0] for c in CONFIGURATIONS], metavar='CONFIGURATION',
+                        help=f"Configurations to run, of: {', '.join(c[0] for c in CONFIGURATIONS)}")
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.corpus):
+        print(f"❌ Corpus {args.corpus} does not exist", file=sys.stderr)
+        return 1
+    queries_path = args.queries
+    if queries_path is None and os.path.abspath(args.corpus) == DEFAULT_CORPUS:
+        queries_path = DEFAULT_QUERIES
+    configurations = [c for c in CONFIGURATIONS if not args.only or c[0] in args.only]
+    report = run(args.corpus, load_queries(queries_path) if queries_path else None, k=args.k, repeat=args.repeat,
+                 concurrency=args.concurrency, configurations=configurations, dimension=args.dim)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['corpus']}: {report['chunks']} chunks, {report['queries']} queries, k={report['k']}, "
+              f"{report['embedding']} embeddings")
+        for r in report["results"]:
+            print(f"{r['configuration']:<12} recall@{args.k} {r[f'recall@{args.k}']:.3f}  MRR {r['mrr']:.3f}  "
+                  f"p50 {r['p50_ms']:6.2f} ms  p95 {r['p95_ms']:6.2f} ms  p99 {r['p99_ms']:6.2f} ms  "
+                  f"{r['qps']:8.1f} QPS  built in {r['build_seconds']:5.2f}s  {r['size_bytes'] / 1024:8.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
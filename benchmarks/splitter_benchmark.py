@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SplitterBenchmark - Compare the character splitter with the token-budget splitter.
+
+Loads each corpus with file_loaders.load_documents, splits it with the
+previous RecursiveCharacterTextSplitter(1000, 200) and with
+text_splitter.TokenTextSplitter (in-process and with a process pool), and
+reports throughput in MB/sec together with the chunk count and the
+distribution of tokens per chunk.
+
+Usage:
+    python3 benchmarks/splitter_benchmark.py [corpus ...] [--chunk-tokens 256] [--workers 4] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from file_loaders import load_documents
+from text_splitter import TokenTextSplitter, make_splitter, get_encoding
+
+DEFAULT_CORPORA = [
+    os.path.join(ROOT, "examples", "Shakespeare", "input_data", "shakespeare-dataset-main", "text"),
+    os.path.join(ROOT, "examples", "Siperb", "input"),
+]
+
+
+def token_distribution(chunks: List[str], encoding) -> dict:
+    counts = np.array([len(tokens) for tokens in encoding.encode_ordinary_batch(chunks)] or [0])
+    return {
+        "min": int(counts.min()),
+        "p50": int(np.percentile(counts, 50)),
+        "p95": int(np.percentile(counts, 95)),
+        "max": int(counts.max()),
+    }
+
+
+def run(documents, chunk_tokens: int = 256, overlap_tokens: int = 50, workers: int = 4, runs: int = 3) -> List[dict]:
+    """Split `documents` with each splitter, keeping the fastest of `runs` passes."""
+    megabytes = sum(len(doc.page_content.encode("utf-8")) for doc in documents) / 1e6
+    encoding = get_encoding()
+    splitters = [
+        ("characters", make_splitter("characters")),
+        ("tokens", TokenTextSplitter(chunk_tokens, overlap_tokens)),
+        (f"tokens x{workers}", TokenTextSplitter(chunk_tokens, overlap_tokens, workers=workers)),
+    ]
+    results = []
+    for name, splitter in splitters:
+        best = float("inf")
+        for _ in range(runs):
+            started = time.perf_counter()
+            chunks = splitter.split_documents(documents)
+            best = min(best, time.perf_counter() - started)
+        results.append({
+            "splitter": name,
+            "mb_per_sec": megabytes / best if best else 0.0,
+            "seconds": best,
+            "chunks": len(chunks),
+            "tokens_per_chunk": token_distribution([c.page_content for c in chunks], encoding),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark text splitters on document corpora')
+    parser.add_argument('corpora', nargs='*', default=DEFAULT_CORPORA, help='Files or directories to split')
+    parser.add_argument('--chunk-tokens', type=int, default=256, help='Token budget per chunk')
+    parser.add_argument('--chunk-overlap', type=int, default=50, help='Tokens shared by consecutive chunks')
+    parser.add_argument('--workers', type=int, default=4, help='Processes for the parallel token splitter')
+    parser.add_argument('--runs', type=int, default=3, help='Passes per splitter, the fastest is kept')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    report = {}
+    for corpus in args.corpora:
+        if not os.path.exists(corpus):
+            print(f"⚠️  Skipping missing corpus {corpus}", file=sys.stderr)
+            continue
+        documents = load_documents(corpus)
+        report[corpus] = run(documents, args.chunk_tokens, args.chunk_overlap, args.workers, args.runs)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for corpus, results in report.items():
+            print(f"\n{os.path.relpath(corpus, ROOT)}")
+            for result in results:
+                tokens = result["tokens_per_chunk"]
+                print(f"  {result['splitter']:<12} {result['mb_per_sec']:7.2f} MB/sec  {result['chunks']:6d} chunks  "
+                      f"tokens/chunk min {tokens['min']} p50 {tokens['p50']} p95 {tokens['p95']} max {tokens['max']}")
+    return 0 if report else 1
+
+
+if __name__ == '__main__':
+    exit(main())
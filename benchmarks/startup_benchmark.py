@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+StartupBenchmark - Measure the import time of the CLI entry points.
+
+Every shell-driven example starts a fresh interpreter per query, so the import
+cost of an entry point is paid on every question. This runs
+`python -X importtime -c "import <module>"` for each entry point, reports the
+cumulative import time and the heaviest imported packages, and fails if a
+module is over its budget in startup_budget.json.
+
+Usage:
+    python3 benchmarks/startup_benchmark.py [--runs 5] [--budget benchmarks/startup_budget.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# Packages the entry points must only import on the code path that needs them
+HEAVY_PACKAGES = ("langchain", "langchain_core", "langchain_community", "langchain_openai",
+                  "chromadb", "openai", "pinecone", "numpy", "pypdf", "bs4", "aiohttp")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        (module, self microseconds, cumulative microseconds, nesting depth) tuples
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import(module: str) -> dict:
+    """
+    Import `module` in a fresh interpreter and measure it.
+
+    Returns:
+        The cumulative import time in ms, the heaviest direct imports and the imported top-level packages
+    """
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "benchmark"))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    # Children are printed before their parent, so the module's subtree is the
+    # run of nested rows just above its own depth-0 row
+    end = next(i for i, (name, _, _, depth) in enumerate(rows) if name == module and depth == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    subtree = rows[start:end]
+    total = rows[end][2]
+    children = sorted(((cumulative, name) for name, _, cumulative, depth in subtree if depth == 1),
+                      reverse=True)
+    packages = sorted({name.split(".")[0] for name, _, _, _ in subtree})
+    return {
+        "module": module,
+        "ms": total / 1000,
+        "heaviest": [(name, cumulative / 1000) for cumulative, name in children[:5]],
+        "packages": packages,
+    }
+
+
+def run(budget: dict, runs: int = 3) -> Tuple[List[dict], List[str]]:
+    """Measure every module in `budget` `runs` times, keeping the fastest run."""
+    results = []
+    failures = []
+    for module, limit in budget.items():
+        best = min((measure_import(module) for _ in range(runs)), key=lambda r: r["ms"])
+        best["budget_ms"] = limit
+        results.append(best)
+        if best["ms"] > limit:
+            failures.append(f"{module}: {best['ms']:.1f} ms > {limit} ms budget")
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure entry point import time against a budget')
+    parser.add_argument('--budget', default=DEFAULT_BUDGET, help='JSON file of module -> max import ms')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per module, the fastest is kept')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with open(args.budget, 'r') as f:
+        budget = json.load(f)
+    results, failures = run(budget, runs=args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            heavy = [p for p in result["packages"] if p in HEAVY_PACKAGES]
+            print(f"{result['module']:<28} {result['ms']:8.1f} ms  (budget {result['budget_ms']} ms)")
+            for name, ms in result["heaviest"]:
+                print(f"    {name:<32} {ms:8.1f} ms")
+            if heavy:
+                print(f"    ⚠️  heavy packages imported: {', '.join(heavy)}")
+
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+UpsertBenchmark - Measure the Pinecone ingest path against the in-memory stand-in.
+
+Runs pinecone_vectorize_data.create_vector_store end to end (split, embed,
+upsert) with a deterministic fake embedding and pinecone_upsert.InMemoryClient,
+whose requests take `--latency` seconds to model the network round trip. A
+serial configuration (LangChain's default of 32 vectors per request, one
+request at a time) is compared with bulk, concurrent upserts.
+
+Usage:
+    python3 benchmarks/upsert_benchmark.py [--chunks 2000] [--latency 0.05] [--json]
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from pinecone_vectorize_data import create_vector_store
+from pinecone_upsert import InMemoryClient
+from text_splitter import TokenTextSplitter
+
+# (label, vectors per upsert request, concurrent upsert requests)
+CONFIGURATIONS = [
+    ("serial", 32, 1),
+    ("bulk x4", 100, 4),
+    ("bulk x8", 100, 8),
+]
+
+
+def synthetic_documents(chunks: int, sentences_per_chunk: int = 8) -> List[Document]:
+    """Documents that split into about `chunks` chunks, one sentence per line of a file."""
+    documents = []
+    for start in range(0, chunks, 100):
+        lines = [" ".join(f"Chunk {n} sentence {s} describes SIP call routing." for s in range(sentences_per_chunk))
+                 for n in range(start, min(start + 100, chunks))]
+        documents.append(Document(page_content="\n\n".join(lines), metadata={"source": f"doc-{start}.txt"}))
+    return documents
+
+
+def run(documents: List[Document], latency: float = 0.05, dimension: int = 1536) -> List[dict]:
+    """Ingest `documents` once per configuration into a fresh stand-in index."""
+    embeddings = DeterministicFakeEmbedding(size=dimension)
+    splitter = TokenTextSplitter(chunk_tokens=128, overlap_tokens=0)
+    results = []
+    for label, batch_size, upsert_workers in CONFIGURATIONS:
+        client = InMemoryClient(latency=latency)
+        stats = create_vector_store(documents, "benchmark", "local", embeddings=embeddings, splitter=splitter,
+                                    client=client, batch_size=batch_size, upsert_workers=upsert_workers)
+        upsert = stats["upsert"]
+        results.append({
+            "configuration": label,
+            "vectors": upsert["vectors"],
+            "requests": upsert["requests"],
+            "seconds": upsert["seconds"],
+            "vectors_per_sec": upsert["vectors_per_sec"],
+            "stored": client.Index("benchmark").describe_index_stats()["total_vector_count"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk Pinecone upserts against a local stand-in')
+    parser.add_argument('--chunks', type=int, default=2000, help='Approximate number of chunks to ingest')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per upsert request')
+    parser.add_argument('--dimension', type=int, default=1536, help='Embedding dimension')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = run(synthetic_documents(args.chunks), latency=args.latency, dimension=args.dimension)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results[0]['vectors']} vectors, {args.latency * 1000:.0f} ms per upsert request")
+        for result in results:
+            print(f"{result['configuration']:<10} {result['requests']:5d} requests  {result['seconds']:7.2f}s  "
+                  f"{result['vectors_per_sec']:9.1f} vectors/sec")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+BM25Index - In-process lexical (BM25) index kept next to a vector store.
+
+Chunks are tokenized into lowercase words (keeping feature codes such as
+`*72`), and the index is compiled into CSR postings: for every term a slice
+of chunk positions and precomputed BM25 weights. A query only sums the
+weights of its terms' postings, so exact-token lookups take well under a
+millisecond without touching the embedding API.
+
+HybridRetriever merges the dense results of a vector store with the BM25
+results using reciprocal-rank fusion (RRF), so exact-match queries such as
+error numbers, SIP feature codes or character names no longer need a larger k.
+
+Usage:
+    index = BM25Index.load("./vectorestore")
+    index.search("486 busy here", k=5)
+    retriever = HybridRetriever(vectorstore=vectorstore, index=index, k=4)
+"""
+
+import os
+import re
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+INDEX_FILENAME = "bm25_index.npz"
+RECORDS_FILENAME = "bm25_records.jsonl"
+
+TOKEN = re.compile(r"[*#]?\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    BM25 inverted index over chunks, with incremental add and delete.
+
+    Args:
+        k1: Term frequency saturation
+        b: Document length normalization
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self._positions: Dict[str, int] = {}
+        self._counts: Optional[List[Counter]] = []
+        # Compiled postings, rebuilt on the next search after a change
+        self._vocab: Optional[Dict[str, int]] = None
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _term_counts(self) -> List[Counter]:
+        # A loaded index only has postings, per-chunk counts are rebuilt on the first change
+        if self._counts is None:
+            self._counts = [Counter(tokenize(text)) for text in self.texts]
+        return self._counts
+
+    def add(self, ids: List[str], documents: List[Document]) -> None:
+        """Add chunks, replacing chunks with the same ids."""
+        existing = [i for i in ids if i in self._positions]
+        if existing:
+            self.delete(existing)
+        counts = self._term_counts()
+        for chunk_id, doc in zip(ids, documents):
+            self._positions[chunk_id] = len(self.ids)
+            self.ids.append(chunk_id)
+            self.texts.append(doc.page_content)
+            self.metadatas.append(doc.metadata or {})
+            counts.append(Counter(tokenize(doc.page_content)))
+        self._vocab = None
+
+    def delete(self, ids: List[str]) -> None:
+        drop = {self._positions[i] for i in ids if i in self._positions}
+        if not drop:
+            return
+        counts = self._term_counts()
+        keep = [p for p in range(len(self.ids)) if p not in drop]
+        self.ids = [self.ids[p] for p in keep]
+        self.texts = [self.texts[p] for p in keep]
+        self.metadatas = [self.metadatas[p] for p in keep]
+        self._counts = [counts[p] for p in keep]
+        self._positions = {chunk_id: p for p, chunk_id in enumerate(self.ids)}
+        self._vocab = None
+
+    def compile(self) -> None:
+        """Build the CSR postings with precomputed BM25 weights."""
+        counts = self._term_counts()
+        vocab: Dict[str, int] = {}
+        terms, docs, tfs = [], [], []
+        for position, doc_counts in enumerate(counts):
+            for term, tf in doc_counts.items():
+                terms.append(vocab.setdefault(term, len(vocab)))
+                docs.append(position)
+                tfs.append(tf)
+        terms = np.asarray(terms, dtype=np.int64)
+        docs = np.asarray(docs, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) else 1.0
+        df = np.bincount(terms, minlength=len(vocab))
+        idf = np.log(1.0 + (len(counts) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / max(avg_length, 1e-9))
+        weights = idf[terms] * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        order = np.argsort(terms, kind="stable")
+        self._docs = docs[order]
+        self._weights = weights[order].astype(np.float32)
+        self._offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self._vocab = vocab
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """BM25 top-k as (position, score) pairs, best first."""
+        if self._vocab is None:
+            self.compile()
+        slices = [(self._offsets[t], self._offsets[t + 1])
+                  for t in (self._vocab.get(term) for term in set(tokenize(query))) if t is not None]
+        if not slices:
+            return []
+        docs = np.concatenate([self._docs[start:end] for start, end in slices])
+        weights = np.concatenate([self._weights[start:end] for start, end in slices])
+        # Sum per chunk over the matched postings only, independent of the index size
+        positions, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+
+    def search_documents(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return [(Document(page_content=self.texts[p], metadata=self.metadatas[p], id=self.ids[p]), score)
+                for p, score in self.search(query, k)]
+
+    def save(self, path: str) -> None:
+        """Write the compiled postings and the chunk records into the directory `path`."""
+        if self._vocab is None:
+            self.compile()
+        os.makedirs(path, exist_ok=True)
+        terms = "\n".join(sorted(self._vocab, key=self._vocab.get)).encode("utf-8")
+        np.savez(os.path.join(path, INDEX_FILENAME), terms=np.frombuffer(terms, dtype=np.uint8),
+                 offsets=self._offsets, docs=self._docs, weights=self._weights,
+                 params=np.array([self.k1, self.b]))
+        with open(os.path.join(path, RECORDS_FILENAME), 'w') as f:
+            for chunk_id, text, metadata in zip(self.ids, self.texts, self.metadatas):
+                f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isdir(path) and os.path.exists(os.path.join(path, INDEX_FILENAME))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index saved in `path`, or return an empty one if `path` has none."""
+        if not cls.exists(path):
+            return cls()
+        data = np.load(os.path.join(path, INDEX_FILENAME))
+        index = cls(k1=float(data["params"][0]), b=float(data["params"][1]))
+        with open(os.path.join(path, RECORDS_FILENAME), 'r') as f:
+            for line in f:
+                record = json.loads(line)
+                index._positions[record["id"]] = len(index.ids)
+                index.ids.append(record["id"])
+                index.texts.append(record["text"])
+                index.metadatas.append(record["metadata"])
+        terms = data["terms"].tobytes().decode("utf-8")
+        index._vocab = {term: i for i, term in enumerate(terms.split("\n"))} if terms else {}
+        index._offsets, index._docs, index._weights = data["offsets"], data["docs"], data["weights"]
+        index._counts = None
+        return index
+
+
+def _key(doc: Document) -> Tuple[str, str]:
+    # Chroma does not return ids from a similarity search, so chunks are matched by source and text
+    return doc.metadata.get("source", ""), doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 4, rrf_k: int = 60,
+                           scores: Optional[List[float]] = None) -> List[Document]:
+    """
+    Merge ranked lists with reciprocal-rank fusion.
+
+    Args:
+        rankings: Ranked document lists, best first
+        k: Number of documents to return
+        rrf_k: Rank offset, larger values flatten the contribution of top ranks
+        scores: Optional list the fused score of each returned document is appended to
+
+    Returns:
+        The `k` documents with the highest sum of 1 / (rrf_k + rank)
+    """
+    fused: Dict[Tuple[str, str], float] = {}
+    documents: Dict[Tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = _key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    best = sorted(fused, key=fused.get, reverse=True)[:k]
+    if scores is not None:
+        scores.extend(fused[key] for key in best)
+    return [documents[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing dense vector search and BM25 with reciprocal-rank fusion.
+
+    Args:
+        vectorstore: Vector store for the dense candidates
+        index: BM25Index over the same chunks
+        k: Number of documents returned
+        fetch_k: Candidates taken from each side before fusion
+        rrf_k: Rank offset of the fusion
+    """
+
+    vectorstore: Any
+    index: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return [doc for doc, _ in self.fuse(query, dense)]
+
+    def fuse(self, query: str, dense: List[Document], k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """
+        Fuse dense candidates retrieved elsewhere, e.g. by a batched search, with the BM25 results for `query`.
+
+        Args:
+            query: The question
+            dense: Dense candidates, best first
+            k: Number of documents returned, the retriever's k by default
+
+        Returns:
+            (Document, fused score) pairs, best first
+        """
+        k = k or self.k
+        lexical = [doc for doc, _ in self.index.search_documents(query, k=max(self.fetch_k, k))]
+        scores = []
+        documents = reciprocal_rank_fusion([dense, lexical], k=k, rrf_k=self.rrf_k, scores=scores)
+        return list(zip(documents, scores))
+
+
+def hybrid_retriever(vectorstore, persist_directory: str, k: int = 4, fetch_k: int = 20):
+    """HybridRetriever when a BM25 index was built next to the store, else the store's dense retriever."""
+    if not BM25Index.exists(persist_directory):
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+    return HybridRetriever(vectorstore=vectorstore, index=BM25Index.load(persist_directory), k=k, fetch_k=fetch_k)
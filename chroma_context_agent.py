@@ -1,35 +1,54 @@
 #!/usr/bin/env python3
 import os
+import sys
+import json
 import argparse
-from dotenv import load_dotenv
-from langchain_community.chat_models import ChatOpenAI
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-
-def load_environment():
-    """Load environment variables from .env file."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+# LangChain and OpenAI are imported inside the functions that use them, so
+# --help and argument errors return without loading them
+from chroma_vectorize_data import loadVectorstore, batchSimilaritySearch
+from embedding_providers import add_embedding_arguments, describe_embeddings, embeddings_from_args
+
+def load_environment(require_key: bool = True):
+    """
+    Load environment variables from .env file.
+
+    Args:
+        require_key: Raise when OPENAI_API_KEY is not set
+    """
+    from dotenv import load_dotenv
+
     load_dotenv()
-    if not os.getenv("OPENAI_API_KEY"):
+    if require_key and not os.getenv("OPENAI_API_KEY"):
         raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-def create_qa_chain(persist_directory: str):
+def create_qa_chain(persist_directory: str, backend: str = None, hybrid: bool = True, embeddings=None,
+                    llm=None, pack_context: bool = True, context_tokens: Optional[int] = 1024):
     """
     Create a QA chain using the Chroma vector store.
     
     Args:
         persist_directory (str): Directory where the Chroma vector store is persisted
+        backend (str): "chroma" or "local", detected from the directory when None
+        hybrid (bool): Fuse BM25 and vector results when a BM25 index was built with the store
+        embeddings: Optional embedding function, defaults to the one that built the store
+        llm: Optional chat model, defaults to gpt-3.5-turbo
+        pack_context (bool): Merge overlapping chunks, drop duplicates and trim the context to `context_tokens`
+        context_tokens (int): Token budget of the packed context, None to only merge and deduplicate
         
     Returns:
         RetrievalQA: A QA chain ready to answer questions
     """
-    # Initialize embeddings and vector store
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma(
-        persist_directory=persist_directory,
-        embedding_function=embeddings
-    )
+    from langchain_community.chat_models import ChatOpenAI
+    from langchain.chains import RetrievalQA
+    from langchain.prompts import PromptTemplate
+    from bm25_index import hybrid_retriever
+    from context_packing import ContextPacker, PackedRetriever
+
+    # Initialize the vector store with the embeddings it was built with
+    vectorstore = loadVectorstore(persist_directory, embeddings, backend=backend)
     
     # Create a prompt template
     prompt_template = """Use the following pieces of context to answer the question at the end. 
@@ -46,39 +65,217 @@ def create_qa_chain(persist_directory: str):
     )
     
     # Initialize the LLM
-    llm = ChatOpenAI(temperature=0, model_name="gpt-3.5-turbo")
+    llm = llm or ChatOpenAI(temperature=0, model_name="gpt-3.5-turbo")
     
+    retriever = hybrid_retriever(vectorstore, persist_directory) if hybrid else vectorstore.as_retriever()
+    if pack_context:
+        retriever = PackedRetriever(retriever=retriever, packer=ContextPacker(max_tokens=context_tokens))
+
     # Create the QA chain
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
-        retriever=vectorstore.as_retriever(),
+        retriever=retriever,
         return_source_documents=True,
         chain_type_kwargs={"prompt": PROMPT}
     )
     
     return qa_chain
 
+def stream_answer(qa_chain, query: str, source_documents: Optional[list] = None,
+                  retrieval: Optional[Future] = None) -> Iterator[str]:
+    """
+    Yield the answer of a QA chain from create_qa_chain token by token.
+
+    Retrieval starts on a worker thread while the prompt is assembled, then
+    the "stuff" prompt is filled with the retrieved chunks and the LLM streams
+    its answer. Chains wrapped by answer_cache.cached_qa_chain yield a cached
+    answer at once and cache the streamed one.
+
+    Args:
+        qa_chain: Chain from create_qa_chain, optionally wrapped with cached_qa_chain
+        query: The question
+        source_documents: Optional list the retrieved documents are appended to
+        retrieval: Optional future of the retrieved documents, when retrieval was already started
+
+    Returns:
+        Iterator of answer text chunks
+    """
+    from langchain_core.prompts import format_document
+
+    if hasattr(qa_chain, "stream_answer"):
+        yield from qa_chain.stream_answer(query, source_documents)
+        return
+
+    combine = qa_chain.combine_documents_chain
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        retrieval = retrieval or pool.submit(qa_chain.retriever.invoke, query)
+        prompt = combine.llm_chain.prompt.partial(question=query)
+        documents = retrieval.result()
+    if source_documents is not None:
+        source_documents.extend(documents)
+    context = combine.document_separator.join(format_document(doc, combine.document_prompt) for doc in documents)
+    for chunk in combine.llm_chain.llm.stream(prompt.format_prompt(**{combine.document_variable_name: context})):
+        yield chunk.content
+
+def read_queries(path: str) -> List[dict]:
+    """Read questions from a text file, one per line, or from JSONL records with a "query" field."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            records.append(json.loads(line) if line.startswith("{") else {"query": line})
+    return records
+
+def run_queries_file(path: str, persist_directory: str, output=None, backend: str = None, k: int = 4,
+                     batch_size: int = 64, qa_chain=None, embeddings=None, hybrid: bool = True) -> int:
+    """
+    Retrieve context for every question in `path` in batches and write one JSONL record per question.
+
+    Dense candidates are searched in batches. With hybrid retrieval (the qa_chain's retriever, or a
+    BM25 index next to the store when there is no qa_chain) each question's candidates are then fused
+    with its BM25 results, and "score" is the fused reciprocal-rank score instead of the distance.
+
+    Args:
+        path: Text file with one question per line, or JSONL with a "query" field
+        persist_directory: Directory where the vector store is persisted
+        output: File to write JSONL to, stdout by default
+        backend: "chroma" or "local", detected from the directory when None
+        k: Number of results per question
+        batch_size: Questions per embedding request and store call
+        qa_chain: Optional QA chain from create_qa_chain, adds an "answer" to each record
+        embeddings: Optional embedding function when no qa_chain is given, defaults to the one that built the store
+        hybrid: Fuse BM25 results when no qa_chain is given and a BM25 index was built with the store
+
+    Returns:
+        Number of questions written
+    """
+    from bm25_index import BM25Index, HybridRetriever
+
+    records = read_queries(path)
+    if qa_chain is not None:
+        vectorstore = qa_chain.retriever.vectorstore
+        # A PackedRetriever wraps the hybrid or dense one
+        retriever = getattr(qa_chain.retriever, "retriever", qa_chain.retriever)
+        lexical = retriever if isinstance(retriever, HybridRetriever) else None
+    else:
+        vectorstore = loadVectorstore(persist_directory, embeddings, backend=backend)
+        lexical = None
+        if hybrid and BM25Index.exists(persist_directory):
+            lexical = HybridRetriever(vectorstore=vectorstore, index=BM25Index.load(persist_directory), k=k)
+    queries = [record["query"] for record in records]
+    results = batchSimilaritySearch(vectorstore, queries, k=max(k, lexical.fetch_k) if lexical else k,
+                                    batch_size=batch_size)
+    if lexical is not None:
+        results = [lexical.fuse(query, [doc for doc, _ in hits], k=k) for query, hits in zip(queries, results)]
+
+    output = output or sys.stdout
+    for record, hits in zip(records, results):
+        record["results"] = [{"content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+                             for doc, score in hits]
+        if qa_chain is not None:
+            # Answer from the batch-retrieved context instead of retrieving again
+            documents = [doc for doc, _ in hits]
+            packer = getattr(qa_chain.retriever, "packer", None)
+            if packer is not None:
+                packing = {}
+                documents = packer.pack(record["query"], documents, packing)
+                record["context_tokens_saved"] = packing["saved"]
+            record["answer"] = qa_chain.combine_documents_chain.invoke(
+                {"input_documents": documents, "question": record["query"]})["output_text"]
+        output.write(json.dumps(record) + "\n")
+    return len(records)
+
 def main():
     parser = argparse.ArgumentParser(description='Query a Chroma vector store with natural language questions')
-    parser.add_argument('-q', '--query', required=True, help='The question to ask')
+    questions = parser.add_mutually_exclusive_group(required=True)
+    questions.add_argument('-q', '--query', help='The question to ask')
+    questions.add_argument('--queries-file', help='Text file with one question per line, or JSONL with a "query" field')
     parser.add_argument('-d', '--directory', default='./output', help='Directory where the Chroma vector store is persisted')
+    parser.add_argument('--backend', choices=['chroma', 'local'], help='Vector store backend, detected by default')
+    parser.add_argument('--no-hybrid', action='store_true', help='Dense vector retrieval only, without the BM25 index')
+    parser.add_argument('-o', '--output', help='JSONL file for --queries-file results, stdout by default')
+    parser.add_argument('-k', type=int, default=4, help='Results per question with --queries-file')
+    parser.add_argument('--batch-size', type=int, default=64, help='Questions per embedding request with --queries-file')
+    parser.add_argument('--answer', action='store_true', help='Also answer each question of --queries-file with the LLM')
+    parser.add_argument('--cache', action='store_true', help='Reuse answers to repeated or near-duplicate questions')
+    parser.add_argument('--cache-path', help='Answer cache file, defaults to answer_cache.sqlite3 next to the store')
+    parser.add_argument('--no-semantic-cache', action='store_true', help='Only reuse answers to identical questions')
+    parser.add_argument('--cache-threshold', type=float, default=0.05, help='Maximum cosine distance for a near-duplicate hit')
+    parser.add_argument('--cache-ttl', type=float, help='Seconds before a cached answer expires')
+    parser.add_argument('--cache-stats', action='store_true', help='Print answer cache hit rate to stderr')
+    parser.add_argument('--no-stream', action='store_true', help='Print the answer only once it is complete')
+    parser.add_argument('--no-pack', action='store_true', help='Send the retrieved chunks as they are, overlaps included')
+    parser.add_argument('--context-tokens', type=int, default=1024, help='Token budget of the packed context')
+    parser.add_argument('--context-stats', action='store_true', help='Print the context tokens saved by packing to stderr')
+    add_embedding_arguments(parser)
     
     args = parser.parse_args()
     
     try:
         # Load environment variables
-        load_environment()
+        load_environment(require_key=False)
+        embeddings = embeddings_from_args(args, store=args.directory)
+        # The OpenAI key is only needed for OpenAI embeddings and LLM answers
+        if describe_embeddings(embeddings)["provider"] == "openai" or not args.queries_file or args.answer:
+            load_environment()
+
+        if args.queries_file:
+            qa_chain = None
+            if args.answer:
+                qa_chain = create_qa_chain(args.directory, backend=args.backend, hybrid=not args.no_hybrid,
+                                           embeddings=embeddings, pack_context=not args.no_pack,
+                                           context_tokens=args.context_tokens)
+            output = open(args.output, 'w', encoding='utf-8') if args.output else None
+            try:
+                count = run_queries_file(args.queries_file, args.directory, output, backend=args.backend,
+                                         k=args.k, batch_size=args.batch_size, qa_chain=qa_chain,
+                                         embeddings=embeddings, hybrid=not args.no_hybrid)
+            finally:
+                if output:
+                    output.close()
+            print(f"Wrote results for {count} questions", file=sys.stderr)
+            return 0
         
         # Create QA chain
-        qa_chain = create_qa_chain(args.directory)
+        qa_chain = create_qa_chain(args.directory, backend=args.backend, hybrid=not args.no_hybrid,
+                                   embeddings=embeddings, pack_context=not args.no_pack,
+                                   context_tokens=args.context_tokens)
+        if args.cache:
+            from answer_cache import cached_qa_chain
+            qa_chain = cached_qa_chain(qa_chain, args.directory, path=args.cache_path,
+                                       semantic=not args.no_semantic_cache,
+                                       semantic_threshold=args.cache_threshold, ttl_seconds=args.cache_ttl)
         
         # Get answer
-        result = qa_chain({"query": args.query})
-        
-        # Print answer
-        # print("\nAnswer:", result["result"])
-        print(result["result"])
+        if args.no_stream:
+            result = qa_chain({"query": args.query})
+
+            # Print answer
+            # print("\nAnswer:", result["result"])
+            print(result["result"])
+        else:
+            # Print the answer as it is generated
+            from streaming import print_stream
+
+            sources = []
+            print_stream(stream_answer(qa_chain, args.query, sources))
+            result = {"cache": getattr(qa_chain, "last_cache", None), "source_documents": sources}
+        if args.cache and args.cache_stats:
+            stats = qa_chain.cache.stats()
+            print(f"Answer cache: {result['cache'] or 'miss'}, hit rate {stats['hit_rate']:.0%} "
+                  f"({stats['exact_hits']} exact, {stats['semantic_hits']} semantic, {stats['misses']} misses)",
+                  file=sys.stderr)
+        if args.context_stats and not args.no_pack:
+            from context_packing import log_packing, packing_stats
+
+            if result.get("cache"):
+                # The sources of a cached answer carry the stats of the query that was cached
+                print("📦 Context: cached answer, nothing was retrieved", file=sys.stderr)
+            else:
+                log_packing(packing_stats(result.get("source_documents", [])))
         
         # Print source documents if available
         # if result.get("source_documents"):
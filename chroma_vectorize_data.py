@@ -3,113 +3,600 @@
 VectorizeDataManager - A tool to create vector stores from various file types.
 
 This script allows you to vectorize individual files or entire directories of files,
-supporting text, JSON, and PDF formats. The vectorized data is stored in a ChromaDB
+supporting text, JSON, HTML and PDF formats. The vectorized data is stored in a ChromaDB
 vector store for efficient similarity search and retrieval.
 
 Usage:
-    python3 vectorize_data.py <input_path> [-o <output_path>]
+    python3 vectorize_data.py <input_path> [-o <output_path>] [--incremental]
 """
 
 import os
 import argparse
+import hashlib
 import json
-from typing import List, Optional
+import time
+import itertools
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.docstore.document import Document
+# LangChain, Chroma, NumPy and OpenAI are imported where they are used, so --help
+# and callers that only need a few helpers don't pay for them at startup
+from file_loaders import iter_documents, load_documents
+from ingest_pipeline import run_pipeline, chroma_writer
+from embedding_providers import (add_embedding_arguments, check_embeddings, describe_embeddings,
+                                 embeddings_for_store, embeddings_from_args, recording_writer,
+                                 save_embedding_info)
 
-def load_documents(file_path: str) -> List[str]:
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Manifest of source and chunk content hashes, kept inside the persist directory
+MANIFEST_FILENAME = "index_manifest.json"
+
+def normalize_source(source: str) -> str:
+    """Absolute path of a file source, so `./input/a.txt` and `input/a.txt` are the same source; URLs are kept."""
+    if not source or "://" in source:
+        return source
+    return os.path.abspath(source)
+
+def source_in_scope(source: str, input_path: str) -> bool:
     """
-    Load documents from a file or directory.
-    
+    Whether `source` comes from `input_path`: a file at or under the path, or for a start URL
+    (scrape_to_vectorstore.py) a page of the same origin at or under its path, like the crawler's scope.
+    """
+    if "://" in input_path or "://" in source:
+        from urllib.parse import urlparse
+
+        root, page = urlparse(input_path), urlparse(source)
+        base_path = root.path.rstrip("/")
+        return ((page.scheme, page.netloc) == (root.scheme, root.netloc)
+                and (page.path.rstrip("/") == base_path or page.path.startswith(base_path + "/")))
+    root = os.path.abspath(input_path)
+    try:
+        return os.path.commonpath([root, os.path.abspath(source)]) == root
+    except ValueError:
+        # Paths on different drives
+        return False
+
+def iter_source_groups(documents: Iterable["Document"]) -> Iterator[Tuple[str, List["Document"]]]:
+    """
+    Group a stream of documents by their `source` metadata.
+
+    Loaders yield all documents (e.g. PDF pages) of a source consecutively, so
+    only one source is held in memory at a time.
+    """
+    for source, group in itertools.groupby(documents, key=lambda d: d.metadata.get("source", "")):
+        yield source, list(group)
+
+def open_vector_store(output_path: Optional[str], embeddings, backend: str = "chroma"):
+    """
+    Open (or create) a vector store for writing.
+
     Args:
-        file_path: Path to the file or directory to load
-        
-    Returns:
-        List of document texts
-    """
-    if os.path.isdir(file_path):
-        # Check if directory contains json files
-        json_files = [f for f in os.listdir(file_path) if f.endswith('.json')]
-        if json_files:
-            documents = []
-            for json_file in json_files:
-                full_path = os.path.join(file_path, json_file)
-                try:
-                    with open(full_path, 'r') as f:
-                        data = json.load(f)
-                        # Convert JSON to string representation
-                        json_str = json.dumps(data, indent=2)
-                        doc = Document(page_content=json_str, metadata={"source": full_path})
-                        documents.append(doc)
-                except Exception as e:
-                    print(f"Error loading JSON file {full_path}: {str(e)}")
-            return documents
-        else:
-            # Default to text files if no JSON files
-            loader = DirectoryLoader(file_path, glob="**/*.txt")
-            documents = loader.load()
-    else:
-        if file_path.endswith('.pdf'):
-            loader = PyPDFLoader(file_path)
-        elif file_path.endswith('.json'):
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    json_str = json.dumps(data, indent=2)
-                    doc = Document(page_content=json_str, metadata={"source": file_path})
-                    return [doc]
-            except Exception as e:
-                print(f"Error loading JSON file {file_path}: {str(e)}")
-                return []
-        else:
-            loader = TextLoader(file_path)
-        documents = loader.load()
-    
-    return documents
+        output_path: Persist directory, in-memory when None
+        embeddings: Embedding function of the store
+        backend: "chroma" or "local" (in-process NumPy store)
+    """
+    if backend == "local":
+        from local_vectorstore import LocalVectorStore
+
+        if output_path:
+            return LocalVectorStore.load(output_path, embeddings, mmap=False)
+        return LocalVectorStore(embeddings)
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(persist_directory=output_path, embedding_function=embeddings)
+
+def _is_local(vectorstore) -> bool:
+    from local_vectorstore import LocalVectorStore
+
+    return isinstance(vectorstore, LocalVectorStore)
+
+def _count(vectorstore) -> int:
+    if _is_local(vectorstore):
+        return len(vectorstore)
+    return vectorstore._collection.count()
+
+def _writer(vectorstore):
+    if _is_local(vectorstore):
+        from local_vectorstore import local_writer
+
+        return local_writer(vectorstore)
+    return chroma_writer(vectorstore)
+
+def _persist(vectorstore, output_path: Optional[str], ann: bool = False, quantize: Optional[str] = None,
+             nprobe: int = 8) -> None:
+    if _is_local(vectorstore):
+        if ann and len(vectorstore):
+            vectorstore.build_index(nprobe=nprobe)
+        if quantize and len(vectorstore):
+            vectorstore.quantize(quantize)
+        if output_path:
+            vectorstore.persist(output_path)
+    elif output_path:
+        vectorstore.persist()
+
+def _lexical_writer(write_batch, lexical):
+    """Wrap a `write_batch` function so written chunks are also added to a BM25 index."""
+    if lexical is None:
+        return write_batch
+
+    def write(ids, documents, vectors):
+        write_batch(ids, documents, vectors)
+        lexical.add(ids, documents)
+    return write
+
+def _store_records(vectorstore) -> Tuple[List[str], List["Document"]]:
+    """All (ids, documents) of a store, to build a BM25 index for a store indexed without one."""
+    from langchain_core.documents import Document
 
-def create_vector_store(documents: List[str], output_path: Optional[str] = None) -> None:
+    if _is_local(vectorstore):
+        return list(vectorstore.ids), [Document(page_content=text, metadata=metadata)
+                                       for text, metadata in zip(vectorstore.texts, vectorstore.metadatas)]
+    records = vectorstore._collection.get(include=["documents", "metadatas"])
+    return records["ids"], [Document(page_content=text, metadata=metadata or {})
+                            for text, metadata in zip(records["documents"], records["metadatas"])]
+
+def _check_embeddings(output_path: Optional[str], embeddings) -> dict:
+    """Refuse to add vectors of another embedding function to a store, return the info to record."""
+    recorded = check_embeddings(output_path, embeddings) if output_path else None
+    return dict(recorded or describe_embeddings(embeddings))
+
+def _save_embedding_info(output_path: str, embedding_info: dict) -> None:
+    if embedding_info.get("dimension"):
+        save_embedding_info(output_path, embedding_info)
+
+def create_vector_store(documents: Iterable["Document"], output_path: Optional[str] = None, embeddings=None,
+                        batch_size: int = 64, workers: int = 4,
+                        requests_per_minute: Optional[float] = None,
+                        backend: str = "chroma", ann: bool = False, dedup=None,
+                        splitter=None, split_workers: Optional[int] = None, lexical: bool = True,
+                        quantize: Optional[str] = None) -> dict:
     """
     Create a vector store from the provided documents.
+
+    Chunks are streamed from the splitter into batches that are embedded
+    concurrently and written to the store while later batches are in flight.
     
     Args:
-        documents: List of document texts to vectorize
+        documents: Documents to vectorize, a list or a lazy iterator
         output_path: Optional path to save the vector store
+        embeddings: Optional embedding function, defaults to cached OpenAI embeddings
+        batch_size: Number of chunks per embedding request
+        workers: Number of concurrent embedding requests
+        requests_per_minute: Optional rate limit for embedding requests
+        backend: "chroma" or "local" (in-process NumPy store)
+        ann: Build an approximate (IVF) index for the local backend
+        dedup: Optional dedup.ChunkDeduplicator that drops duplicate chunks before embedding
+        splitter: Text splitter, defaults to text_splitter.make_splitter() (token budget chunks)
+        split_workers: Processes used to split sources in parallel
+        lexical: Also build a BM25 index (bm25_index.py) in the persist directory for hybrid retrieval,
+            an index already there is updated either way
+        quantize: "int8" or "pq" to search the local backend on quantized codes (quantization.py)
+        
+    Returns:
+        Pipeline stats with the chunk count and chunks per second
     """
+    from text_splitter import make_splitter, split_groups
+
     print("Splitting Document in chunks")
     # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    splits = text_splitter.split_documents(documents)
+    text_splitter = splitter or make_splitter()
+    manifest = {"sources": {}}
+    _check_splitter(manifest, text_splitter)
+
+    def chunks():
+        for source, source_docs, splits in split_groups(text_splitter, iter_source_groups(documents),
+                                                        workers=split_workers):
+            duplicates = {}
+            pairs = _dedup(zip(chunk_ids(splits), splits), dedup, duplicates)
+            manifest["sources"][normalize_source(source)] = _manifest_entry(source_hash(source_docs), pairs,
+                                                                            duplicates)
+            yield from pairs
 
     print(" Create embeddings and vector store")
 
     # Create embeddings and vector store
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-ada-002",
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory=output_path
-    )
+    if embeddings is None:
+        from embedding_cache import cached_openai_embeddings
+
+        embeddings = cached_openai_embeddings()
+    embedding_info = _check_embeddings(output_path, embeddings)
+    vectorstore = open_vector_store(output_path, embeddings, backend)
+    bm25 = None
+    if output_path:
+        from bm25_index import BM25Index
+
+        if lexical or BM25Index.exists(output_path):
+            # Hybrid retrieval loads an existing index, so it is kept in sync even with lexical=False
+            bm25 = BM25Index.load(output_path)
+    stats = run_pipeline(chunks(), embeddings, recording_writer(_lexical_writer(_writer(vectorstore), bm25),
+                                                                embedding_info),
+                         batch_size=batch_size, workers=workers,
+                         requests_per_minute=requests_per_minute)
     
+    _persist(vectorstore, output_path, ann, quantize)
+    if bm25 is not None:
+        bm25.save(output_path)
     if output_path:
-        vectorstore.persist()
+        # Record what was indexed so a later --incremental run only embeds the diff
+        save_manifest(output_path, manifest)
+        _save_embedding_info(output_path, embedding_info)
+    return stats
+
+def _dedup(pairs, dedup, duplicates: Optional[dict] = None) -> list:
+    """Kept (id, Document) pairs, recording each dropped chunk and the id of its kept copy in `duplicates`."""
+    if dedup is None:
+        return list(pairs)
+    dropped = []
+    kept = list(dedup.filter(pairs, dropped))
+    if duplicates is not None:
+        for chunk_id, doc, kept_id in dropped:
+            duplicates[chunk_id] = {"kept": kept_id, "text": doc.page_content, "metadata": doc.metadata}
+    return kept
+
+def _splitter_options(settings: dict) -> str:
+    """Command line options of chroma_vectorize_data.py that recreate a splitter's settings."""
+    if settings["kind"] == "tokens":
+        return f"--splitter tokens --chunk-tokens {settings['chunk_tokens']} --chunk-overlap {settings['overlap_tokens']}"
+    return f"--splitter {settings['kind']}"
+
+def _check_splitter(manifest: dict, splitter) -> None:
+    """
+    Record the splitter's tokenizer and chunking parameters in the manifest, refusing to mix in
+    chunks counted by another tokenizer or cut with other parameters.
+    """
+    from text_splitter import splitter_settings
+
+    name = getattr(splitter, "tokenizer_name", None)
+    recorded = manifest.get("tokenizer")
+    if name and recorded and name != recorded:
+        raise ValueError(f"The store was chunked with the '{recorded}' tokenizer but this run uses '{name}', "
+                         f"pass --tokenizer {recorded.split(':')[0]} or rebuild it without --incremental")
+    if name:
+        manifest["tokenizer"] = name
+
+    settings = splitter_settings(splitter)
+    recorded = manifest.get("splitter")
+    if settings and recorded and settings != recorded:
+        raise ValueError(f"The store was chunked with {recorded} but this run uses {settings}, "
+                         f"pass {_splitter_options(recorded)} or rebuild it without --incremental")
+    if settings:
+        manifest["splitter"] = settings
+
+def recorded_tokenizer(output_path: str) -> str:
+    """Tokenizer ("tiktoken" or "regex") the store's chunks were counted with, "auto" when none is recorded."""
+    recorded = load_manifest(output_path).get("tokenizer")
+    return recorded.split(":")[0] if recorded else "auto"
+
+def recorded_splitter(output_path: str) -> dict:
+    """make_splitter arguments of the splitter that chunked the store, empty when none are recorded."""
+    return dict(load_manifest(output_path).get("splitter") or {})
+
+def _manifest_entry(digest: str, pairs, duplicates: dict) -> dict:
+    entry = {"hash": digest, "chunks": [i for i, _ in pairs]}
+    if duplicates:
+        # Dropped duplicates are kept with their text, to be restored if their kept copy is deleted
+        entry["duplicates"] = duplicates
+    return entry
+
+def _orphaned_duplicates(manifest: dict) -> List[Tuple[str, "Document"]]:
+    """
+    Restore dropped duplicates whose kept copy is no longer in the store.
+
+    The first duplicate of a deleted chunk moves into the chunks of its source and
+    the others now point at it.
+
+    Returns:
+        (id, Document) chunks to embed
+    """
+    from langchain_core.documents import Document
+
+    live = {chunk_id for entry in manifest["sources"].values() for chunk_id in entry["chunks"]}
+    replacements = {}
+    restored = []
+    for entry in manifest["sources"].values():
+        for chunk_id, duplicate in list(entry.get("duplicates", {}).items()):
+            if duplicate["kept"] in live:
+                continue
+            replacement = replacements.get(duplicate["kept"])
+            if replacement is not None:
+                duplicate["kept"] = replacement
+                continue
+            replacements[duplicate["kept"]] = chunk_id
+            del entry["duplicates"][chunk_id]
+            entry["chunks"].append(chunk_id)
+            restored.append((chunk_id, Document(page_content=duplicate["text"], metadata=duplicate["metadata"])))
+        if "duplicates" in entry and not entry["duplicates"]:
+            del entry["duplicates"]
+    return restored
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def source_hash(documents) -> str:
+    """Content hash of all documents (e.g. PDF pages) loaded from one source."""
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def chunk_ids(splits) -> List[str]:
+    """
+    Deterministic chunk IDs derived from the chunk content.
+
+    The ID hashes the normalized source, the chunk text and how many identical
+    chunks came before it in the same source, so unchanged chunks keep their ID
+    between runs, whichever way the input path was typed.
+    
+    Args:
+        splits: Chunked documents
+        
+    Returns:
+        One ID per chunk
+    """
+    ids = []
+    seen = {}
+    for doc in splits:
+        source = normalize_source(doc.metadata.get("source", ""))
+        key = (source, doc.page_content)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        ids.append(_hash_text(f"{source}\0{occurrence}\0{doc.page_content}"))
+    return ids
+
+def load_manifest(output_path: str) -> dict:
+    """Load the index manifest from the persist directory, or an empty one."""
+    manifest_path = os.path.join(output_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {"sources": {}}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+def save_manifest(output_path: str, manifest: dict) -> None:
+    """Atomically write the index manifest into the persist directory."""
+    os.makedirs(output_path, exist_ok=True)
+    manifest_path = os.path.join(output_path, MANIFEST_FILENAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def update_vector_store(documents: Iterable["Document"], input_path: str, output_path: str, embeddings=None,
+                        batch_size: int = 64, workers: int = 4,
+                        requests_per_minute: Optional[float] = None,
+                        backend: str = "chroma", ann: Optional[bool] = None, dedup=None, splitter=None,
+                        lexical: bool = True, quantize: Optional[str] = None,
+                        checkpoint_seconds: float = 30.0,
+                        is_removed: Optional[Callable[[str], bool]] = None,
+                        split_workers: Optional[int] = None) -> dict:
+    """
+    Incrementally update a persisted vector store.
+
+    Sources whose content hash is unchanged are skipped entirely. For changed
+    sources only the chunks that are new are embedded and stale chunks are
+    deleted. Sources under `input_path` (pages under it for a start URL) that
+    no longer exist are removed.
+    Chunks that were dropped as duplicates of a chunk deleted by the update are
+    embedded in its place. With `dedup`, changed chunks are also compared with
+    the chunks already stored, which reads the store once. The splitter must
+    count tokens and cut chunks like the one that built the store, or
+    ValueError is raised.
+
+    The manifest is checkpointed as batches are written, listing only sources
+    whose chunks are all in the store, so an interrupted run resumes where it
+    stopped.
+    
+    Args:
+        documents: Documents loaded from `input_path`, a list or a lazy iterator
+        input_path: File or directory the documents were loaded from
+        output_path: Persist directory of the vector store
+        embeddings: Optional embedding function, defaults to the one recorded for the store
+        batch_size: Number of chunks per embedding request
+        workers: Number of concurrent embedding requests
+        requests_per_minute: Optional rate limit for embedding requests
+        backend: "chroma" or "local" (in-process NumPy store)
+        ann: Build the approximate (IVF) index for the local backend, by default it is rebuilt
+            when the store has one and False drops it
+        dedup: Optional dedup.ChunkDeduplicator applied to the chunks of changed sources and seeded with the store
+        splitter: Text splitter, defaults to text_splitter.make_splitter() with the store's tokenizer and settings
+        lexical: Build the BM25 index in the persist directory if it is missing, an existing one
+            is kept in sync either way
+        quantize: "int8" or "pq" to retrain the quantizer of the local backend, defaults to the store's current one
+        checkpoint_seconds: Minimum seconds between checkpoints, 0 to checkpoint after every batch
+        is_removed: Optional check, once all documents are read, of whether a source under `input_path`
+            that was not loaded is really gone; by default every one is removed
+        split_workers: Processes used to split changed sources in parallel
+        
+    Returns:
+        Counts of added, deleted, unchanged and restored chunks and of changed and removed sources
+    """
+    from text_splitter import make_splitter, split_groups
+
+    if embeddings is None:
+        embeddings = embeddings_for_store(output_path)
+    embedding_info = _check_embeddings(output_path, embeddings)
+    vectorstore = open_vector_store(output_path, embeddings, backend)
+    manifest = load_manifest(output_path)
+    for source in list(manifest["sources"]):
+        # Stores built before sources were normalized keep their chunks under the absolute path
+        if normalize_source(source) != source:
+            manifest["sources"][normalize_source(source)] = manifest["sources"].pop(source)
+    text_splitter = splitter or make_splitter(**recorded_splitter(output_path),
+                                              tokenizer=recorded_tokenizer(output_path))
+    _check_splitter(manifest, text_splitter)
+    if not manifest["sources"] and _count(vectorstore):
+        print("⚠️  No manifest found for an existing store, existing chunks will be kept as-is")
+    nprobe = 8
+    if _is_local(vectorstore):
+        # Writes clear the IVF index, rebuild it unless asked not to; the manifest remembers it
+        # in case a checkpointed run is interrupted before the rebuild
+        if vectorstore.index is not None:
+            nprobe = vectorstore.index.nprobe
+        elif manifest.get("ann"):
+            nprobe = manifest["ann"]["nprobe"]
+        if ann is None:
+            ann = vectorstore.index is not None or bool(manifest.get("ann"))
+        if ann:
+            manifest["ann"] = {"nprobe": nprobe}
+        else:
+            manifest.pop("ann", None)
+            vectorstore.index = None
+    if quantize is None and _is_local(vectorstore) and vectorstore.quantizer is not None:
+        # Changed chunks invalidate the codes, retrain with the method the store was built with
+        quantize = vectorstore.quantizer.method
+    from bm25_index import BM25Index
+
+    bm25 = None
+    if lexical or BM25Index.exists(output_path):
+        # Hybrid retrieval loads an existing index, so it is kept in sync even with lexical=False
+        bm25 = BM25Index.load(output_path)
+        if not BM25Index.exists(output_path) and _count(vectorstore):
+            bm25.add(*_store_records(vectorstore))
+    if dedup is not None and _count(vectorstore):
+        ids, stored = _store_records(vectorstore)
+        dedup.seed((chunk_id, doc.page_content) for chunk_id, doc in zip(ids, stored))
+
+    def delete(ids):
+        vectorstore.delete(ids=ids)
+        if bm25 is not None:
+            bm25.delete(ids)
+        if dedup is not None:
+            # Later chunks must not be dropped as duplicates of deleted ones
+            dedup.discard(ids)
+
+    stats = {"added": 0, "deleted": 0, "unchanged": 0, "restored": 0,
+             "sources_changed": 0, "sources_removed": 0}
+
+    seen = set()
+    # Manifest entries of changed sources in write order, with the number of their chunks still to be written
+    pending = deque()
+    last_checkpoint = [time.monotonic()]
+
+    def commit(written: int) -> None:
+        """Move the entries of sources whose chunks are all written into the manifest."""
+        while pending:
+            taken = min(written, pending[0][2])
+            pending[0][2] -= taken
+            written -= taken
+            if pending[0][2]:
+                break
+            source, entry, _ = pending.popleft()
+            manifest["sources"][source] = entry
+
+    def checkpoint() -> None:
+        if _is_local(vectorstore):
+            # The local store only reaches disk when persisted
+            vectorstore.persist(output_path)
+        if bm25 is not None:
+            bm25.save(output_path)
+        save_manifest(output_path, manifest)
+        _save_embedding_info(output_path, embedding_info)
+        last_checkpoint[0] = time.monotonic()
+
+    def checkpointing_writer(write_batch):
+        def write(ids, documents, vectors):
+            write_batch(ids, documents, vectors)
+            commit(len(ids))
+            if time.monotonic() - last_checkpoint[0] >= checkpoint_seconds:
+                checkpoint()
+        return write
+
+    def changed_groups():
+        for source, source_docs in iter_source_groups(documents):
+            source = normalize_source(source)
+            seen.add(source)
+            previous = manifest["sources"].get(source)
+            if previous and previous["hash"] == source_hash(source_docs):
+                stats["unchanged"] += len(previous["chunks"])
+                continue
+            yield source, source_docs
+
+    def new_chunks():
+        for source, source_docs, splits in split_groups(text_splitter, changed_groups(), workers=split_workers):
+            digest = source_hash(source_docs)
+            previous = manifest["sources"].get(source)
+            old_ids = set(previous["chunks"]) if previous else set()
+            if dedup is not None:
+                # The source's own stored chunks are being replaced, don't drop new chunks against them
+                dedup.discard(old_ids)
+            duplicates = {}
+            pairs = _dedup(zip(chunk_ids(splits), splits), dedup, duplicates)
+            ids = [i for i, _ in pairs]
+            new_ids = set(ids)
+            stale = [i for i in old_ids if i not in new_ids]
+            if stale:
+                delete(stale)
+
+            added = [(chunk_id, doc) for chunk_id, doc in pairs if chunk_id not in old_ids]
+            pending.append([source, _manifest_entry(digest, pairs, duplicates), len(added)])
+            stats["deleted"] += len(stale)
+            stats["sources_changed"] += 1
+            stats["unchanged"] += len(pairs) - len(added)
+            stats["added"] += len(added)
+            yield from added
+
+    # Chunks of all changed sources share one pipeline so batches stay full
+    run_pipeline(new_chunks(), embeddings,
+                 checkpointing_writer(recording_writer(_lexical_writer(_writer(vectorstore), bm25), embedding_info)),
+                 batch_size=batch_size, workers=workers,
+                 requests_per_minute=requests_per_minute)
+    commit(0)
+
+    for source in list(manifest["sources"]):
+        if source_in_scope(source, input_path) and source not in seen and (is_removed is None or is_removed(source)):
+            stale = manifest["sources"].pop(source)["chunks"]
+            if stale:
+                delete(stale)
+            stats["deleted"] += len(stale)
+            stats["sources_removed"] += 1
+
+    restored = _orphaned_duplicates(manifest)
+    if restored:
+        run_pipeline(restored, embeddings,
+                     recording_writer(_lexical_writer(_writer(vectorstore), bm25), embedding_info),
+                     batch_size=batch_size, workers=workers, requests_per_minute=requests_per_minute)
+        stats["restored"] = len(restored)
+        stats["added"] += len(restored)
+
+    _persist(vectorstore, output_path, ann, quantize, nprobe)
+    if bm25 is not None:
+        bm25.save(output_path)
+    save_manifest(output_path, manifest)
+    _save_embedding_info(output_path, embedding_info)
+    return stats
+
+def loadVectorstore(filePath, embeddings=None, backend=None):
+    """
+    Load a persisted vector store.
+
+    Args:
+        filePath: Persist directory, or an exported vector file
+        embeddings: Optional embedding function, defaults to the one recorded when the store was
+            built (cached OpenAI embeddings for stores that recorded none)
+        backend: "chroma" or "local", detected from the directory when None
+
+    Raises:
+        EmbeddingMismatchError: `embeddings` differ from the ones that built the store
+    """
+    from local_vectorstore import LocalVectorStore
+    from vector_file import VectorFileStore, is_vector_file
+
+    if embeddings is None:
+        embeddings = embeddings_for_store(filePath)
+    elif os.path.exists(filePath):
+        check_embeddings(filePath, embeddings)
+    if is_vector_file(filePath):
+        return VectorFileStore(filePath, embeddings)
+    if backend == "local" or (backend is None and LocalVectorStore.exists(filePath)):
+        return LocalVectorStore.load(filePath, embeddings)
+    from langchain_community.vectorstores import Chroma
 
-def loadVectorstore(filePath):
     return Chroma(
         persist_directory=filePath,
-        embedding_function=OpenAIEmbeddings(
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
+        embedding_function=embeddings
     )
 
 def similaritySearch(vectorstore, query):
@@ -121,6 +608,45 @@ def similaritySearchWithScore(vectorstore, query):
         print(result)
     return results
 
+def _chroma_batch_search(vectorstore, vectors, k: int):
+    """One Chroma collection query for all vectors, scored like similarity_search_with_score."""
+    from langchain_core.documents import Document
+
+    response = vectorstore._collection.query(query_embeddings=vectors, n_results=k,
+                                             include=["documents", "metadatas", "distances"])
+    return [[(Document(page_content=text, metadata=metadata or {}, id=chunk_id), distance)
+             for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)]
+            for ids, texts, metadatas, distances in zip(response["ids"], response["documents"],
+                                                        response["metadatas"], response["distances"])]
+
+def batchSimilaritySearch(vectorstore, queries: List[str], k: int = 4, batch_size: int = 64):
+    """
+    Search many queries at once.
+
+    Queries are embedded `batch_size` per request, and each batch is looked up
+    with one store call: a single matrix product for the local and vector-file
+    stores, or one collection query for Chroma.
+
+    Args:
+        vectorstore: Store returned by loadVectorstore
+        queries: Query texts
+        k: Number of results per query
+        batch_size: Queries per embedding request and store call
+
+    Returns:
+        One list of (Document, score) pairs per query, best first, scored as similaritySearchWithScore
+    """
+    results = []
+    for start in range(0, len(queries), batch_size):
+        vectors = vectorstore.embeddings.embed_documents(list(queries[start:start + batch_size]))
+        if hasattr(vectorstore, "batch_similarity_search_by_vector_with_score"):
+            results.extend(vectorstore.batch_similarity_search_by_vector_with_score(vectors, k=k))
+        elif hasattr(vectorstore, "_collection"):
+            results.extend(_chroma_batch_search(vectorstore, vectors, k))
+        else:
+            results.extend(vectorstore.similarity_search_by_vector_with_score(vector, k=k) for vector in vectors)
+    return results
+
 
 def main():
     ## Usage
@@ -135,6 +661,36 @@ def main():
     parser = argparse.ArgumentParser(description='Vectorize files or directories')
     parser.add_argument('input_path', help='Path to input file or directory')
     parser.add_argument('-o', '--output', help='Path to save vector store')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only embed new or changed chunks and delete chunks of removed files')
+    parser.add_argument('--embedding-cache', help='Path of the on-disk embedding cache')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Always call the embedding API')
+    add_embedding_arguments(parser)
+    parser.add_argument('--batch-size', type=int, default=64, help='Chunks per embedding request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent embedding requests')
+    parser.add_argument('--rpm', type=float, help='Maximum embedding requests per minute')
+    parser.add_argument('--parse-workers', type=int, help='Processes used to parse files in a directory')
+    parser.add_argument('--backend', choices=['chroma', 'local'], default='chroma',
+                        help='Vector store backend: Chroma or the in-process NumPy store')
+    parser.add_argument('--ann', action='store_true', help='Build an approximate (IVF) index for the local backend')
+    parser.add_argument('--quantize', choices=['int8', 'pq'],
+                        help='Search the local backend on int8 or product-quantized codes, re-ranked at full precision')
+    parser.add_argument('--splitter', choices=['tokens', 'characters'],
+                        help='Chunk by model tokens on sentence boundaries (default), or by characters '
+                             '(--incremental: the one the store used)')
+    parser.add_argument('--chunk-tokens', type=int,
+                        help="Token budget per chunk (default 256, --incremental: the store's)")
+    parser.add_argument('--chunk-overlap', type=int,
+                        help="Tokens shared by consecutive chunks (default 50, --incremental: the store's)")
+    parser.add_argument('--split-workers', type=int, help='Processes used to split documents')
+    parser.add_argument('--tokenizer', choices=['auto', 'tiktoken', 'regex'], default='auto',
+                        help='Count chunk tokens with tiktoken or the offline approximation, auto falls back to '
+                             'the approximation when tiktoken is unavailable (--incremental: the one the store used)')
+    parser.add_argument('--dedup', action='store_true', help='Drop exact and near-duplicate chunks before embedding')
+    parser.add_argument('--dedup-threshold', type=float, default=0.9, help='Similarity of near-duplicate chunks')
+    parser.add_argument('--dedup-method', choices=['minhash', 'simhash'], default='minhash',
+                        help='Near-duplicate detection method')
+    parser.add_argument('--no-bm25', action='store_true', help='Do not build the BM25 index for hybrid retrieval, an existing one is still updated')
     args = parser.parse_args()
     
     # Validate input path
@@ -143,14 +699,60 @@ def main():
         return 1
     
     try:
-        # Load documents
-        documents = load_documents(args.input_path)
-        if not documents:
+        if args.incremental and not args.output:
+            print("Error: --incremental requires an output path (-o)")
+            return 1
+
+        # Load documents lazily so the corpus is streamed through splitting and embedding
+        documents = iter_documents(args.input_path, workers=args.parse_workers)
+        first = next(documents, None)
+        if first is None and not args.incremental:
             print(f"Error: No documents found in '{args.input_path}'")
             return 1
+        if first is not None:
+            documents = itertools.chain([first], documents)
             
-        # Create vector store
-        create_vector_store(documents, args.output)
+        from embedding_cache import print_cache_stats
+
+        embeddings = embeddings_from_args(args, store=args.output)
+        dedup = None
+        if args.dedup:
+            from dedup import ChunkDeduplicator
+
+            dedup = ChunkDeduplicator(threshold=args.dedup_threshold, method=args.dedup_method)
+        from text_splitter import make_splitter
+
+        tokenizer = args.tokenizer
+        if args.incremental and tokenizer == "auto":
+            tokenizer = recorded_tokenizer(args.output)
+        # Options not given on the command line are the store's for --incremental, make_splitter's otherwise
+        options = recorded_splitter(args.output) if args.incremental else {}
+        given = {"kind": args.splitter, "chunk_tokens": args.chunk_tokens, "overlap_tokens": args.chunk_overlap}
+        options.update({name: value for name, value in given.items() if value is not None})
+        splitter = make_splitter(**options, tokenizer=tokenizer)
+        pipeline_args = dict(batch_size=args.batch_size, workers=args.workers,
+                             requests_per_minute=args.rpm, backend=args.backend, ann=args.ann, dedup=dedup,
+                             splitter=splitter, split_workers=args.split_workers, lexical=not args.no_bm25,
+                             quantize=args.quantize)
+        start = time.perf_counter()
+        if args.incremental:
+            # Without --ann an existing IVF index is kept
+            stats = update_vector_store(documents, args.input_path, args.output, embeddings=embeddings,
+                                        **dict(pipeline_args, ann=args.ann or None))
+            print(f"Added {stats['added']}, deleted {stats['deleted']}, kept {stats['unchanged']} chunks "
+                  f"({stats['sources_changed']} changed, {stats['sources_removed']} removed sources, "
+                  f"{stats['restored']} restored duplicates)")
+        else:
+            # Create vector store
+            stats = create_vector_store(documents, args.output, embeddings=embeddings, **pipeline_args)
+        elapsed = time.perf_counter() - start
+        chunks = stats.get("chunks", stats.get("added", 0))
+        print(f"Embedded {chunks} chunks in {elapsed:.1f}s ({chunks / elapsed if elapsed else 0:.1f} chunks/sec)")
+        print_cache_stats(embeddings)
+        if dedup is not None:
+            from dedup import print_dedup_stats
+
+            print_dedup_stats(dedup)
         print(f"Successfully vectorized documents from '{args.input_path}'")
         if args.output:
             print(f"Vector store saved to '{args.output}'")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Context packing - Assemble retrieved chunks into a compact prompt context.
+
+The "stuff" QA chain pastes every retrieved chunk into the prompt, overlaps
+included. ContextPacker sits between retrieval and the LLM:
+
+1. Chunks from the same source that share sentences (the splitter's overlap)
+   are merged into one passage, and chunks already contained in a passage
+   are dropped.
+2. Sentences repeated across passages are kept once, and passages that are
+   near-duplicates of a better ranked one (MinHash, see dedup.py) are dropped.
+3. If the passages are still over `max_tokens`, sentences are ranked by BM25
+   against the question and the best ones are kept, in their original order.
+
+Usage:
+    packer = ContextPacker(max_tokens=1024)
+    stats = {}
+    documents = packer.pack(question, retriever.invoke(question), stats)
+    log_packing(stats)
+"""
+
+import math
+import sys
+import threading
+from collections import Counter
+from typing import Any, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from bm25_index import tokenize
+from dedup import ChunkDeduplicator, normalize_text
+from text_splitter import DEFAULT_ENCODING, SENTENCE_END, get_encoding
+
+GAP = " … "  # marks sentences left out between kept ones
+PACKING_KEY = "packing"  # metadata key of the packing stats on documents from PackedRetriever
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence.strip()]
+
+
+def _overlap(head: List[str], tail: List[str]) -> int:
+    """Number of sentences at the end of `head` that start `tail`."""
+    for size in range(min(len(head), len(tail)), 0, -1):
+        if head[-size:] == tail[:size]:
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Merge, deduplicate and trim retrieved chunks to a token budget.
+
+    Args:
+        max_tokens: Token budget of the packed context, None to only merge and deduplicate
+        dedup_threshold: Similarity at or above which a passage is a near-duplicate, None for exact only
+        k1: BM25 term frequency saturation of the sentence ranking
+        b: BM25 length normalization of the sentence ranking
+        encoding: tiktoken encoding used to count tokens
+    """
+
+    def __init__(self, max_tokens: Optional[int] = 1024, dedup_threshold: Optional[float] = 0.8,
+                 k1: float = 1.2, b: float = 0.75, encoding: str = DEFAULT_ENCODING):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.k1 = k1
+        self.b = b
+        self.encoding = encoding
+        # Cumulative over all queries, packers are shared by the threads of the query server
+        self.stats = {"queries": 0, "tokens_in": 0, "tokens_out": 0}
+        self._lock = threading.Lock()
+
+    def count_tokens(self, text: str) -> int:
+        return len(get_encoding(self.encoding).encode_ordinary(text))
+
+    def merge(self, documents: List[Document]) -> List[dict]:
+        """Passages of sentences, with overlapping chunks of the same source merged, in rank order."""
+        passages = []
+        for doc in documents:
+            sentences = split_sentences(doc.page_content)
+            keys = [normalize_text(sentence) for sentence in sentences]
+            if not keys:
+                continue
+            source = doc.metadata.get("source")
+            for passage in passages:
+                if passage["source"] != source:
+                    continue
+                if set(keys) <= set(passage["keys"]):
+                    break
+                size = _overlap(passage["keys"], keys)
+                if size:
+                    passage["keys"] += keys[size:]
+                    passage["sentences"] += sentences[size:]
+                    break
+                size = _overlap(keys, passage["keys"])
+                if size:
+                    passage["keys"] = keys + passage["keys"][size:]
+                    passage["sentences"] = sentences + passage["sentences"][size:]
+                    break
+            else:
+                passages.append({"source": source, "metadata": dict(doc.metadata), "keys": keys,
+                                 "sentences": sentences})
+        return passages
+
+    def deduplicate(self, passages: List[dict]) -> List[dict]:
+        """Keep each sentence once and drop passages that are near-duplicates of a better ranked one."""
+        seen = set()
+        dedup = ChunkDeduplicator(threshold=self.dedup_threshold)
+        kept = []
+        for passage in passages:
+            pairs = [(key, sentence) for key, sentence in zip(passage["keys"], passage["sentences"])
+                     if key not in seen]
+            seen.update(key for key, _ in pairs)
+            if not pairs or dedup.is_duplicate(" ".join(sentence for _, sentence in pairs)):
+                continue
+            passage["keys"] = [key for key, _ in pairs]
+            passage["sentences"] = [sentence for _, sentence in pairs]
+            kept.append(passage)
+        return kept
+
+    def rank(self, query: str, sentences: List[str]) -> List[float]:
+        """BM25 score of every sentence for the query, the sentences being the collection."""
+        terms = [Counter(tokenize(sentence)) for sentence in sentences]
+        average = sum(sum(counts.values()) for counts in terms) / max(len(terms), 1) or 1.0
+        frequency = Counter(term for counts in terms for term in counts)
+        scores = []
+        for counts in terms:
+            length = sum(counts.values())
+            score = 0.0
+            for term in set(tokenize(query)):
+                tf = counts.get(term, 0)
+                if tf:
+                    idf = math.log(1 + (len(terms) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                    score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average))
+            scores.append(score)
+        return scores
+
+    def trim(self, query: str, passages: List[dict]) -> List[dict]:
+        """Keep the best ranked sentences that fit the budget, in their original order."""
+        located = [(p, s) for p, passage in enumerate(passages) for s in range(len(passage["sentences"]))]
+        sentences = [passages[p]["sentences"][s] for p, s in located]
+        scores = self.rank(query, sentences)
+        # Better scores first, then earlier (better retrieved) passages
+        order = sorted(range(len(located)), key=lambda i: (-scores[i], i))
+
+        budget = self.max_tokens
+        selected = set()
+        for i in order:
+            tokens = self.count_tokens(sentences[i]) + 1
+            if tokens <= budget:
+                selected.add(located[i])
+                budget -= tokens
+        if not selected and order:
+            # A single sentence over the whole budget is cut to fit
+            p, s = located[order[0]]
+            encoder = get_encoding(self.encoding)
+            passages[p]["sentences"][s] = encoder.decode(
+                encoder.encode_ordinary(passages[p]["sentences"][s])[:self.max_tokens])
+            selected.add((p, s))
+
+        trimmed = []
+        for p, passage in enumerate(passages):
+            kept = [s for s in range(len(passage["sentences"])) if (p, s) in selected]
+            if not kept:
+                continue
+            parts = []
+            for position, s in enumerate(kept):
+                if position and s != kept[position - 1] + 1:
+                    parts.append(GAP)
+                elif position:
+                    parts.append(" ")
+                parts.append(passage["sentences"][s])
+            trimmed.append(dict(passage, text="".join(parts)))
+        return trimmed
+
+    def pack(self, query: str, documents: List[Document], stats: Optional[dict] = None) -> List[Document]:
+        """
+        Pack retrieved documents into passages for the prompt.
+
+        Args:
+            query: The question, used to rank sentences when over budget
+            documents: Retrieved documents, best first
+            stats: Optional dict receiving the chunks, passages, tokens_in, tokens_out and saved of this call
+
+        Returns:
+            Passages as Documents, with the metadata of their best ranked chunk
+        """
+        passages = self.deduplicate(self.merge(documents))
+        for passage in passages:
+            passage["text"] = " ".join(passage["sentences"])
+        if self.max_tokens is not None and \
+                sum(self.count_tokens(passage["text"]) for passage in passages) > self.max_tokens:
+            passages = self.trim(query, passages)
+        packed = [Document(page_content=passage["text"], metadata=passage["metadata"]) for passage in passages]
+
+        tokens_in = sum(self.count_tokens(doc.page_content) for doc in documents)
+        tokens_out = sum(self.count_tokens(doc.page_content) for doc in packed)
+        if stats is not None:
+            stats.update(chunks=len(documents), passages=len(packed), tokens_in=tokens_in,
+                         tokens_out=tokens_out, saved=tokens_in - tokens_out)
+        with self._lock:
+            self.stats["queries"] += 1
+            self.stats["tokens_in"] += tokens_in
+            self.stats["tokens_out"] += tokens_out
+        return packed
+
+
+class PackedRetriever(BaseRetriever):
+    """
+    Retriever passing the results of another one through a ContextPacker.
+
+    The packing stats of the query are in the PACKING_KEY metadata of every
+    returned document, see packing_stats.
+
+    Args:
+        retriever: Retriever of the chunks
+        packer: ContextPacker applied to every result
+    """
+
+    retriever: Any
+    packer: Any
+
+    @property
+    def vectorstore(self):
+        return self.retriever.vectorstore
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        stats = {}
+        packed = self.packer.pack(query, self.retriever.invoke(query), stats)
+        for doc in packed:
+            doc.metadata[PACKING_KEY] = stats
+        return packed
+
+
+def packing_stats(documents: List[Document]) -> dict:
+    """Packing stats of the query that retrieved `documents` through a PackedRetriever, {} if there are none."""
+    return documents[0].metadata.get(PACKING_KEY, {}) if documents else {}
+
+
+def log_packing(last: dict, file=None) -> None:
+    """Print how many tokens packing saved on a query, to stderr by default."""
+    if not last:
+        return
+    share = last["saved"] / last["tokens_in"] if last["tokens_in"] else 0.0
+    print(f"📦 Context: {last['chunks']} chunks → {last['passages']} passages, {last['tokens_in']} → "
+          f"{last['tokens_out']} tokens (saved {last['saved']}, {share:.0%})", file=file or sys.stderr)
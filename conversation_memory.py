@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+ConversationMemory - Chat history with a token budget.
+
+The most recent turns are kept verbatim. Once the summary and recent turns go
+over `max_tokens`, the oldest turns are folded into a rolling summary, by an
+LLM when a `summarize` function is given, otherwise by keeping the first
+sentence of each message. The history sent with every prompt therefore stays
+under the budget however long the session runs.
+
+Retrieval gets its own short query: the new question, prefixed with the
+previous question when it is a short follow-up or refers back ("what about
+its price?"), capped at `query_tokens`. Embedding it costs the same on every
+turn.
+
+Usage:
+    memory = ConversationMemory(max_tokens=1024)
+    context = retrieve(memory.retrieval_query(question))
+    prompt = f"{memory.history()}\n\n{context}\n\n{question}"
+    memory.add(question, answer)
+"""
+
+import re
+from collections import deque, namedtuple
+from typing import Callable, Optional
+
+from text_splitter import DEFAULT_ENCODING, SENTENCE_END, get_encoding
+
+# Words that make a question depend on the previous turn
+REFERENCE = re.compile(r"\b(it|its|that|this|these|those|they|them|their|he|she|him|her|there|"
+                       r"one|ones|same|above|more|else|also|again)\b", re.IGNORECASE)
+FOLLOW_UP_TOKENS = 6  # questions shorter than this are treated as follow-ups
+
+Turn = namedtuple("Turn", ["user", "assistant", "tokens"])
+
+
+def llm_summarizer(chat: Callable[[str], str]) -> Callable[[str, str, int], str]:
+    """
+    Summarize with a chat model.
+
+    Args:
+        chat: Function prompt -> answer, e.g. ChatAgent.Query or query_client.chat
+
+    Returns:
+        A `summarize` function for ConversationMemory
+    """
+    def summarize(summary: str, turns: str, max_tokens: int) -> str:
+        prompt = f"""Update the summary of a conversation with the new turns below. Keep names, facts, decisions and
+open questions, drop small talk. Answer with the summary only, at most {max(20, max_tokens * 3 // 4)} words.
+
+[SUMMARY]
+{summary or "(empty)"}
+
+[NEW TURNS]
+{turns}
+"""
+        return chat(prompt).strip()
+    return summarize
+
+
+class ConversationMemory:
+    """
+    Bounded chat history with a rolling summary.
+
+    Args:
+        max_tokens: Token budget of the history (summary and recent turns) sent with each prompt
+        summary_tokens: Part of the budget the summary may use
+        min_turns: Number of most recent turns always kept verbatim
+        query_tokens: Token budget of the retrieval query
+        summarize: Optional function (summary, new turns, max_tokens) -> summary, see llm_summarizer;
+            the first sentence of each message is kept when None
+        encoding: tiktoken encoding used to count tokens
+    """
+
+    def __init__(self, max_tokens: int = 1024, summary_tokens: int = 256, min_turns: int = 1,
+                 query_tokens: int = 64, summarize: Optional[Callable[[str, str, int], str]] = None,
+                 encoding: str = DEFAULT_ENCODING):
+        self.max_tokens = max_tokens
+        self.summary_tokens = min(summary_tokens, max_tokens // 2)
+        self.min_turns = min_turns
+        self.query_tokens = query_tokens
+        self.summarize = summarize
+        self.encoding = encoding
+        self.turns = deque()
+        self.summary = ""
+        self._summary_tokens = 0
+        self._turn_tokens = 0
+
+    def count_tokens(self, text: str) -> int:
+        return len(get_encoding(self.encoding).encode_ordinary(text))
+
+    def _clip(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        encoder = get_encoding(self.encoding)
+        tokens = encoder.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoder.decode(tokens[-max_tokens:] if keep_end else tokens[:max_tokens]).strip()
+
+    @staticmethod
+    def _format(turns) -> str:
+        return "\n".join(f"User: {turn.user}\nAssistant: {turn.assistant}" for turn in turns)
+
+    def _extract(self, summary: str, turns: str, max_tokens: int) -> str:
+        """Keep the first sentence of every message, dropping the oldest lines over budget."""
+        lines = summary.splitlines() if summary else []
+        for line in turns.splitlines():
+            speaker, _, text = line.partition(": ")
+            if text.strip():
+                lines.append(f"{speaker}: {SENTENCE_END.split(text.strip(), 1)[0]}")
+        while len(lines) > 1 and self.count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def add(self, user: str, assistant: str) -> None:
+        """Record a turn, folding the oldest turns into the summary when over budget."""
+        # A single message can't take more than the part of the budget left after the summary
+        limit = max(1, (self.max_tokens - self.summary_tokens) // 2)
+        user, assistant = self._clip(user, limit), self._clip(assistant, limit)
+        turn = Turn(user, assistant, self.count_tokens(self._format([Turn(user, assistant, 0)])))
+        self.turns.append(turn)
+        self._turn_tokens += turn.tokens
+
+        folded = []
+        while len(self.turns) > self.min_turns and self.tokens() > self.max_tokens:
+            folded.append(self.turns.popleft())
+            self._turn_tokens -= folded[-1].tokens
+        if folded:
+            summarize = self.summarize or self._extract
+            summary = summarize(self.summary, self._format(folded), self.summary_tokens)
+            self.summary = self._clip(summary, self.summary_tokens)
+            self._summary_tokens = self.count_tokens(self.summary)
+
+    def tokens(self) -> int:
+        """Tokens of the summary and the recent turns."""
+        return self._summary_tokens + self._turn_tokens
+
+    def history(self) -> str:
+        """The summary and recent turns, formatted for a prompt, empty before the first turn."""
+        sections = []
+        if self.summary:
+            sections.append(f"[CONVERSATION SUMMARY]\n{self.summary}")
+        if self.turns:
+            sections.append(f"[RECENT CONVERSATION]\n{self._format(self.turns)}")
+        return "\n\n".join(sections)
+
+    def retrieval_query(self, query: str) -> str:
+        """A short, standalone query for retrieval, independent of the length of the conversation."""
+        if self.turns and (self.count_tokens(query) < FOLLOW_UP_TOKENS or REFERENCE.search(query)):
+            query = f"{self.turns[-1].user} {query}"
+        # Keep the end, the new question matters most
+        return self._clip(query, self.query_tokens, keep_end=True)
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.summary = ""
+        self._summary_tokens = 0
+        self._turn_tokens = 0
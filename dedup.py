@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Dedup - Drop exact and near-duplicate chunks before they are embedded.
+
+Chunks are compared after normalizing case and whitespace. Exact copies are
+caught by a content hash; near-duplicates by MinHash signatures over word
+shingles with LSH banding (estimated Jaccard similarity >= threshold), or by
+64-bit SimHash fingerprints (1 - hamming / 64 >= threshold). Only the
+signatures of kept chunks are held in memory, so the filter runs on a stream
+of chunk batches. The filter can report which kept chunk each dropped one
+duplicates, be seeded with the chunks already in a store, and forget kept
+chunks once they are deleted.
+
+Usage:
+    dedup = ChunkDeduplicator(threshold=0.9)
+    unique = list(dedup.filter(zip(ids, splits)))
+    print(dedup.stats)
+"""
+
+import re
+import zlib
+import hashlib
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Word n-grams of a normalized text, the words themselves for very short texts."""
+    words = re.findall(r"\w+", text)
+    if len(words) <= size:
+        return words or [text]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def _hashes(items: List[str]) -> np.ndarray:
+    return np.fromiter((zlib.crc32(item.encode("utf-8")) for item in items), dtype=np.int64, count=len(items))
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) whose LSH threshold (1/b)^(1/r) is closest to, but not above, `threshold`."""
+    best = (num_perm, 1)
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        knee = (1.0 / bands) ** (1.0 / rows)
+        if knee <= threshold and knee > (1.0 / best[0]) ** (1.0 / best[1]):
+            best = (bands, rows)
+    return best
+
+
+class ChunkDeduplicator:
+    """
+    Streaming exact and near-duplicate filter for (id, Document) chunks.
+
+    Args:
+        threshold: Similarity at or above which a chunk counts as a near-duplicate, None for exact only
+        method: "minhash" (Jaccard over word shingles) or "simhash"
+        num_perm: Number of MinHash permutations
+        shingle_size: Words per shingle
+        seed: Seed of the MinHash permutations
+    """
+
+    def __init__(self, threshold: float = 0.9, method: str = "minhash", num_perm: int = 64,
+                 shingle_size: int = 3, seed: int = 1):
+        if method not in ("minhash", "simhash"):
+            raise ValueError(f"Unknown dedup method '{method}', choose minhash or simhash")
+        self.threshold = threshold
+        self.method = method
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self.bands, self.rows = _lsh_bands(num_perm, threshold or 1.0)
+        # SimHash: within `max_distance` bits, at least one of max_distance + 1 bit ranges is identical
+        self.max_distance = int((1.0 - (threshold or 1.0)) * 64)
+        self._bit_ranges = np.array_split(np.arange(64), self.max_distance + 1)
+
+        # Kept texts: exact digest and LSH buckets -> index, and the key and signature of each index
+        self._exact = {}
+        self._buckets = defaultdict(list)
+        self._signatures = []
+        self._keys = []
+        self._index = {}
+        self._discarded = set()
+        self.stats = {"chunks": 0, "exact_duplicates": 0, "near_duplicates": 0}
+
+    @property
+    def removed(self) -> int:
+        return self.stats["exact_duplicates"] + self.stats["near_duplicates"]
+
+    def minhash(self, text: str) -> np.ndarray:
+        """MinHash signature of the word shingles of a normalized text."""
+        hashes = _hashes(shingles(text, self.shingle_size))
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def simhash(self, text: str) -> int:
+        """64-bit SimHash of the word shingles of a normalized text."""
+        grams = shingles(text, self.shingle_size)
+        digests = np.frombuffer(b"".join(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest()
+                                         for g in grams), dtype=np.uint64)
+        bits = (digests[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+        weights = bits.sum(axis=0).astype(np.int64) * 2 - len(grams)
+        return int(sum(1 << i for i in np.nonzero(weights > 0)[0]))
+
+    def _bucket_keys(self, signature) -> List[tuple]:
+        if self.method == "minhash":
+            return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                    for band in range(self.bands)]
+        return [(band, tuple((signature >> int(bit)) & 1 for bit in bits))
+                for band, bits in enumerate(self._bit_ranges)]
+
+    def _similar(self, signature, other) -> bool:
+        if self.method == "minhash":
+            return float(np.mean(signature == other)) >= self.threshold
+        return 1.0 - bin(signature ^ other).count("1") / 64.0 >= self.threshold
+
+    def _find(self, text: str, key: Optional[str] = None, count: bool = True) -> Optional[int]:
+        """Index of the kept text that `text` duplicates, or None after keeping `text` under `key`."""
+        if count:
+            self.stats["chunks"] += 1
+        normalized = normalize_text(text)
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        index = self._exact.get(digest)
+        if index is not None and index not in self._discarded:
+            if count:
+                self.stats["exact_duplicates"] += 1
+            return index
+
+        signature, bands = None, []
+        if self.threshold is not None:
+            signature = self.minhash(normalized) if self.method == "minhash" else self.simhash(normalized)
+            bands = self._bucket_keys(signature)
+            candidates = {index for band in bands for index in self._buckets.get(band, ())}
+            for index in sorted(candidates - self._discarded):
+                if self._similar(signature, self._signatures[index]):
+                    if count:
+                        self.stats["near_duplicates"] += 1
+                    return index
+
+        index = len(self._keys)
+        self._exact[digest] = index
+        self._signatures.append(signature)
+        self._keys.append(key)
+        if key is not None:
+            self._index[key] = index
+        for band in bands:
+            self._buckets[band].append(index)
+        return None
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check a text against the kept ones and remember it if it is new."""
+        return self._find(text) is not None
+
+    def duplicate_of(self, text: str, key: str) -> Optional[str]:
+        """Key of the kept chunk `text` duplicates, or None after keeping it under `key`."""
+        index = self._find(text, key)
+        if index is None or self._keys[index] == key:
+            return None
+        return self._keys[index]
+
+    def seed(self, chunks: Iterable[Tuple[str, str]]) -> None:
+        """Keep (key, text) chunks, e.g. those already in a store, without counting them in the stats."""
+        for key, text in chunks:
+            self._find(text, key, count=False)
+
+    def discard(self, keys: Iterable[str]) -> None:
+        """Forget kept chunks, e.g. once they are deleted, so later chunks are not dropped as their duplicates."""
+        for key in keys:
+            index = self._index.pop(key, None)
+            if index is not None:
+                self._discarded.add(index)
+
+    def filter(self, chunks: Iterable[Tuple[str, object]],
+               dropped: Optional[list] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Yield the (id, Document) chunks that are not duplicates of an earlier chunk.
+
+        Args:
+            chunks: (id, Document) pairs
+            dropped: Optional list receiving (id, Document, id of the kept chunk) for every duplicate
+        """
+        for chunk_id, doc in chunks:
+            kept = self.duplicate_of(doc.page_content, chunk_id)
+            if kept is None:
+                yield chunk_id, doc
+            elif dropped is not None:
+                dropped.append((chunk_id, doc, kept))
+
+
+def print_dedup_stats(dedup) -> None:
+    """Print how many chunks the dedup stage removed."""
+    stats = dedup.stats
+    print(f"Dedup removed {dedup.removed} of {stats['chunks']} chunks "
+          f"({stats['exact_duplicates']} exact, {stats['near_duplicates']} near-duplicates)")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+EmbeddingCache - A persistent, content-addressed cache for embeddings.
+
+Embeddings are keyed by (model, normalized text) and stored as float32 blobs in a
+local SQLite file, so re-indexing the same chunks or moving them to another vector
+store backend is a local read instead of a remote embedding call.
+
+Usage:
+    from embedding_cache import cached_openai_embeddings
+    embeddings = cached_openai_embeddings()
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "vectorstore-getting-started", "embeddings.sqlite3")
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB of vectors
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and collapse whitespace so trivial differences share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an embedding function with an on-disk cache.
+
+    Args:
+        embeddings: The embedding function to call on cache misses
+        model: Model name used in the cache key, defaults to `embeddings.model`
+        path: SQLite file to store the cache in
+        max_bytes: Size of stored vectors above which least recently used entries are evicted
+    """
+
+    def __init__(self, embeddings: Embeddings, model: Optional[str] = None,
+                 path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+            # Touch entries so eviction drops the least recently used ones
+            self._conn.execute(
+                f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                [time.time()] + batch
+            )
+        return found
+
+    def _store(self, entries: dict) -> None:
+        now = time.time()
+        rows = []
+        for key, vector in entries.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)", rows
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% of the budget so we don't evict on every insert
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.model, text) for text in texts]
+        with self._lock:
+            found = self._lookup(list(set(keys)))
+            self._conn.commit()
+            # Counted under the lock, concurrent pipeline workers update them at once
+            misses = sum(1 for key in keys if key not in found)
+            self.hits += len(keys) - misses
+            self.misses += misses
+
+        # Embed each missing text once, even if it appears several times in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+                self._conn.commit()
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model, text)
+        with self._lock:
+            found = self._lookup([key])
+            self._conn.commit()
+            if key in found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if key in found:
+            return found[key]
+
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._store({key: vector})
+            self._conn.commit()
+        return vector
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current on-disk size of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cached_openai_embeddings(model: str = "text-embedding-ada-002", path: Optional[str] = None,
+                             enabled: bool = True) -> Embeddings:
+    """
+    Create OpenAI embeddings wrapped with the shared on-disk cache.
+
+    Args:
+        model: OpenAI embedding model
+        path: Optional cache file, defaults to $EMBEDDING_CACHE_PATH or ~/.cache
+        enabled: Return the bare OpenAI embeddings when False
+
+    Returns:
+        An embedding function
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(
+        model=model,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+    if not enabled:
+        return embeddings
+    return CachedEmbeddings(embeddings, model=model, path=path or DEFAULT_CACHE_PATH)
+
+
+def print_cache_stats(embeddings) -> None:
+    if isinstance(embeddings, CachedEmbeddings):
+        stats = embeddings.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB)")
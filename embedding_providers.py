@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+EmbeddingProviders - Choose the embedding function by name and record it with the store.
+
+Providers:
+- "openai": OpenAI embeddings over the network, behind the on-disk embedding cache (default)
+- "onnx": a sentence-transformers model run in-process on the CPU (onnx_embeddings.py),
+  no network call per chunk or query
+- "hashing": hashed word n-grams (hashing_embeddings.py), deterministic, for tests and benchmarks
+
+The provider, model and dimension that built a store are saved in embedding.json
+in its persist directory, and in the header of vector files exported from it. Loading a store without an embedding function uses the
+recorded provider, and loading or updating it with a different one raises
+EmbeddingMismatchError instead of silently comparing incompatible vectors.
+
+Usage:
+    from embedding_providers import make_embeddings
+    embeddings = make_embeddings("onnx")
+"""
+
+import os
+import json
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+EMBEDDING_FILENAME = "embedding.json"
+PROVIDERS = ["openai", "onnx", "hashing"]
+DEFAULT_OPENAI_MODEL = "text-embedding-ada-002"
+
+
+class EmbeddingMismatchError(ValueError):
+    """The embedding function differs from the one the store was built with."""
+
+
+def make_embeddings(provider: str = "openai", model: Optional[str] = None, dimension: Optional[int] = None,
+                    cache: bool = True, cache_path: Optional[str] = None,
+                    threads: Optional[int] = None) -> "Embeddings":
+    """
+    Create an embedding function by provider name.
+
+    Args:
+        provider: "openai", "onnx" or "hashing"
+        model: OpenAI model, or ONNX model name or directory
+        dimension: Vector size of the hashing embeddings
+        cache: Wrap OpenAI embeddings with the on-disk embedding cache
+        cache_path: Optional embedding cache file
+        threads: CPU threads of the ONNX model
+
+    Returns:
+        An embedding function
+    """
+    if provider == "openai":
+        from embedding_cache import cached_openai_embeddings
+
+        return cached_openai_embeddings(model or DEFAULT_OPENAI_MODEL, path=cache_path, enabled=cache)
+    if provider == "onnx":
+        from onnx_embeddings import DEFAULT_ONNX_MODEL, OnnxEmbeddings
+
+        return OnnxEmbeddings(model or DEFAULT_ONNX_MODEL, threads=threads)
+    if provider == "hashing":
+        from hashing_embeddings import HashingEmbeddings
+
+        return HashingEmbeddings(size=dimension or 384)
+    raise ValueError(f"Unknown embedding provider '{provider}', choose one of: {', '.join(PROVIDERS)}")
+
+
+def describe_embeddings(embeddings) -> dict:
+    """Provider, model and (when known without an API call) dimension of an embedding function."""
+    from embedding_cache import CachedEmbeddings
+
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    provider = getattr(embeddings, "provider", None)
+    if provider is None:
+        name = type(embeddings).__name__
+        provider = "openai" if name == "OpenAIEmbeddings" else name
+    return {"provider": provider, "model": getattr(embeddings, "model", None),
+            "dimension": getattr(embeddings, "dimension", None)}
+
+
+def load_embedding_info(path: str) -> Optional[dict]:
+    """
+    The embedding info recorded in the persist directory or vector file `path`, None for
+    stores built (or exported) before it was recorded.
+    """
+    if os.path.isfile(path):
+        from vector_file import is_vector_file, read_embedding_info
+
+        return read_embedding_info(path) if is_vector_file(path) else None
+    info_path = os.path.join(path, EMBEDDING_FILENAME)
+    if not os.path.exists(info_path):
+        return None
+    with open(info_path, 'r') as f:
+        return json.load(f)
+
+
+def save_embedding_info(path: str, info: dict) -> None:
+    os.makedirs(path, exist_ok=True)
+    info_path = os.path.join(path, EMBEDDING_FILENAME)
+    with open(info_path + ".tmp", 'w') as f:
+        json.dump(info, f, indent=2)
+    os.replace(info_path + ".tmp", info_path)
+
+
+def check_embeddings(path: str, embeddings) -> Optional[dict]:
+    """
+    Raise EmbeddingMismatchError if `embeddings` differ from those recorded for the store at `path`.
+
+    Returns:
+        The recorded info, None if nothing was recorded
+    """
+    recorded = load_embedding_info(path)
+    if recorded is None:
+        return None
+    current = describe_embeddings(embeddings)
+    same_model = (current["provider"], current["model"]) == (recorded["provider"], recorded["model"])
+    same_dimension = None in (current["dimension"], recorded.get("dimension")) \
+        or current["dimension"] == recorded["dimension"]
+    if not (same_model and same_dimension):
+        raise EmbeddingMismatchError(
+            f"{path} was built with {recorded['provider']} embeddings ({recorded['model']}, "
+            f"{recorded.get('dimension')} dimensions), not {current['provider']} ({current['model']}, "
+            f"{current['dimension']} dimensions). Load it without an embedding function (no --embeddings) "
+            f"to use the recorded one, or re-index")
+    return recorded
+
+
+def embeddings_for_store(path: str, cache: bool = True, cache_path: Optional[str] = None) -> "Embeddings":
+    """The embedding function recorded for the store at `path`, cached OpenAI embeddings if none was recorded."""
+    recorded = load_embedding_info(path) if os.path.exists(path) else None
+    if recorded is None or recorded["provider"] not in PROVIDERS:
+        return make_embeddings("openai", cache=cache, cache_path=cache_path)
+    return make_embeddings(recorded["provider"], recorded["model"] if recorded["provider"] != "hashing" else None,
+                           dimension=recorded.get("dimension"), cache=cache, cache_path=cache_path)
+
+
+def recording_writer(write_batch, info: dict):
+    """Wrap a `write_batch` function so `info["dimension"]` is set from the first written vectors."""
+    def write(ids, documents, vectors):
+        if len(vectors) and info.get("dimension") is None:
+            info["dimension"] = len(vectors[0])
+        write_batch(ids, documents, vectors)
+    return write
+
+
+def add_embedding_arguments(parser) -> None:
+    """Add the --embeddings provider options to an argparse parser."""
+    parser.add_argument('--embeddings', choices=PROVIDERS,
+                        help='Embedding provider: OpenAI API, in-process ONNX model on the CPU, or hashed n-grams. '
+                             'Defaults to the one recorded in the store, or openai')
+    parser.add_argument('--embedding-model', help='OpenAI model, or ONNX model name or directory')
+    parser.add_argument('--embedding-dim', type=int, help='Dimension of the hashing embeddings')
+    parser.add_argument('--embedding-threads', type=int, help='CPU threads of the ONNX model')
+
+
+def embeddings_from_args(args, store: Optional[str] = None) -> "Embeddings":
+    """
+    Embedding function selected by add_embedding_arguments options.
+
+    Without --embeddings, the provider recorded for the `store` directory is used, or OpenAI.
+    """
+    cache = not getattr(args, "no_embedding_cache", False)
+    cache_path = getattr(args, "embedding_cache", None)
+    if args.embeddings is None and store:
+        return embeddings_for_store(store, cache=cache, cache_path=cache_path)
+    return make_embeddings(args.embeddings or "openai", args.embedding_model, dimension=args.embedding_dim,
+                           cache=cache, cache_path=cache_path, threads=args.embedding_threads)
@@ -6,21 +6,46 @@ Usage:
   python chat.py -i                # Run in interactive mode
   python chat.py "query"          # Process a single query
   python chat.py -i --no-history  # Interactive without query history
+  python chat.py -i --history-tokens 512 --summary extractive
 """
 
 import argparse
+import codecs
+import os
 import sys
 import subprocess
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import query_client
+from conversation_memory import ConversationMemory, llm_summarizer
+from streaming import print_stream
 
 system_message = "Your name is Simone"
+# Same system message as chat.sh
+CHAT_SYSTEM_MESSAGE = "You are a custom support agent for Siperb. Focused mainly on onboarding the client and making it an easy process."
 
 def process_query(query, system_message=None):
     """
     Process a user query and return a response.
     """
+    return "".join(stream_query(query, system_message))
+
+
+def stream_query(query, system_message=None, memory=None):
+    """
+    Yield the response to a user query as the chat model generates it.
+
+    With a ConversationMemory the prompt includes its bounded history, and
+    context is retrieved for its short standalone query rather than the
+    whole conversation.
+    """
     system_msg = system_message or "You are an expert assistant. Use the provided context to answer the user query accurately and concisely."
 
-    response = run_bash(f"./vector_query.sh \"{query}\"")
+    response = retrieve_context(memory.retrieval_query(query) if memory else query)
+    history = memory.history() if memory else ""
+    if history:
+        system_msg = f"{system_msg}\n\n{history}"
     context_query = f"""{system_msg}
 
 [CONTEXT]
@@ -29,18 +54,21 @@ def process_query(query, system_message=None):
 [USER QUESTION]
 {query}
 """
-    chat_response = run_bash(f"./chat.sh \"{context_query}\"")
-    return f"{chat_response}"
+    yield from stream_chat(context_query)
 
 
-def interactive_mode(include_history=True):
+def interactive_mode(include_history=True, history_tokens=1024, summary="llm"):
     """
     Run the program in interactive mode, continuously prompting for input.
+
+    Args:
+        include_history: Send the conversation so far with each question
+        history_tokens: Token budget of that history, older turns are summarized
+        summary: "llm" to summarize older turns with the chat model, "extractive" to keep their first sentences
     """
     print("🗨️  Interactive chat mode. Type 'exit' or 'quit' to end the session.")
-    history = []
-
-
+    memory = ConversationMemory(max_tokens=history_tokens,
+                                summarize=llm_summarizer(ask_chat) if summary == "llm" else None)
 
     while True:
         try:
@@ -50,14 +78,10 @@ def interactive_mode(include_history=True):
                 break
 
             if include_history:
-                full_history = "\n".join(history + [query])
-                response = process_query(full_history, system_message=system_message)
+                response = print_stream(stream_query(query, system_message=system_message, memory=memory))
+                memory.add(query, response)
             else:
-                response = process_query(query)
-
-            history.append(query)
-            history.append(response)
-            print(response)
+                print_stream(stream_query(query))
 
         except KeyboardInterrupt:
             print("\n⛔ Session terminated by user. Goodbye!")
@@ -66,6 +90,33 @@ def interactive_mode(include_history=True):
             print(f"❌ Error: {e}")
 
 
+def retrieve_context(query):
+    """
+    Get context for a query: the most similar chunks from the query server, or
+    the answer of vector_query.sh if it isn't running.
+    """
+    if query_client.is_available():
+        # Plain retrieval takes milliseconds, an answer would be a second LLM call before the first token
+        return "\n\n".join(document["content"] for document in query_client.retrieve(query))
+    return run_bash(f"./vector_query.sh \"{query}\"")
+
+
+def ask_chat(prompt):
+    """
+    Ask the chat model through the query server, or through chat.sh if it isn't running.
+    """
+    return "".join(stream_chat(prompt))
+
+
+def stream_chat(prompt):
+    """
+    Yield the chat model's answer as it is generated, from the query server or from chat.sh.
+    """
+    if query_client.is_available():
+        return query_client.stream_chat(prompt, system=CHAT_SYSTEM_MESSAGE)
+    return stream_bash(f"./chat.sh \"{prompt}\"")
+
+
 def run_bash(command):
     """
     Runs a bash command and returns the output.
@@ -79,19 +130,43 @@ def run_bash(command):
         return f"Error running bash command: {e}"
 
 
+def stream_bash(command):
+    """
+    Runs a bash command and yields its output as it is written.
+    """
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Drain stderr while stdout is streamed, a command filling the stderr pipe would block otherwise
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    reader.start()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = os.read(process.stdout.fileno(), 1024)
+        if not data:
+            break
+        yield decoder.decode(data)
+    reader.join()
+    if process.wait() != 0:
+        yield f"Error running bash command: {errors[0].decode(errors='replace').strip()}"
+
+
 def main():
     parser = argparse.ArgumentParser(description="Simple command line chat program")
     parser.add_argument("-i", "--interactive", action="store_true", help="Run in interactive mode")
     parser.add_argument("--no-history", action="store_true", help="Do not include history in interactive mode")
+    parser.add_argument("--history-tokens", type=int, default=1024,
+                        help="Token budget of the history sent with each question (default: 1024)")
+    parser.add_argument("--summary", choices=["llm", "extractive"], default="llm",
+                        help="How older turns are summarized (default: llm)")
     parser.add_argument("query", nargs="?", type=str, help="Query to process (if not in interactive mode)")
 
     args = parser.parse_args()
 
     if args.interactive:
-        interactive_mode(include_history=not args.no_history)
+        interactive_mode(include_history=not args.no_history, history_tokens=args.history_tokens,
+                         summary=args.summary)
     elif args.query:
-        response = process_query(args.query)
-        print(response)
+        print_stream(stream_query(args.query))
     else:
         print("⚠️  No query provided. Run with -h for help.")
         parser.print_help()
@@ -8,8 +8,15 @@ Usage:
 """
 
 import argparse
+import codecs
+import os
 import sys
 import subprocess
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import query_client
+from streaming import print_stream
 
 
 def process_query(query):
@@ -19,7 +26,17 @@ def process_query(query):
     @param query - The user's input query
     @returns A response to the query
     """
-    response = run_bash(f"./vector_query.sh \"{query}\"")
+    return "".join(stream_query(query))
+
+
+def stream_query(query):
+    """
+    Yield the response to a user query as the chat model generates it.
+
+    @param query - The user's input query
+    @returns An iterator of response text chunks
+    """
+    response = retrieve_context(query)
     context_query = f"""You are an expert assistant. Use the provided context to answer the user query accurately and concisely.
 
 [CONTEXT]
@@ -28,9 +45,7 @@ def process_query(query):
 [USER QUESTION]
 {query}
 """
-    chat_response = run_bash(f"./chat.sh \"{context_query}\"")
-
-    return f"{chat_response}"
+    yield from stream_chat(context_query)
 
 
 def interactive_mode():
@@ -46,8 +61,7 @@ def interactive_mode():
                 print("Ending chat session. Goodbye!")
                 break
                 
-            response = process_query(query)
-            print(response)
+            print_stream(stream_query(query))
             
         except KeyboardInterrupt:
             print("\nSession terminated by user. Goodbye!")
@@ -55,6 +69,32 @@ def interactive_mode():
         except Exception as e:
             print(f"Error: {e}")
 
+def retrieve_context(query):
+    """
+    Get context for a query: the most similar chunks from the query server, or
+    the answer of vector_query.sh if it isn't running.
+    """
+    if query_client.is_available():
+        # Plain retrieval takes milliseconds, an answer would be a second LLM call before the first token
+        return "\n\n".join(document["content"] for document in query_client.retrieve(query))
+    return run_bash(f"./vector_query.sh \"{query}\"")
+
+
+def ask_chat(prompt):
+    """
+    Ask the chat model through the query server, or through chat.sh if it isn't running.
+    """
+    return "".join(stream_chat(prompt))
+
+
+def stream_chat(prompt):
+    """
+    Yield the chat model's answer as it is generated, from the query server or from chat.sh.
+    """
+    if query_client.is_available():
+        return query_client.stream_chat(prompt)
+    return stream_bash(f"./chat.sh \"{prompt}\"")
+
 # Run bash script function
 
 def run_bash(command):
@@ -72,6 +112,25 @@ def run_bash(command):
     except Exception as e:
         return f"Error running bash command: {e}"
 
+def stream_bash(command):
+    """
+    Runs a bash command and yields its output as it is written.
+    """
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Drain stderr while stdout is streamed, a command filling the stderr pipe would block otherwise
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    reader.start()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = os.read(process.stdout.fileno(), 1024)
+        if not data:
+            break
+        yield decoder.decode(data)
+    reader.join()
+    if process.wait() != 0:
+        yield f"Error running bash command: {errors[0].decode(errors='replace').strip()}"
+
 def main():
     """
     Main entry point of the program.
@@ -87,8 +146,7 @@ def main():
     if args.interactive:
         interactive_mode()
     elif args.query:
-        response = process_query(args.query)
-        print(response)
+        print_stream(stream_query(args.query))
     else:
         print("No query provided. Run with -h for help.")
         parser.print_help()
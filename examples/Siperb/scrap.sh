@@ -1,13 +1,13 @@
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/understanding-sip-transactions-dialogs-and-sessions/" > ./input/understanding-sip-transactions-dialogs-and-sessions.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/viewing-sip-trace-logs/" > ./input/viewing-sip-trace-logs.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/feature-codes/" > ./input/feature-codes.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/registration-modes/" > ./input/registration-modes.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/webrtc-to-sip-proxy/" > ./input/webrtc-to-sip-proxy.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/what-is-sdp-session-description-protocol/" > ./input/what-is-sdp-session-description-protocol.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/softphone/" > ./input/softphone.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/what-is-stun/" > ./input/what-is-stun.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/kb/support/" > ./input/support.txt
-python3 ../../SimpleScrap.py "https://www.siperb.com/#about_section" > ./input/about_section.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/understanding-sip-transactions-dialogs-and-sessions/" -extractor main > ./input/understanding-sip-transactions-dialogs-and-sessions.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/viewing-sip-trace-logs/" -extractor main > ./input/viewing-sip-trace-logs.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/feature-codes/" -extractor main > ./input/feature-codes.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/registration-modes/" -extractor main > ./input/registration-modes.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/webrtc-to-sip-proxy/" -extractor main > ./input/webrtc-to-sip-proxy.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/what-is-sdp-session-description-protocol/" -extractor main > ./input/what-is-sdp-session-description-protocol.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/softphone/" -extractor main > ./input/softphone.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/article/what-is-stun/" -extractor main > ./input/what-is-stun.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/kb/support/" -extractor main > ./input/support.txt
+python3 ../../SimpleScrap.py "https://www.siperb.com/#about_section" -extractor main > ./input/about_section.txt
 
 
 
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Keep the vector store and clients loaded between questions.
+# chat.py uses this server when it is running and falls back to the shell scripts otherwise.
+VECTORE_STORE=./vectorestore
+
+python3 ../../query_server.py --directory "$VECTORE_STORE"
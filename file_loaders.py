@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+FileLoaders - Load PDF, JSON, text and HTML files into LangChain documents.
+
+Directories are walked recursively and files are parsed on a process pool, since
+PDF parsing is CPU bound. Results are yielded in a fixed (sorted path) order with
+at most a few files in flight, so callers can stream them into the splitter.
+
+Usage:
+    python3 file_loaders.py <input_path> [--workers N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+# Loaders are imported on first use so importing this module stays cheap
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+TEXT_EXTENSIONS = ('.txt', '.md')
+HTML_EXTENSIONS = ('.html', '.htm')
+SUPPORTED_EXTENSIONS = ('.pdf', '.json') + TEXT_EXTENSIONS + HTML_EXTENSIONS
+
+
+def _load_json(file_path: str) -> Iterator["Document"]:
+    """Load a JSON file as one document, pretty-printed as it always was so chunk IDs stay stable."""
+    from langchain_core.documents import Document
+
+    try:
+        with open(file_path, 'r') as f:
+            json_str = json.dumps(json.load(f), indent=2)
+    except Exception as e:
+        print(f"Error loading JSON file {file_path}: {str(e)}")
+        return
+    yield Document(page_content=json_str, metadata={"source": file_path})
+
+
+def _load_html(file_path: str) -> Iterator["Document"]:
+    from bs4 import BeautifulSoup
+    from langchain_core.documents import Document
+
+    with open(file_path, 'r', errors='replace') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    metadata = {"source": file_path}
+    if soup.title and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    yield Document(page_content=soup.get_text(separator=' ', strip=True), metadata=metadata)
+
+
+def lazy_load_file(file_path: str) -> Iterator["Document"]:
+    """
+    Lazily load a single file, choosing the loader by extension.
+
+    Args:
+        file_path: Path to the file to load
+
+    Yields:
+        Documents with a `source` metadata entry (one per page for PDFs)
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.pdf':
+        from langchain_community.document_loaders import PyPDFLoader
+
+        yield from PyPDFLoader(file_path).lazy_load()
+    elif extension == '.json':
+        yield from _load_json(file_path)
+    elif extension in HTML_EXTENSIONS:
+        yield from _load_html(file_path)
+    else:
+        from langchain_community.document_loaders import TextLoader
+
+        yield from TextLoader(file_path, autodetect_encoding=True).lazy_load()
+
+
+def load_file(file_path: str) -> Tuple[str, List["Document"], float]:
+    """
+    Load a single file and time it. Runs inside the worker processes.
+
+    Returns:
+        The file path, its documents and the parse time in seconds
+    """
+    start = time.perf_counter()
+    try:
+        documents = list(lazy_load_file(file_path))
+    except Exception as e:
+        print(f"Error loading file {file_path}: {str(e)}", file=sys.stderr)
+        documents = []
+    return file_path, documents, time.perf_counter() - start
+
+
+def find_files(directory: str) -> List[str]:
+    """Recursively list supported files under `directory` in a fixed, sorted order, skipping hidden ones."""
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(names):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith('.'):
+                files.append(os.path.join(root, name))
+    return files
+
+
+def iter_documents(file_path: str, workers: Optional[int] = None, verbose: bool = True) -> Iterator["Document"]:
+    """
+    Lazily load documents from a file or directory.
+
+    Directory files are parsed on a process pool with a bounded number of files
+    in flight and yielded in sorted path order, one file at a time.
+
+    Args:
+        file_path: Path to the file or directory to load
+        workers: Number of parser processes, defaults to the CPU count. 1 parses in-process
+        verbose: Print the parse time of every file
+
+    Yields:
+        Documents with a `source` metadata entry
+    """
+    if not os.path.isdir(file_path):
+        yield from lazy_load_file(file_path)
+        return
+
+    files = find_files(file_path)
+    workers = workers or os.cpu_count() or 1
+
+    def report(path, documents, seconds):
+        if verbose:
+            print(f"Parsed {path} in {seconds:.2f}s ({len(documents)} documents)")
+
+    if workers == 1 or len(files) <= 1:
+        for path in files:
+            path, documents, seconds = load_file(path)
+            report(path, documents, seconds)
+            yield from documents
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = iter(files)
+        in_flight = deque()
+        for path in pending:
+            in_flight.append(pool.submit(load_file, path))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            path, documents, seconds = in_flight.popleft().result()
+            # Keep the window full while the caller consumes this file
+            next_path = next(pending, None)
+            if next_path is not None:
+                in_flight.append(pool.submit(load_file, next_path))
+            report(path, documents, seconds)
+            yield from documents
+
+
+def load_documents(file_path: str, workers: Optional[int] = None) -> List["Document"]:
+    """
+    Load documents from a file or directory.
+
+    Args:
+        file_path: Path to the file or directory to load
+        workers: Number of parser processes for directories
+
+    Returns:
+        List of documents
+    """
+    return list(iter_documents(file_path, workers=workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse files or directories and report per-file parse time')
+    parser.add_argument('input_path', help='Path to input file or directory')
+    parser.add_argument('--workers', type=int, help='Number of parser processes')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_path):
+        print(f"Error: Input path '{args.input_path}' does not exist")
+        return 1
+
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_documents(args.input_path, workers=args.workers))
+    print(f"Loaded {count} documents in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+HashingEmbeddings - Deterministic, offline embeddings from hashed word n-grams.
+
+Every lowercase word and word bigram is hashed (CRC32) into one of `size`
+dimensions with a hash-derived sign, counts are log-scaled and the vector is
+L2-normalized. Texts that share words get similar vectors, so search results
+are meaningful, and the same text always gets the same vector on any machine
+without a network call or a model download. Used by the benchmarks and for
+offline testing.
+
+Usage:
+    from hashing_embeddings import HashingEmbeddings
+    embeddings = HashingEmbeddings(size=384)
+"""
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+WORD = re.compile(r"[*#]?\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashing embedding function.
+
+    Args:
+        size: Vector dimension
+        ngrams: Longest word n-gram hashed (1 for words only, 2 adds bigrams)
+    """
+
+    provider = "hashing"
+
+    def __init__(self, size: int = 384, ngrams: int = 2):
+        self.size = size
+        self.ngrams = ngrams
+        # Identify the vector space for the embedding cache and the store's recorded embeddings
+        self.model = f"hashing-{size}-{ngrams}gram"
+        self.dimension = size
+
+    def _features(self, text: str) -> List[str]:
+        words = WORD.findall(text.lower())
+        features = list(words)
+        for n in range(2, self.ngrams + 1):
+            features.extend(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in self._features(text)), dtype=np.uint32)
+        if len(hashes):
+            signs = np.where(hashes & np.uint32(1 << 31), -1.0, 1.0).astype(np.float32)
+            np.add.at(vector, hashes % self.size, signs)
+            vector = np.sign(vector) * np.log1p(np.abs(vector))
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+IngestPipeline - Batched, concurrent embedding of document chunks.
+
+Chunks are streamed from the splitter into fixed size batches. Several batches are
+embedded at once on a thread pool, rate limited by a token bucket and retried with
+exponential backoff, while finished batches are written to the vector store in
+order as later batches are still being embedded.
+
+Usage:
+    from ingest_pipeline import run_pipeline
+    stats = run_pipeline(chunks, embeddings, write_batch, batch_size=64, workers=4)
+"""
+
+import sys
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size, defaults to one second worth of tokens
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` tokens are available and take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_with_backoff(fn: Callable, retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+    """
+    Call `fn` and retry with exponential backoff and jitter when it raises.
+
+    Args:
+        fn: Function to call without arguments
+        retries: Number of retries after the first attempt
+        base_delay: Delay before the first retry in seconds
+        max_delay: Upper bound for a single delay
+
+    Returns:
+        The return value of `fn`
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            print(f"⚠️  Attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+            attempt += 1
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most `size` items without materializing it."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_pipeline(chunks: Iterable[Tuple[str, object]], embeddings,
+                 write_batch: Callable[[List[str], list, List[List[float]]], None],
+                 batch_size: int = 64, workers: int = 4,
+                 requests_per_minute: Optional[float] = None, retries: int = 5) -> dict:
+    """
+    Embed `(id, Document)` chunks in concurrent batches and write them as they finish.
+
+    At most `2 * workers` batches are in flight, so memory stays bounded by the batch
+    size rather than the corpus size. Batches are written in input order.
+
+    Args:
+        chunks: Iterable of (chunk id, Document) pairs
+        embeddings: Embedding function with `embed_documents`
+        write_batch: Called with (ids, documents, vectors) for every embedded batch
+        batch_size: Number of chunks per embedding request
+        workers: Number of concurrent embedding requests
+        requests_per_minute: Optional limit on embedding requests per minute
+        retries: Retries per batch before the pipeline fails
+
+    Returns:
+        Counts of chunks and batches, elapsed seconds and chunks per second
+    """
+    bucket = TokenBucket(requests_per_minute / 60.0, capacity=workers) if requests_per_minute else None
+
+    def embed(batch):
+        texts = [doc.page_content for _, doc in batch]
+
+        def call():
+            if bucket:
+                bucket.acquire()
+            return embeddings.embed_documents(texts)
+
+        return retry_with_backoff(call, retries=retries)
+
+    stats = {"chunks": 0, "batches": 0}
+    start = time.perf_counter()
+
+    def write(batch, vectors):
+        write_batch([i for i, _ in batch], [doc for _, doc in batch], vectors)
+        stats["chunks"] += len(batch)
+        stats["batches"] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for batch in batched(chunks, batch_size):
+            in_flight.append((batch, pool.submit(embed, batch)))
+            # Write the oldest batch once the window is full, later batches keep embedding
+            if len(in_flight) >= 2 * workers:
+                done, future = in_flight.popleft()
+                write(done, future.result())
+        while in_flight:
+            done, future = in_flight.popleft()
+            write(done, future.result())
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def chroma_writer(vectorstore) -> Callable[[List[str], list, List[List[float]]], None]:
+    """Return a `write_batch` function that upserts precomputed vectors into a Chroma store."""
+    def write_batch(ids, documents, vectors):
+        vectorstore._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in documents],
+            # Chroma rejects empty metadata dicts
+            metadatas=[doc.metadata or None for doc in documents],
+        )
+    return write_batch
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+LocalVectorStore - An in-process vector store backed by a NumPy matrix.
+
+Vectors are kept as one contiguous, L2-normalized float32 matrix and searched with
+an exact, vectorized cosine top-k. For large collections an optional IVF
+(inverted file) index clusters the vectors with k-means and only scans the
+`nprobe` closest clusters per query.
+
+No database process or network is needed, so it doubles as a low-latency
+backend and as a baseline to compare Chroma's recall and latency against.
+
+Usage:
+    from local_vectorstore import LocalVectorStore
+    store = LocalVectorStore.load("./local_store", embeddings)
+    store.similarity_search("what is SIP?")
+"""
+
+import os
+import json
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+CONFIG_FILENAME = "local_store.json"
+VECTORS_FILENAME = "vectors.npy"
+RECORDS_FILENAME = "records.jsonl"
+IVF_FILENAME = "ivf_index.npz"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def _top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the `k` highest scores of every row, best first."""
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class IVFIndex:
+    """
+    Inverted file index over normalized vectors, trained with spherical k-means.
+
+    Args:
+        n_lists: Number of clusters, defaults to sqrt(n)
+        nprobe: Number of closest clusters scanned per query
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, nprobe: int = 8):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.centroids = None
+        self.assignments = None
+        self.lists = []
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        n = len(vectors)
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = self._assign(vectors, centroids)
+            for c in range(n_lists):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.set_assignments(self._assign(vectors, self.centroids))
+        return self
+
+    def set_assignments(self, assignments: np.ndarray) -> None:
+        self.assignments = assignments.astype(np.int32)
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+        # Assign in blocks so the (n x n_lists) score matrix stays small
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            out[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+        return out
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Row indices in the `nprobe` clusters closest to `query`."""
+        probes = _top_k(self.centroids @ query, self.nprobe)
+        return np.concatenate([self.lists[c] for c in probes])
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store with exact and optional IVF approximate search.
+
+    Scores returned by `similarity_search_with_score` are cosine distances,
+    so lower is better as with Chroma.
+
+    Args:
+        embedding: Embedding function used for documents and queries
+        persist_directory: Optional directory to persist the store to
+    """
+
+    def __init__(self, embedding: Embeddings, persist_directory: Optional[str] = None):
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.index: Optional[IVFIndex] = None
+        self.quantizer = None
+        self.rerank = 10
+        self._positions = {}
+        self._pending = []
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _matrix(self) -> np.ndarray:
+        # Appends are buffered and concatenated once before the next search
+        if self._pending:
+            blocks = [self.vectors] if len(self.vectors) else []
+            self.vectors = np.ascontiguousarray(np.vstack(blocks + self._pending), dtype=np.float32)
+            self._pending = []
+        return self.vectors
+
+    def add_vectors(self, vectors, texts: List[str], metadatas: Optional[List[dict]] = None,
+                    ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Add precomputed vectors. Existing IDs are replaced.
+
+        Args:
+            vectors: One embedding per text
+            texts: Texts of the chunks
+            metadatas: Optional metadata per text
+            ids: Optional IDs, random UUIDs by default
+
+        Returns:
+            The IDs of the added texts
+        """
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        existing = [i for i in ids if i in self._positions]
+        if existing:
+            self.delete(existing)
+
+        block = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+        self._pending.append(block)
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            self._positions[chunk_id] = len(self.ids)
+            self.ids.append(chunk_id)
+            self.texts.append(text)
+            self.metadatas.append(metadata or {})
+        # New rows are not in the clusters or the codes yet, the index is rebuilt on demand
+        self.index = None
+        self.quantizer = None
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_vectors(self._embedding.embed_documents(texts), texts, metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        vectors = self._matrix()
+        drop = {self._positions[i] for i in ids if i in self._positions}
+        if not drop:
+            return False
+        keep = np.array([p for p in range(len(self.ids)) if p not in drop], dtype=np.int64)
+        self.vectors = vectors[keep] if len(keep) else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        self.ids = [self.ids[p] for p in keep]
+        self.texts = [self.texts[p] for p in keep]
+        self.metadatas = [self.metadatas[p] for p in keep]
+        self._positions = {chunk_id: p for p, chunk_id in enumerate(self.ids)}
+        self.index = None
+        self.quantizer = None
+        return True
+
+    def build_index(self, n_lists: Optional[int] = None, nprobe: int = 8) -> IVFIndex:
+        """Train an IVF index for approximate search over the current vectors."""
+        self.index = IVFIndex(n_lists=n_lists, nprobe=nprobe).train(self._matrix())
+        return self.index
+
+    def quantize(self, method: str = "int8", rerank: int = 10, **kwargs: Any):
+        """
+        Train a quantizer on the current vectors and search on its codes.
+
+        Args:
+            method: "int8" (scalar) or "pq" (product quantization)
+            rerank: Candidates per result re-scored with full precision, 0 to skip re-ranking
+            **kwargs: Passed to the quantizer, e.g. subspaces for "pq"
+        """
+        from quantization import fit_quantizer
+
+        self.quantizer = fit_quantizer(method, self._matrix(), **kwargs)
+        self.rerank = rerank
+        return self.quantizer
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               approximate: Optional[bool] = None) -> List[Tuple[Document, float]]:
+        """
+        Search by a query vector.
+
+        Args:
+            embedding: Query vector
+            k: Number of results
+            approximate: Use the IVF index, defaults to True when one is built
+
+        Returns:
+            (Document, cosine distance) pairs, best first
+        """
+        vectors = self._matrix()
+        if not len(vectors):
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if approximate is None:
+            approximate = self.index is not None
+        if self.quantizer is not None:
+            from quantization import quantized_search
+
+            rows = None
+            if approximate:
+                if self.index is None:
+                    self.build_index()
+                rows = self.index.candidates(query)
+            top, sims = quantized_search(self.quantizer, vectors, query, k, self.rerank, rows)
+            return [(self._document(p), float(1.0 - s)) for p, s in zip(top, sims)]
+        if approximate:
+            if self.index is None:
+                self.build_index()
+            rows = self.index.candidates(query)
+            scores = vectors[rows] @ query
+            top = rows[_top_k(scores, k)]
+        else:
+            scores = vectors @ query
+            top = _top_k(scores, k)
+        sims = vectors[top] @ query
+        return [(self._document(p), float(1.0 - s)) for p, s in zip(top, sims)]
+
+    def batch_similarity_search_by_vector_with_score(self, embeddings, k: int = 4,
+                                                     approximate: Optional[bool] = None
+                                                     ) -> List[List[Tuple[Document, float]]]:
+        """
+        Search many query vectors with one matrix product.
+
+        Args:
+            embeddings: Query vectors, one per row
+            k: Number of results per query
+            approximate: Use the IVF index per query, defaults to True when one is built;
+                quantized stores are also searched per query
+
+        Returns:
+            One list of (Document, cosine distance) pairs per query, best first
+        """
+        vectors = self._matrix()
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        if approximate is None:
+            approximate = self.index is not None
+        if approximate or self.quantizer is not None or not len(vectors):
+            return [self.similarity_search_by_vector_with_score(query, k=k, approximate=approximate)
+                    for query in queries]
+        sims = _normalize(queries) @ vectors.T
+        top = _top_k_rows(sims, k)
+        return [[(self._document(p), float(1.0 - s)) for p, s in zip(rows, np.take(row_sims, rows))]
+                for rows, row_sims in zip(top, sims)]
+
+    def _document(self, position: int) -> Document:
+        return Document(page_content=self.texts[position], metadata=self.metadatas[position],
+                        id=self.ids[position])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    def persist(self, path: Optional[str] = None) -> None:
+        """Write vectors, records, the IVF index and the quantizer (if built) to `path`."""
+        path = path or self.persist_directory
+        if not path:
+            raise ValueError("You must specify a persist_directory to persist the store.")
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, VECTORS_FILENAME), self._matrix())
+        with open(os.path.join(path, RECORDS_FILENAME), 'w') as f:
+            for chunk_id, text, metadata in zip(self.ids, self.texts, self.metadatas):
+                f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+        index_path = os.path.join(path, IVF_FILENAME)
+        if self.index is not None:
+            np.savez(index_path, centroids=self.index.centroids,
+                     assignments=self.index.assignments, nprobe=self.index.nprobe)
+        elif os.path.exists(index_path):
+            os.remove(index_path)
+        from quantization import QUANTIZER_FILENAME, save_quantizer
+
+        if self.quantizer is not None:
+            save_quantizer(path, self.quantizer)
+        elif os.path.exists(os.path.join(path, QUANTIZER_FILENAME)):
+            os.remove(os.path.join(path, QUANTIZER_FILENAME))
+        with open(os.path.join(path, CONFIG_FILENAME), 'w') as f:
+            json.dump({"count": len(self.ids), "dimension": int(self.vectors.shape[1]) if len(self.ids) else 0,
+                       "index": "ivf" if self.index is not None else None,
+                       "quantization": self.quantizer.method if self.quantizer is not None else None,
+                       "rerank": self.rerank}, f, indent=2)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, CONFIG_FILENAME))
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings, mmap: bool = True) -> "LocalVectorStore":
+        """
+        Load a persisted store, or return an empty one if `path` has none.
+
+        Args:
+            path: Persist directory
+            embedding: Embedding function for queries and new documents
+            mmap: Memory-map the vector matrix instead of reading it into memory
+        """
+        store = cls(embedding, persist_directory=path)
+        if not cls.exists(path):
+            return store
+        store.vectors = np.load(os.path.join(path, VECTORS_FILENAME), mmap_mode='r' if mmap else None)
+        with open(os.path.join(path, RECORDS_FILENAME), 'r') as f:
+            for line in f:
+                record = json.loads(line)
+                store.ids.append(record["id"])
+                store.texts.append(record["text"])
+                store.metadatas.append(record["metadata"])
+        store._positions = {chunk_id: p for p, chunk_id in enumerate(store.ids)}
+        index_path = os.path.join(path, IVF_FILENAME)
+        if os.path.exists(index_path):
+            data = np.load(index_path)
+            store.index = IVFIndex(nprobe=int(data["nprobe"]))
+            store.index.centroids = data["centroids"]
+            store.index.set_assignments(data["assignments"])
+        from quantization import load_quantizer
+
+        store.quantizer = load_quantizer(path)
+        with open(os.path.join(path, CONFIG_FILENAME), 'r') as f:
+            store.rerank = json.load(f).get("rerank", store.rerank)
+        return store
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: Optional[str] = None,
+                   **kwargs: Any) -> "LocalVectorStore":
+        store = cls(embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        if persist_directory:
+            store.persist()
+        return store
+
+
+def local_writer(store: LocalVectorStore):
+    """Return a `write_batch` function for the ingest pipeline that adds precomputed vectors."""
+    def write_batch(ids, documents, vectors):
+        store.add_vectors(vectors, [doc.page_content for doc in documents],
+                          [doc.metadata for doc in documents], ids)
+    return write_batch
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+OnnxEmbeddings - A sentence-transformers model run in-process on the CPU.
+
+The model (all-MiniLM-L6-v2 by default, 384 dimensions) is exported to ONNX
+and run with ONNX Runtime, which chromadb already depends on, so ingest and
+queries embed locally: no API key, no network round-trip and no rate limit.
+Models are looked up in the directory chromadb downloads its default model
+to, so an existing download is reused.
+
+Usage:
+    from onnx_embeddings import OnnxEmbeddings
+    embeddings = OnnxEmbeddings()  # or OnnxEmbeddings("/path/with/model.onnx/and/tokenizer.json")
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_ONNX_MODEL = "all-MiniLM-L6-v2"
+ONNX_MODELS_DIR = os.getenv(
+    "ONNX_MODELS_DIR", os.path.join(os.path.expanduser("~"), ".cache", "chroma", "onnx_models")
+)
+
+
+def onnx_model_path(model: str) -> str:
+    """Directory with model.onnx and tokenizer.json for a model name or path."""
+    if os.path.isdir(model):
+        return model
+    return os.path.join(ONNX_MODELS_DIR, model, "onnx")
+
+
+def onnx_model_id(model: str) -> str:
+    """Model recorded with a store: the name, or the absolute path of a model directory so it can be reloaded."""
+    return os.path.abspath(model) if os.path.isdir(model) else model
+
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Mean of the token vectors of each text, ignoring padding, L2-normalized."""
+    weights = mask[:, :, None].astype(np.float32)
+    pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+    return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers model exported to ONNX, run on the CPU.
+
+    Texts are sorted by length and embedded `batch_size` at a time, so each
+    batch pads to similar lengths, and ONNX Runtime spreads every batch over
+    `threads` cores.
+
+    Args:
+        model: Model name under ONNX_MODELS_DIR, or a directory with model.onnx and tokenizer.json
+        batch_size: Texts per inference call
+        threads: CPU threads per inference call, defaults to all cores
+        max_tokens: Tokens per text, longer texts are truncated
+    """
+
+    provider = "onnx"
+
+    def __init__(self, model: str = DEFAULT_ONNX_MODEL, batch_size: int = 32, threads: Optional[int] = None,
+                 max_tokens: int = 256):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = onnx_model_path(model)
+        model_file = os.path.join(path, "model.onnx")
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"No ONNX model at {model_file}, export a sentence-transformers model "
+                                    f"there (model.onnx and tokenizer.json) or set ONNX_MODELS_DIR")
+        self.model = onnx_model_id(model)
+        # Short name for display, a directory's last component
+        self.name = os.path.basename(os.path.normpath(model))
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self._inputs = {node.name for node in self.session.get_inputs()}
+        size = self.session.get_outputs()[0].shape[-1]
+        self.dimension = size if isinstance(size, int) else None
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        return mean_pool(self.session.run(None, feeds)[0], mask)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[i] for i in rows])
+            if vectors is None:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[rows] = batch
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
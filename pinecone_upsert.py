@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+PineconeUpsert - Bulk, pipelined upserts into a Pinecone index.
+
+Embedded chunks are cut into upsert requests of `batch_size` vectors and sent
+on a bounded pool of threads while the embedding pipeline keeps producing
+batches. Each request is retried with exponential backoff. Chunk ids are
+derived from the chunk content, so a retried or re-run ingest overwrites the
+same vectors instead of duplicating them.
+
+The index client is pluggable: anything with `list_indexes().names()`,
+`create_index(...)` and `Index(name)` works. InMemoryClient is a local
+stand-in with optional latency and failures, for tests and benchmarks.
+
+Usage:
+    upserter = BulkUpserter(client.Index("vector-store"), batch_size=100, workers=4)
+    upserter.submit(ids, documents, vectors)
+    stats = upserter.close()
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ingest_pipeline import retry_with_backoff
+
+TEXT_KEY = "text"  # metadata key the LangChain Pinecone store reads the chunk text from
+
+
+def to_records(ids: List[str], documents: list, vectors: List[List[float]]) -> List[dict]:
+    """Pinecone upsert records with the chunk text stored under TEXT_KEY."""
+    return [{"id": chunk_id, "values": list(map(float, vector)),
+             "metadata": {**doc.metadata, TEXT_KEY: doc.page_content}}
+            for chunk_id, doc, vector in zip(ids, documents, vectors)]
+
+
+class BulkUpserter:
+    """
+    Send upsert requests on a bounded thread pool with per-request retries.
+
+    Args:
+        index: Pinecone index (or InMemoryIndex) with `upsert(vectors=..., namespace=...)`
+        batch_size: Vectors per upsert request
+        workers: Concurrent upsert requests
+        retries: Retries per request before the ingest fails
+        base_delay: Delay before the first retry in seconds
+        namespace: Optional index namespace
+    """
+
+    def __init__(self, index, batch_size: int = 100, workers: int = 4, retries: int = 5,
+                 base_delay: float = 1.0, namespace: Optional[str] = None):
+        self.index = index
+        self.batch_size = batch_size
+        self.workers = workers
+        self.retries = retries
+        self.base_delay = base_delay
+        self.namespace = namespace
+        self.stats = {"vectors": 0, "requests": 0, "attempts": 0}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upsert")
+        self._in_flight = deque()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def _send(self, records: List[dict]) -> int:
+        def call():
+            with self._lock:
+                self.stats["attempts"] += 1
+            kwargs = {"namespace": self.namespace} if self.namespace else {}
+            return self.index.upsert(vectors=records, **kwargs)
+
+        retry_with_backoff(call, retries=self.retries, base_delay=self.base_delay)
+        return len(records)
+
+    def _collect(self) -> None:
+        count = self._in_flight.popleft().result()
+        self.stats["vectors"] += count
+        self.stats["requests"] += 1
+
+    def submit(self, ids: List[str], documents: list, vectors: List[List[float]]) -> None:
+        """Queue chunks for upserting, blocking while `2 * workers` requests are in flight."""
+        records = to_records(ids, documents, vectors)
+        for start in range(0, len(records), self.batch_size):
+            self._in_flight.append(self._pool.submit(self._send, records[start:start + self.batch_size]))
+            if len(self._in_flight) >= 2 * self.workers:
+                self._collect()
+
+    __call__ = submit  # usable as the `write_batch` of ingest_pipeline.run_pipeline
+
+    def close(self) -> dict:
+        """
+        Wait for all requests and shut the pool down.
+
+        Returns:
+            Counts of vectors, requests and attempts, elapsed seconds and vectors per second
+        """
+        try:
+            while self._in_flight:
+                self._collect()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        self.stats["retries"] = self.stats["attempts"] - self.stats["requests"]
+        self.stats["seconds"] = time.perf_counter() - self._start
+        self.stats["vectors_per_sec"] = self.stats["vectors"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+        return self.stats
+
+
+class _IndexList(list):
+    def names(self) -> List[str]:
+        return [index["name"] for index in self]
+
+
+class InMemoryIndex:
+    """
+    Local stand-in for a Pinecone index.
+
+    Args:
+        dimension: Vector dimension, upserts with another dimension are rejected
+        latency: Seconds each request takes, to model network round trips
+        fail_first: Number of upsert requests that fail before requests succeed
+    """
+
+    def __init__(self, dimension: int, latency: float = 0.0, fail_first: int = 0):
+        self.dimension = dimension
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self.namespaces: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: List[dict], namespace: str = "") -> dict:
+        with self._lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("simulated upsert failure")
+        for record in vectors:
+            if len(record["values"]) != self.dimension:
+                raise ValueError(f"Vector dimension {len(record['values'])} does not match "
+                                 f"the dimension of the index {self.dimension}")
+        with self._lock:
+            records = self.namespaces.setdefault(namespace, {})
+            records.update((record["id"], record) for record in vectors)
+        return {"upserted_count": len(vectors)}
+
+    def fetch(self, ids: List[str], namespace: str = "") -> dict:
+        records = self.namespaces.get(namespace, {})
+        return {"vectors": {i: records[i] for i in ids if i in records}}
+
+    def delete(self, ids: List[str], namespace: str = "") -> dict:
+        with self._lock:
+            records = self.namespaces.get(namespace, {})
+            for chunk_id in ids:
+                records.pop(chunk_id, None)
+        return {}
+
+    def query(self, vector: List[float], top_k: int = 4, namespace: str = "", include_metadata: bool = True,
+              **kwargs) -> dict:
+        records = list(self.namespaces.get(namespace, {}).values())
+        if not records:
+            return {"matches": []}
+        matrix = np.array([record["values"] for record in records], dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        order = np.argsort(-scores)[:top_k]
+        return {"matches": [{"id": records[i]["id"], "score": float(scores[i]),
+                             "metadata": records[i]["metadata"] if include_metadata else None}
+                            for i in order]}
+
+    def describe_index_stats(self) -> dict:
+        counts = {name: {"vector_count": len(records)} for name, records in self.namespaces.items()}
+        return {"dimension": self.dimension, "namespaces": counts,
+                "total_vector_count": sum(c["vector_count"] for c in counts.values())}
+
+
+class InMemoryClient:
+    """
+    Local stand-in for the Pinecone client, holding InMemoryIndex instances.
+
+    Args:
+        latency: Seconds each upsert request takes
+        fail_first: Number of upsert requests per index that fail first
+    """
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.indexes: Dict[str, InMemoryIndex] = {}
+
+    def list_indexes(self) -> _IndexList:
+        return _IndexList({"name": name, "dimension": index.dimension} for name, index in self.indexes.items())
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec=None) -> None:
+        self.indexes[name] = InMemoryIndex(dimension, latency=self.latency, fail_first=self.fail_first)
+
+    def Index(self, name: str) -> InMemoryIndex:
+        return self.indexes[name]
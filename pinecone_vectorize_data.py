@@ -3,7 +3,7 @@
 VectorizeDataManager - A tool to create vector stores from various file types using Pinecone.
 
 This script allows you to vectorize individual files or entire directories of files,
-supporting both text and PDF formats. The vectorized data is stored in a Pinecone
+supporting text, JSON, HTML and PDF formats. The vectorized data is stored in a Pinecone
 vector store for efficient similarity search and retrieval.
 
 Usage:
@@ -15,80 +15,108 @@ import argparse
 from typing import List, Optional
 from pathlib import Path
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader, PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Pinecone
-from pinecone import Pinecone, ServerlessSpec
+# LangChain, Pinecone and OpenAI are imported where they are used so --help stays fast
+from file_loaders import load_documents
+from embedding_providers import add_embedding_arguments
 
-def load_documents(file_path: str) -> List[str]:
-    """
-    Load documents from a file or directory.
-    
-    Args:
-        file_path: Path to the file or directory to load
-        
-    Returns:
-        List of document texts
-    """
-    if os.path.isdir(file_path):
-        loader = DirectoryLoader(file_path, glob="**/*.txt")
-        documents = loader.load()
-    else:
-        if file_path.endswith('.pdf'):
-            loader = PyPDFLoader(file_path)
-        else:
-            loader = TextLoader(file_path)
-        documents = loader.load()
-    
-    return documents
+def ensure_index(client, index_name: str, dimension: int, spec=None) -> None:
+    """Create `index_name` with cosine metric unless the client already has it."""
+    if index_name not in client.list_indexes().names():
+        client.create_index(name=index_name, dimension=dimension, metric="cosine", spec=spec)
 
-def create_vector_store(documents: List[str], index_name: str, environment: str) -> None:
+def create_vector_store(documents: List[str], index_name: str, environment: str, embeddings=None,
+                        splitter=None, client=None, batch_size: int = 100, upsert_workers: int = 4,
+                        embed_batch_size: int = 64, workers: int = 4, requests_per_minute: float = None,
+                        namespace: Optional[str] = None, retries: int = 5) -> dict:
     """
     Create a vector store from the provided documents using Pinecone.
     
+    Chunks are embedded in concurrent batches and upserted in bulk while later
+    batches are still embedding. Chunk ids are content hashes, so running the
+    ingest again (or retrying after a failure) overwrites instead of duplicating.
+    
     Args:
         documents: List of document texts to vectorize
         index_name: Name of the Pinecone index to use
         environment: Pinecone environment to use
+        embeddings: Optional embedding function, defaults to cached OpenAI embeddings
+        splitter: Text splitter, defaults to text_splitter.make_splitter() (token budget chunks)
+        client: Pinecone client, defaults to Pinecone(api_key=$PINECONE_API_KEY);
+            pinecone_upsert.InMemoryClient runs the same path locally
+        batch_size: Vectors per upsert request
+        upsert_workers: Concurrent upsert requests
+        embed_batch_size: Chunks per embedding request
+        workers: Concurrent embedding requests
+        requests_per_minute: Optional rate limit for embedding requests
+        namespace: Optional index namespace
+        retries: Retries per embedding or upsert request
+        
+    Returns:
+        Embedding pipeline stats, with the upsert stats under "upsert"
     """
-    # Initialize Pinecone
-    pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
-    
-    # Create index if it doesn't exist
-    if index_name not in pc.list_indexes().names():
-        pc.create_index(
-            name=index_name,
-            dimension=1536,  # OpenAI embeddings dimension
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud='aws',
-                region='us-east-1'
-            )
-        )
+    from text_splitter import make_splitter
+    from chroma_vectorize_data import chunk_ids
+    from ingest_pipeline import run_pipeline
+    from pinecone_upsert import BulkUpserter
+
+    spec = None
+    if client is None:
+        from pinecone import Pinecone, ServerlessSpec
+
+        client = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+        spec = ServerlessSpec(cloud='aws', region='us-east-1')
     
     # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
+    text_splitter = splitter or make_splitter()
     splits = text_splitter.split_documents(documents)
     
-    # Create embeddings and vector store
-    embeddings = OpenAIEmbeddings()
+    if embeddings is None:
+        from embedding_cache import cached_openai_embeddings
+
+        embeddings = cached_openai_embeddings()
     
-    # Create vector store and add documents
-    vectorstore = Pinecone.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        index_name=index_name
-    )
+    # The index is created on the first embedded batch, with that batch's dimension
+    upserter = None
+
+    def write_batch(ids, docs, vectors):
+        nonlocal upserter
+        if upserter is None:
+            ensure_index(client, index_name, len(vectors[0]), spec=spec)
+            upserter = BulkUpserter(client.Index(index_name), batch_size=batch_size, workers=upsert_workers,
+                                    retries=retries, namespace=namespace)
+        upserter.submit(ids, docs, vectors)
+
+    try:
+        stats = run_pipeline(zip(chunk_ids(splits), splits), embeddings, write_batch,
+                             batch_size=embed_batch_size, workers=workers,
+                             requests_per_minute=requests_per_minute, retries=retries)
+    finally:
+        upsert_stats = upserter.close() if upserter is not None else {}
+    stats["upsert"] = upsert_stats
+    return stats
 
 def main():
     parser = argparse.ArgumentParser(description='Vectorize files or directories using Pinecone')
     parser.add_argument('input_path', help='Path to input file or directory')
     parser.add_argument('-o', '--output', help='Name of the Pinecone index', default='vector-store')
     parser.add_argument('-e', '--environment', help='Pinecone environment', default='gcp-starter')
+    parser.add_argument('--embedding-cache', help='Path of the on-disk embedding cache')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Always call the embedding API')
+    add_embedding_arguments(parser)
+    parser.add_argument('--splitter', choices=['tokens', 'characters'], default='tokens',
+                        help='Chunk by model tokens on sentence boundaries, or by characters')
+    parser.add_argument('--chunk-tokens', type=int, default=256, help='Token budget per chunk')
+    parser.add_argument('--chunk-overlap', type=int, default=50, help='Tokens shared by consecutive chunks')
+    parser.add_argument('--split-workers', type=int, help='Processes used to split documents')
+    parser.add_argument('--tokenizer', choices=['auto', 'tiktoken', 'regex'], default='auto',
+                        help='Count chunk tokens with tiktoken or the offline approximation, auto falls back to '
+                             'the approximation when tiktoken is unavailable')
+    parser.add_argument('--upsert-batch-size', type=int, default=100, help='Vectors per upsert request')
+    parser.add_argument('--upsert-workers', type=int, default=4, help='Concurrent upsert requests')
+    parser.add_argument('--batch-size', type=int, default=64, help='Chunks per embedding request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent embedding requests')
+    parser.add_argument('--rpm', type=float, help='Maximum embedding requests per minute')
+    parser.add_argument('--namespace', help='Pinecone namespace to upsert into')
     args = parser.parse_args()
     
     # Validate input path
@@ -104,7 +132,26 @@ def main():
             return 1
             
         # Create vector store
-        create_vector_store(documents, args.output, args.environment)
+        from embedding_cache import print_cache_stats
+        from embedding_providers import embeddings_from_args
+
+        embeddings = embeddings_from_args(args)
+        from text_splitter import make_splitter
+
+        splitter = make_splitter(args.splitter, chunk_tokens=args.chunk_tokens, overlap_tokens=args.chunk_overlap,
+                                 tokenizer=args.tokenizer)
+        if args.split_workers and args.splitter == 'tokens':
+            splitter.workers = args.split_workers
+        stats = create_vector_store(documents, args.output, args.environment, embeddings=embeddings,
+                                    splitter=splitter, batch_size=args.upsert_batch_size,
+                                    upsert_workers=args.upsert_workers, embed_batch_size=args.batch_size,
+                                    workers=args.workers, requests_per_minute=args.rpm,
+                                    namespace=args.namespace)
+        upsert = stats["upsert"]
+        print(f"Embedded {stats['chunks']} chunks in {stats['seconds']:.1f}s and upserted "
+              f"{upsert.get('vectors', 0)} vectors in {upsert.get('requests', 0)} requests "
+              f"({upsert.get('retries', 0)} retries, {upsert.get('vectors_per_sec', 0):.1f} vectors/sec)")
+        print_cache_stats(embeddings)
         print(f"Successfully vectorized documents from '{args.input_path}'")
         print(f"Vector store created in Pinecone index '{args.output}'")
             
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+QueryClient - A thin, standard-library client for query_server.py.
+
+Kept free of LangChain and OpenAI imports so chat scripts start instantly.
+
+Usage:
+    import query_client
+    context = query_client.answer("what is SIP?")
+"""
+
+import os
+import json
+import codecs
+import urllib.error
+import urllib.request
+from typing import Iterator, List, Optional
+
+DEFAULT_URL = os.getenv("QUERY_SERVER_URL", "http://127.0.0.1:8765")
+
+
+class QueryServerUnavailable(ConnectionError):
+    """Raised when the query server can't be reached."""
+
+
+def _post(path: str, payload: dict, url: Optional[str] = None, timeout: float = 120) -> dict:
+    request = urllib.request.Request(
+        (url or DEFAULT_URL).rstrip("/") + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError:
+        raise
+    except (urllib.error.URLError, ConnectionError) as e:
+        raise QueryServerUnavailable(f"Query server not reachable at {url or DEFAULT_URL}: {e}")
+
+
+def _stream(path: str, payload: dict, url: Optional[str] = None, timeout: float = 120) -> Iterator[str]:
+    request = urllib.request.Request(
+        (url or DEFAULT_URL).rstrip("/") + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError:
+        raise
+    except (urllib.error.URLError, ConnectionError) as e:
+        raise QueryServerUnavailable(f"Query server not reachable at {url or DEFAULT_URL}: {e}")
+    # Chunks may split multi-byte characters
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with response:
+        while True:
+            data = response.read1(4096)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def is_available(url: Optional[str] = None, timeout: float = 0.5) -> bool:
+    """Return True if a query server answers the health check."""
+    try:
+        with urllib.request.urlopen((url or DEFAULT_URL).rstrip("/") + "/health", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+def retrieve(query: str, k: int = 4, url: Optional[str] = None) -> List[dict]:
+    """Return the `k` most similar chunks as {"content", "metadata", "score"} dicts."""
+    return _post("/retrieve", {"query": query, "k": k}, url)["documents"]
+
+
+def answer(query: str, url: Optional[str] = None) -> str:
+    """Answer a question with the server's RetrievalQA chain."""
+    return _post("/answer", {"query": query}, url)["answer"]
+
+
+def chat(prompt: str, system: Optional[str] = None, url: Optional[str] = None) -> str:
+    """Send a prompt to the server's chat model."""
+    return _post("/chat", {"prompt": prompt, "system": system}, url)["answer"]
+
+
+def stream_answer(query: str, url: Optional[str] = None) -> Iterator[str]:
+    """Yield the server's RetrievalQA answer as it is generated."""
+    return _stream("/answer/stream", {"query": query}, url)
+
+
+def stream_chat(prompt: str, system: Optional[str] = None, url: Optional[str] = None) -> Iterator[str]:
+    """Yield the server's chat model answer as it is generated."""
+    return _stream("/chat/stream", {"prompt": prompt, "system": system}, url)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+QueryServer - A long-running asyncio service for retrieval and answers.
+
+Loads the vector store, the RetrievalQA chain and the chat client once and serves
+them over local HTTP, so interactive chat scripts don't start two Python
+interpreters and re-open the store for every question.
+
+Endpoints (JSON):
+    GET  /health
+    POST /retrieve  {"query": str, "k": int}            -> {"documents": [...]}
+    POST /answer    {"query": str}                      -> {"answer": str, "cache": str|null}
+    POST /chat      {"prompt": str, "system": str}      -> {"answer": str}
+    POST /answer/stream, /chat/stream                   -> answer text, chunked as it is generated
+
+Usage:
+    python3 query_server.py --directory ./vectorestore [--port 8765]
+"""
+
+import sys
+import asyncio
+import argparse
+import threading
+from typing import Callable, Iterator, Optional
+
+from aiohttp import web
+
+from embedding_providers import add_embedding_arguments, embeddings_from_args
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Appended to a streamed answer that was cut short by an error, the status is already sent
+STREAM_ERROR = "\n\n[error: the answer was interrupted]"
+
+
+def create_app(qa_chain, chat_fn: Optional[Callable] = None, vectorstore=None,
+               stream_chat_fn: Optional[Callable] = None) -> web.Application:
+    """
+    Create the aiohttp application around already-loaded clients.
+
+    Blocking LangChain and OpenAI calls run on the default thread pool so
+    concurrent requests don't block the event loop. The /stream endpoints
+    send the answer as chunked plain text while it is generated.
+
+    Args:
+        qa_chain: RetrievalQA chain used by /answer and /answer/stream
+        chat_fn: Function (prompt, system_message) -> answer used by /chat
+        vectorstore: Vector store used by /retrieve, defaults to the chain's retriever store
+        stream_chat_fn: Function (prompt, system_message) -> iterator of text used by /chat/stream
+    """
+    if vectorstore is None and qa_chain is not None:
+        vectorstore = qa_chain.retriever.vectorstore
+
+    async def run_blocking(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def read_query(request, key="query"):
+        body = await request.json()
+        value = body.get(key)
+        if not value:
+            raise web.HTTPBadRequest(text=f"Missing '{key}'")
+        return body, value
+
+    async def stream_blocking(request, tokens: Callable[[], Iterator[str]]):
+        """
+        Write the chunks of a blocking iterator to a chunked response as they are produced.
+
+        When the client goes away the producer thread stops pulling the iterator
+        at the next chunk and is awaited before the handler returns. An error
+        mid-stream is logged and ends the answer with STREAM_ERROR.
+        """
+        response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8"})
+        await response.prepare(request)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            iterator = None
+            try:
+                iterator = tokens()
+                for token in iterator:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            except Exception as e:
+                print(f"❌ Error while streaming {request.path}: {e}", file=sys.stderr)
+                loop.call_soon_threadsafe(queue.put_nowait, STREAM_ERROR)
+            finally:
+                # Closing a generator also closes the LLM stream it reads from
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while (token := await queue.get()) is not None:
+                await response.write(token.encode("utf-8"))
+        finally:
+            stop.set()
+            await producer
+        await response.write_eof()
+        return response
+
+    async def health(request):
+        return web.json_response({"status": "ok"})
+
+    async def retrieve(request):
+        body, query = await read_query(request)
+        results = await run_blocking(lambda: vectorstore.similarity_search_with_score(query, k=int(body.get("k", 4))))
+        return web.json_response({"documents": [
+            {"content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+            for doc, score in results
+        ]})
+
+    async def answer(request):
+        _, query = await read_query(request)
+        result = await run_blocking(lambda: qa_chain({"query": query}))
+        return web.json_response({"answer": result["result"], "cache": result.get("cache")})
+
+    async def chat(request):
+        body, prompt = await read_query(request, key="prompt")
+        system = body.get("system") or "You are an expert assistant."
+        result = await run_blocking(chat_fn, prompt, system)
+        return web.json_response({"answer": result})
+
+    async def answer_stream(request):
+        from chroma_context_agent import stream_answer
+
+        _, query = await read_query(request)
+        return await stream_blocking(request, lambda: stream_answer(qa_chain, query))
+
+    async def chat_stream(request):
+        body, prompt = await read_query(request, key="prompt")
+        system = body.get("system") or "You are an expert assistant."
+        return await stream_blocking(request, lambda: stream_chat_fn(prompt, system))
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    if vectorstore is not None:
+        app.router.add_post("/retrieve", retrieve)
+    if qa_chain is not None:
+        app.router.add_post("/answer", answer)
+        app.router.add_post("/answer/stream", answer_stream)
+    if chat_fn is not None:
+        app.router.add_post("/chat", chat)
+    if stream_chat_fn is not None:
+        app.router.add_post("/chat/stream", chat_stream)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve retrieval and answers from a resident process')
+    parser.add_argument('-d', '--directory', default='./output', help='Directory where the vector store is persisted')
+    parser.add_argument('--backend', choices=['chroma', 'local'], help='Vector store backend, detected by default')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--cache', action='store_true', help='Cache /answer results, including near-duplicate questions')
+    parser.add_argument('--cache-ttl', type=float, help='Seconds before a cached answer expires')
+    parser.add_argument('-m', '--model', default='gpt-4', help='Chat model used by /chat')
+    parser.add_argument('--no-pack', action='store_true', help='Answer from the retrieved chunks as they are')
+    parser.add_argument('--context-tokens', type=int, default=1024, help='Token budget of the packed answer context')
+    add_embedding_arguments(parser)
+    args = parser.parse_args()
+
+    from chroma_context_agent import load_environment, create_qa_chain
+    import ChatAgent
+
+    try:
+        load_environment()
+        qa_chain = create_qa_chain(args.directory, backend=args.backend,
+                                   embeddings=embeddings_from_args(args, store=args.directory),
+                                   pack_context=not args.no_pack, context_tokens=args.context_tokens)
+        if args.cache:
+            from answer_cache import cached_qa_chain
+            qa_chain = cached_qa_chain(qa_chain, args.directory, ttl_seconds=args.cache_ttl)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+    app = create_app(qa_chain, lambda prompt, system: ChatAgent.Query(prompt, model=args.model, system_message=system),
+                     stream_chat_fn=lambda prompt, system: ChatAgent.StreamQuery(prompt, model=args.model,
+                                                                                 system_message=system))
+    print(f"🚀 Serving '{args.directory}' on http://{args.host}:{args.port}")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+ScrapeToVectorstore - Crawl a site straight into a vector store in one pass.
+
+Pages from the concurrent crawler in WebScrapper/AdvancedScrap.py are handed
+over through a bounded queue as soon as they are extracted, and are then
+split, embedded in concurrent batches and written to the store while the
+crawler keeps fetching. Each chunk carries the page `url` and `title` as
+metadata and only the page text is embedded, with no intermediate files and
+no JSON wrapper.
+
+Usage:
+    python3 scrape_to_vectorstore.py "https://www.siperb.com/kb/" -o ./vectorestore --depth 3
+"""
+
+import os
+import sys
+import time
+import queue
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "WebScrapper"))
+
+from chroma_vectorize_data import create_vector_store, update_vector_store
+from embedding_providers import add_embedding_arguments
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+_DONE = object()
+
+
+def page_document(page: dict) -> "Document":
+    """Turn a scraped page into a Document with url/title metadata."""
+    from langchain_core.documents import Document
+
+    return Document(page_content=page["content"],
+                    metadata={"source": page["url"], "url": page["url"], "title": page["title"] or ""})
+
+
+def crawl_documents(url: str, max_depth: int = 2, queue_size: int = 64, stats: dict = None,
+                    **crawl_args) -> Iterator["Document"]:
+    """
+    Crawl `url` in a background thread and yield one Document per page as it arrives.
+
+    At most `queue_size` pages wait for the splitter, once the queue is full the
+    crawl workers wait until the embedding side catches up. The wait happens on a
+    hand-off thread, so the crawler's event loop keeps running and requests
+    already in flight are not timed out.
+
+    Args:
+        url: Start URL, links under its path are followed
+        max_depth: Maximum link depth from the start URL
+        queue_size: Pages buffered between the crawler and the splitter
+        stats: Optional dict that receives the crawler stats when the crawl ends
+        **crawl_args: Passed to AdvancedScrap.async_crawl (workers, per_host, delay, store, extractor, ...)
+    """
+    from AdvancedScrap import async_crawl
+
+    pages = queue.Queue(maxsize=queue_size)
+    hand_off = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawl-hand-off")
+
+    def on_page(page):
+        # Blocking put() on the event loop would stall every request in flight
+        return asyncio.get_running_loop().run_in_executor(hand_off, pages.put, page)
+
+    def crawl():
+        try:
+            _, crawl_stats = asyncio.run(async_crawl(url, recursive=True, max_depth=max_depth,
+                                                     on_page=on_page, **crawl_args))
+            if stats is not None:
+                stats.update(crawl_stats)
+        except BaseException as e:
+            pages.put(e)
+        finally:
+            hand_off.shutdown()
+            pages.put(_DONE)
+
+    thread = threading.Thread(target=crawl, name="crawler", daemon=True)
+    thread.start()
+    while True:
+        page = pages.get()
+        if page is _DONE:
+            break
+        if isinstance(page, BaseException):
+            raise page
+        if page["content"].strip():
+            yield page_document(page)
+    thread.join()
+
+
+def scrape_to_vectorstore(url: str, output_path: str = None, embeddings=None, max_depth: int = 2,
+                          incremental: bool = False, batch_size: int = 64, workers: int = 4,
+                          requests_per_minute: float = None, backend: str = "chroma",
+                          crawl_workers: int = 16, dedup=None, **crawl_args) -> dict:
+    """
+    Crawl a site and index its pages.
+
+    Args:
+        url: Start URL
+        output_path: Persist directory of the vector store
+        embeddings: Optional embedding function, defaults to cached OpenAI embeddings
+        max_depth: Maximum link depth from the start URL
+        incremental: Only embed changed pages and drop pages that are gone: pages answering 404 or
+            410, and pages no longer linked when the crawl reached every page without failures
+        batch_size: Number of chunks per embedding request
+        workers: Number of concurrent embedding requests
+        requests_per_minute: Optional rate limit for embedding requests
+        backend: "chroma" or "local"
+        crawl_workers: Number of concurrent fetches
+        dedup: Optional dedup.ChunkDeduplicator that drops duplicate chunks before embedding
+        **crawl_args: Passed to crawl_documents
+
+    Returns:
+        Pipeline stats, with the crawler stats under "crawl"
+    """
+    crawl_stats = {}
+    documents = crawl_documents(url, max_depth=max_depth, stats=crawl_stats, workers=crawl_workers, **crawl_args)
+    pipeline_args = dict(batch_size=batch_size, workers=workers,
+                         requests_per_minute=requests_per_minute, backend=backend, dedup=dedup)
+    if incremental:
+        # Pages that failed or were not reached this time are kept
+        stats = update_vector_store(documents, url, output_path, embeddings=embeddings,
+                                    is_removed=lambda source: source in crawl_stats.get("gone_urls", ())
+                                    or crawl_stats.get("complete", False), **pipeline_args)
+    else:
+        stats = create_vector_store(documents, output_path, embeddings=embeddings, **pipeline_args)
+    stats["crawl"] = crawl_stats
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl a website straight into a vector store')
+    parser.add_argument('url', help='Start URL, pages under its path are indexed')
+    parser.add_argument('-o', '--output', required=True, help='Path to save vector store')
+    parser.add_argument('--depth', type=int, default=2, help='Maximum link depth')
+    parser.add_argument('--crawl-workers', type=int, default=16, help='Concurrent fetches')
+    parser.add_argument('--per-host', type=int, default=4, help='Concurrent fetches per host')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds between requests to a host')
+    parser.add_argument('--max-pages', type=int, help='Stop after this many pages')
+    parser.add_argument('--extractor', choices=['bs4', 'lxml', 'main'], default='main', help='HTML extractor')
+    parser.add_argument('--strip-templates', action='store_true', help='Drop blocks repeated across pages')
+    parser.add_argument('--state', help='Crawl state file for conditional requests and resuming')
+    parser.add_argument('--dedup', action='store_true', help='Drop exact and near-duplicate chunks before embedding')
+    parser.add_argument('--dedup-threshold', type=float, default=0.9, help='Similarity of near-duplicate chunks')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only embed changed pages and delete chunks of pages that are gone')
+    parser.add_argument('--embedding-cache', help='Path of the on-disk embedding cache')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Always call the embedding API')
+    add_embedding_arguments(parser)
+    parser.add_argument('--batch-size', type=int, default=64, help='Chunks per embedding request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent embedding requests')
+    parser.add_argument('--rpm', type=float, help='Maximum embedding requests per minute')
+    parser.add_argument('--backend', choices=['chroma', 'local'], default='chroma',
+                        help='Vector store backend: Chroma or the in-process NumPy store')
+    args = parser.parse_args()
+
+    try:
+        from crawl_store import CrawlStore
+        from extractors import get_extractor
+        from embedding_cache import print_cache_stats
+        from embedding_providers import embeddings_from_args
+        from dedup import ChunkDeduplicator, print_dedup_stats
+
+        embeddings = embeddings_from_args(args, store=args.output)
+        dedup = ChunkDeduplicator(threshold=args.dedup_threshold) if args.dedup else None
+        start = time.perf_counter()
+        stats = scrape_to_vectorstore(
+            args.url.rstrip("*"), args.output, embeddings=embeddings, max_depth=args.depth,
+            incremental=args.incremental, batch_size=args.batch_size, workers=args.workers,
+            requests_per_minute=args.rpm, backend=args.backend,
+            crawl_workers=args.crawl_workers, per_host=args.per_host, delay=args.delay,
+            max_pages=args.max_pages, store=CrawlStore(args.state) if args.state else None,
+            extractor=get_extractor(args.extractor, args.strip_templates), dedup=dedup,
+        )
+        elapsed = time.perf_counter() - start
+        crawl = stats["crawl"]
+        chunks = stats.get("chunks", stats.get("added", 0))
+        print(f"Crawled {crawl.get('pages', 0)} pages ({crawl.get('failed', 0)} failed) and embedded "
+              f"{chunks} chunks in {elapsed:.1f}s ({crawl.get('pages', 0) / elapsed if elapsed else 0:.1f} pages/sec, "
+              f"{chunks / elapsed if elapsed else 0:.1f} chunks/sec)")
+        print_cache_stats(embeddings)
+        if dedup is not None:
+            print_dedup_stats(dedup)
+        print(f"Vector store saved to '{args.output}'")
+    except Exception as e:
+        print(f"Error during scraping: {str(e)}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
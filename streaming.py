@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Streaming - Show tokens as they arrive and measure time to first token.
+
+Standard library only, so chat scripts can use it without slowing startup.
+
+Usage:
+    from streaming import print_stream
+    answer = print_stream(ChatAgent.StreamQuery("what is SIP?"))
+"""
+
+import sys
+import time
+from typing import Iterable, Iterator, Optional
+
+
+def timed(tokens: Iterable[str], stats: dict, started: Optional[float] = None) -> Iterator[str]:
+    """
+    Pass `tokens` through, recording the timings in `stats`.
+
+    Args:
+        tokens: Text chunks, e.g. the deltas of a streaming chat completion
+        stats: Filled with "ttft" (seconds to the first non-empty chunk), "seconds" and "chunks"
+        started: perf_counter() value the request started at, defaults to now
+    """
+    started = time.perf_counter() if started is None else started
+    stats.update(ttft=None, seconds=0.0, chunks=0)
+    try:
+        for token in tokens:
+            if not token:
+                continue
+            if stats["ttft"] is None:
+                stats["ttft"] = time.perf_counter() - started
+            stats["chunks"] += 1
+            yield token
+    finally:
+        stats["seconds"] = time.perf_counter() - started
+
+
+def log_timings(stats: dict, label: str = "Answer", file=None) -> None:
+    """Print the time to first token and the total time of a stream, to stderr by default."""
+    ttft = f"{stats['ttft'] * 1000:.0f} ms" if stats.get("ttft") is not None else "no tokens"
+    print(f"⏱️  {label}: first token {ttft}, {stats['chunks']} chunks in {stats['seconds']:.2f}s",
+          file=file or sys.stderr)
+
+
+def print_stream(tokens: Iterable[str], file=None, started: Optional[float] = None, log: bool = True,
+                 label: str = "Answer") -> str:
+    """
+    Print tokens as they arrive and return the whole text.
+
+    Args:
+        tokens: Text chunks
+        file: Where to print the text, stdout by default
+        started: perf_counter() value the request started at, defaults to now
+        log: Print the time to first token to stderr when done
+        label: Name of the stream in the timing line
+
+    Returns:
+        The concatenated text
+    """
+    file = file or sys.stdout
+    stats = {}
+    parts = []
+    for token in timed(tokens, stats, started):
+        parts.append(token)
+        file.write(token)
+        file.flush()
+    file.write("\n")
+    file.flush()
+    if log:
+        log_timings(stats, label)
+    return "".join(parts)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Unit tests for answer_cache.py
+"""
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# Add parent directory to path to import the cache module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from answer_cache import AnswerCache, CachedQAChain, cached_qa_chain, normalize_query, store_fingerprint
+from local_vectorstore import LocalVectorStore
+
+
+class WordEmbeddings(Embeddings):
+    """Bag-of-words embedding, so questions sharing most words are close"""
+
+    VOCABULARY = ["what", "is", "the", "price", "plan", "of", "pro", "how", "do", "i", "cancel", "a"]
+
+    def __init__(self):
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        words = normalize_query(text).split()
+        return [float(words.count(word)) for word in self.VOCABULARY]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class FakeChain:
+    """Stands in for RetrievalQA and counts how often it is run"""
+
+    def __init__(self, vectorstore):
+        self.retriever = vectorstore.as_retriever()
+        self.calls = 0
+
+    def __call__(self, inputs):
+        self.calls += 1
+        return {"query": inputs["query"], "result": f"answer {self.calls}",
+                "source_documents": [Document(page_content="pricing page", metadata={"source": "p.html"})]}
+
+
+class TestAnswerCache(unittest.TestCase):
+    """Test cases for the answer cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "answers.sqlite3")
+        self.embeddings = WordEmbeddings()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_hit_after_normalization(self):
+        """Case, whitespace and trailing punctuation don't cause a miss"""
+        cache = AnswerCache(self.path, "v1")
+        self.assertIsNone(cache.get("What is the price?"))
+        cache.put("What is the price?", "Ten dollars", [{"content": "pricing"}])
+        hit = cache.get("  what is   the PRICE ")
+        self.assertEqual(hit["result"], "Ten dollars")
+        self.assertEqual(hit["cache"], "exact_hits")
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_semantic_hit_and_miss(self):
+        """Near-duplicate questions hit, unrelated ones miss"""
+        cache = AnswerCache(self.path, "v1", embeddings=self.embeddings, semantic_threshold=0.2)
+        cache.put("what is the price of the pro plan", "Ten dollars")
+        self.assertEqual(cache.get("what is the price of a pro plan")["cache"], "semantic_hits")
+        self.assertIsNone(cache.get("how do i cancel"))
+        stats = cache.stats()
+        self.assertEqual((stats["semantic_hits"], stats["misses"]), (1, 1))
+
+    def test_new_fingerprint_invalidates(self):
+        """Answers cached for an older store version are dropped"""
+        AnswerCache(self.path, "v1").put("what is the price", "Ten dollars")
+        self.assertIsNotNone(AnswerCache(self.path, "v1").get("what is the price"))
+        cache = AnswerCache(self.path, "v2")
+        self.assertIsNone(cache.get("what is the price"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_and_ttl_eviction(self):
+        """Least recently used entries go past max_entries and old entries expire"""
+        cache = AnswerCache(self.path, "v1", max_entries=2)
+        cache.put("one", "1")
+        cache.put("two", "2")
+        cache.get("one")
+        cache.put("three", "3")
+        self.assertIsNotNone(cache.get("one"))
+        self.assertIsNone(cache.get("two"))
+
+        cache = AnswerCache(self.path, "v1", ttl_seconds=0.05)
+        cache.put("four", "4")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("four"))
+
+    def test_miss_embeds_once(self):
+        """A miss embeds the question once for the lookup and reuses the vector to store the answer"""
+        cache = AnswerCache(self.path, "v1", embeddings=self.embeddings)
+        cached, embedding = cache.lookup("how do i cancel")
+        self.assertIsNone(cached)
+        cache.put("how do i cancel", "From the account page", embedding=embedding)
+        self.assertEqual(self.embeddings.queries, 1)
+
+    def test_cached_chain_skips_llm_until_store_changes(self):
+        """The chain runs once per question and again after the store is re-indexed"""
+        store = LocalVectorStore.from_texts(["pricing page"], self.embeddings, ids=["a"])
+        chain = FakeChain(store)
+        cached = cached_qa_chain(chain, self.tmp.name, semantic_threshold=0.2)
+        self.assertIsNone(cached({"query": "What is the price of the pro plan?"})["cache"])
+        result = cached({"query": "what is the price of a pro plan"})
+        self.assertEqual(result["result"], "answer 1")
+        self.assertEqual(result["source_documents"][0].metadata, {"source": "p.html"})
+        self.assertEqual(chain.calls, 1)
+
+        # An exact hit doesn't embed the question
+        embedded = self.embeddings.queries
+        self.assertEqual(cached({"query": "What is the price of the pro plan"})["cache"], "exact_hits")
+        self.assertEqual(self.embeddings.queries, embedded)
+
+        before = store_fingerprint(store, self.tmp.name)
+        store.add_texts(["new page"], ids=["b"])
+        self.assertNotEqual(store_fingerprint(store, self.tmp.name), before)
+        cached = CachedQAChain(chain, AnswerCache(cached.cache.path, store_fingerprint(store, self.tmp.name)))
+        cached({"query": "What is the price of the pro plan?"})
+        self.assertEqual(chain.calls, 2)
+
+
+    def test_other_embedding_dimension_is_not_compared(self):
+        """Entries embedded with a different dimension are skipped instead of failing the lookup"""
+        cache = AnswerCache(self.path, "v1", embeddings=self.embeddings, semantic_threshold=0.2)
+        cache.put("what is the price of the pro plan", "Ten dollars", embedding=[1.0, 0.0, 0.0])
+        cache.put("how do i cancel", "From the account page")
+        self.assertEqual(cache.get("how do i cancel a plan")["result"], "From the account page")
+        self.assertIsNone(cache.get("what is the price of a pro plan"))
+        # The exact question is still answered from the entry
+        self.assertEqual(cache.get("what is the price of the pro plan")["result"], "Ten dollars")
+
+    def test_fingerprint_includes_embeddings(self):
+        """Re-embedding the same chunks with another model changes the fingerprint"""
+        store = LocalVectorStore.from_texts(["pricing page"], self.embeddings, ids=["a"])
+        with open(os.path.join(self.tmp.name, "index_manifest.json"), 'w') as f:
+            f.write('{"sources": {}}')
+        before = store_fingerprint(store, self.tmp.name)
+        with open(os.path.join(self.tmp.name, "embedding.json"), 'w') as f:
+            f.write('{"provider": "onnx", "model": "all-MiniLM-L6-v2", "dimension": 384}')
+        onnx = store_fingerprint(store, self.tmp.name)
+        self.assertNotEqual(onnx, before)
+        with open(os.path.join(self.tmp.name, "embedding.json"), 'w') as f:
+            f.write('{"provider": "hashing", "model": null, "dimension": 256}')
+        self.assertNotEqual(store_fingerprint(store, self.tmp.name), onnx)
+
+
+if __name__ == '__main__':
+    unittest.main()
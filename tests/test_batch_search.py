@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batchSimilaritySearch and the --queries-file mode of chroma_context_agent.py
+"""
+
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the search modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from chroma_vectorize_data import batchSimilaritySearch, loadVectorstore
+from chroma_context_agent import run_queries_file
+from vector_file import export_collection
+from bm25_index import hybrid_retriever
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embedding that counts embedding requests"""
+
+    requests: int = 0
+
+    def embed_documents(self, texts):
+        self.requests += 1
+        return super().embed_documents(texts)
+
+
+class TestBatchSearch(unittest.TestCase):
+    """Test cases for multi-query search"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = CountingEmbedding(size=16)
+        self.documents = [Document(page_content=f"Article {i} explains codec {i % 7} negotiation.",
+                                   metadata={"source": f"doc{i}.txt"}) for i in range(25)]
+        self.queries = [doc.page_content for doc in self.documents[:5]] + ["unrelated question"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, backend):
+        path = os.path.join(self.tmp.name, backend)
+        chroma_vectorize_data.create_vector_store(self.documents, path, embeddings=self.embeddings, backend=backend)
+        return path
+
+    def assert_matches_single_search(self, store):
+        self.embeddings.requests = 0
+        batch = batchSimilaritySearch(store, self.queries, k=3, batch_size=4)
+        self.assertEqual(self.embeddings.requests, 2)
+        for query, hits in zip(self.queries, batch):
+            single = store.similarity_search_with_score(query, k=3)
+            self.assertEqual([doc.page_content for doc, _ in hits], [doc.page_content for doc, _ in single])
+            for (_, score), (_, expected) in zip(hits, single):
+                self.assertAlmostEqual(score, expected, places=5)
+        self.assertEqual(batch[0][0][0].page_content, self.queries[0])
+
+    def test_chroma(self):
+        self.assert_matches_single_search(loadVectorstore(self.build("chroma"), self.embeddings))
+
+    def test_local_and_vector_file(self):
+        path = self.build("local")
+        self.assert_matches_single_search(loadVectorstore(path, self.embeddings))
+
+        vector_file = os.path.join(self.tmp.name, "store.vsf")
+        export_collection(path, vector_file)
+        self.assert_matches_single_search(loadVectorstore(vector_file, self.embeddings))
+
+    def test_queries_file_writes_jsonl(self):
+        """Plain and JSONL questions produce one record each, extra fields are kept"""
+        path = self.build("local")
+        queries_file = os.path.join(self.tmp.name, "questions.jsonl")
+        with open(queries_file, 'w') as f:
+            f.write(self.queries[1] + "\n\n" + json.dumps({"id": "q2", "query": self.queries[2]}) + "\n")
+
+        output = io.StringIO()
+        count = run_queries_file(queries_file, path, output, k=2, embeddings=self.embeddings)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 2)
+        self.assertEqual(records[1]["id"], "q2")
+        self.assertEqual(len(records[0]["results"]), 2)
+        self.assertEqual(records[1]["results"][0]["content"], self.queries[2])
+        self.assertEqual(records[1]["results"][0]["metadata"], {"source": "doc2.txt"})
+
+
+    def test_queries_file_fuses_bm25_results(self):
+        """Batched questions get the hybrid retriever's BM25 matches, also when answering"""
+        path = self.build("local")
+        queries_file = os.path.join(self.tmp.name, "questions.txt")
+        with open(queries_file, 'w') as f:
+            f.write("17\n")
+
+        output = io.StringIO()
+        run_queries_file(queries_file, path, output, k=2, embeddings=self.embeddings)
+        contents = [hit["content"] for hit in json.loads(output.getvalue())["results"]]
+        self.assertIn(self.documents[17].page_content, contents)
+
+        qa_chain = FakeQAChain(hybrid_retriever(loadVectorstore(path, self.embeddings), path, k=2))
+        output = io.StringIO()
+        run_queries_file(queries_file, path, output, k=2, qa_chain=qa_chain)
+        self.assertIn(self.documents[17].page_content, json.loads(output.getvalue())["answer"])
+
+
+class FakeQAChain:
+    """Stands in for RetrievalQA, answering with the context it is given"""
+
+    def __init__(self, retriever):
+        self.retriever = retriever
+        self.combine_documents_chain = self
+
+    def invoke(self, inputs):
+        return {"output_text": "\n".join(doc.page_content for doc in inputs["input_documents"])}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bm25_index.py and the BM25 index built at ingest time
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the index module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from bm25_index import BM25Index, HybridRetriever, hybrid_retriever, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    "Dial *72 to forward calls to another number.",
+    "A 486 Busy Here response means the callee is on another call.",
+    "KING OF FRANCE. Where is my cousin Burgundy?",
+    "Registration refreshes every 3600 seconds by default.",
+] + [f"General note {i} about calls, numbers and registration." for i in range(20)]
+
+
+def documents(texts, source="kb.txt"):
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for the lexical index"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = BM25Index()
+        self.index.add([f"id-{i}" for i in range(len(CHUNKS))], documents(CHUNKS))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def top(self, index, query):
+        return index.search_documents(query, k=1)[0][0].page_content
+
+    def test_exact_tokens_rank_first(self):
+        self.assertEqual(tokenize("Dial *72 now"), ["dial", "*72", "now"])
+        self.assertEqual(self.top(self.index, "*72"), CHUNKS[0])
+        self.assertEqual(self.top(self.index, "what does 486 mean"), CHUNKS[1])
+        self.assertEqual(self.top(self.index, "KING of France"), CHUNKS[2])
+        self.assertEqual(self.index.search("zzz unknown"), [])
+
+    def test_save_load_and_update(self):
+        """A loaded index answers the same and still supports add and delete"""
+        self.index.save(self.tmp.name)
+        loaded = BM25Index.load(self.tmp.name)
+        self.assertEqual(loaded.search("3600 seconds", k=3), self.index.search("3600 seconds", k=3))
+
+        loaded.delete(["id-0"])
+        loaded.add(["new"], documents(["Press *72 then the target number."]))
+        self.assertEqual(self.top(loaded, "*72"), "Press *72 then the target number.")
+        self.assertEqual(len(loaded), len(CHUNKS))
+
+    def test_reciprocal_rank_fusion(self):
+        a, b, c = documents(["a", "b", "c"])
+        # b is second in both lists and beats a and c, which are first in only one
+        self.assertEqual([d.page_content for d in reciprocal_rank_fusion([[a, b], [c, b]], k=3)], ["b", "a", "c"])
+
+
+class TestHybridIngest(unittest.TestCase):
+    """Test cases for the BM25 index kept next to the vector store"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ingest_builds_index_and_hybrid_finds_exact_match(self):
+        for backend in ("chroma", "local"):
+            path = os.path.join(self.tmp.name, backend)
+            chroma_vectorize_data.create_vector_store(documents(CHUNKS[:1] + CHUNKS[3:]) +
+                                                      documents(CHUNKS[1:3], "other.txt"), path,
+                                                      embeddings=self.embeddings, backend=backend)
+            self.assertTrue(BM25Index.exists(path))
+            store = chroma_vectorize_data.loadVectorstore(path, self.embeddings)
+            retriever = hybrid_retriever(store, path, k=2)
+            self.assertIsInstance(retriever, HybridRetriever)
+            results = retriever.invoke("486 Busy Here")
+            self.assertEqual(len(results), 2)
+            self.assertIn(CHUNKS[1], results[0].page_content)
+
+    def test_update_builds_missing_index_from_store(self):
+        """A store indexed without BM25 gets its index from the stored chunks on the next update"""
+        path = os.path.join(self.tmp.name, "store")
+        chroma_vectorize_data.create_vector_store(documents(CHUNKS, os.path.join(self.tmp.name, "kb.txt")), path,
+                                                  embeddings=self.embeddings, lexical=False)
+        self.assertFalse(BM25Index.exists(path))
+        chroma_vectorize_data.update_vector_store([], os.path.join(self.tmp.name, "input"), path,
+                                                  embeddings=self.embeddings)
+        self.assertEqual(self.top_text(BM25Index.load(path), "*72"), CHUNKS[0])
+
+    def test_update_without_lexical_keeps_existing_index_in_sync(self):
+        """lexical=False does not leave an existing index stale for hybrid retrieval"""
+        input_dir = os.path.join(self.tmp.name, "input")
+        path = os.path.join(self.tmp.name, "store")
+        source = os.path.join(input_dir, "kb.txt")
+        chroma_vectorize_data.update_vector_store(documents(CHUNKS[:2], source), input_dir, path,
+                                                  embeddings=self.embeddings)
+        chroma_vectorize_data.update_vector_store(documents(CHUNKS[2:], source), input_dir, path,
+                                                  embeddings=self.embeddings, lexical=False)
+        self.assertEqual(sorted(BM25Index.load(path).texts), sorted(CHUNKS[2:]))
+
+    def top_text(self, index, query):
+        return index.search_documents(query, k=1)[0][0].page_content
+
+    def test_incremental_update_keeps_index_in_sync(self):
+        input_dir = os.path.join(self.tmp.name, "input")
+        output_dir = os.path.join(self.tmp.name, "store")
+        os.makedirs(input_dir)
+        paths = {name: os.path.join(input_dir, f"{name}.txt") for name in ("a", "b")}
+
+        def update(texts):
+            for name, path in paths.items():
+                if name in texts:
+                    with open(path, "w") as f:
+                        f.write(texts[name])
+                elif os.path.exists(path):
+                    os.remove(path)
+            docs = [Document(page_content=texts[name], metadata={"source": paths[name]}) for name in sorted(texts)]
+            chroma_vectorize_data.update_vector_store(docs, input_dir, output_dir, embeddings=self.embeddings)
+            return BM25Index.load(output_dir)
+
+        index = update({"a": "Error 503 Service Unavailable.", "b": "Dial *72 to forward calls."})
+        self.assertEqual(len(index), 2)
+        index = update({"a": "Error 404 Not Found."})
+        self.assertEqual(index.texts, ["Error 404 Not Found."])
+        self.assertEqual(index.search("503"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for context_packing.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# Add parent directory to path to import context_packing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_context_agent
+import chroma_vectorize_data
+from context_packing import GAP, ContextPacker, PackedRetriever, packing_stats
+from hashing_embeddings import HashingEmbeddings
+
+
+def doc(text, source="guide.txt"):
+    return Document(page_content=text, metadata={"source": source})
+
+
+class TestContextPacker(unittest.TestCase):
+    """Test cases for merging, deduplicating and trimming retrieved chunks"""
+
+    def test_overlapping_chunks_are_merged(self):
+        """Chunks of a source sharing their overlap become one passage, in either retrieval order"""
+        first = doc("Open the dashboard. Pick a number. Save the settings.")
+        second = doc("Save the settings. Calls now ring your phone.")
+        for documents in ([first, second], [second, first]):
+            packed = ContextPacker(max_tokens=None).pack("setup", documents)
+            self.assertEqual([d.page_content for d in packed],
+                             ["Open the dashboard. Pick a number. Save the settings. Calls now ring your phone."])
+
+    def test_other_sources_are_not_merged(self):
+        """The same overlap in another source is not merged, but its repeated sentence is kept once"""
+        packed = ContextPacker(max_tokens=None).pack("setup", [
+            doc("Open the dashboard. Save the settings."),
+            doc("Save the settings. Calls ring your phone.", source="faq.txt")])
+        self.assertEqual([d.page_content for d in packed],
+                         ["Open the dashboard. Save the settings.", "Calls ring your phone."])
+        self.assertEqual(packed[1].metadata["source"], "faq.txt")
+
+    def test_near_duplicates_are_dropped(self):
+        """A passage nearly identical to a better ranked one is dropped"""
+        text = "Dial star six nine to call back the last number that called your extension today"
+        packer = ContextPacker(max_tokens=None, dedup_threshold=0.7)
+        stats = {}
+        packed = packer.pack("call back", [doc(text + "."), doc(text + " please!", source="copy.txt")], stats)
+        self.assertEqual(len(packed), 1)
+        self.assertGreater(stats["saved"], 0)
+
+    def test_budget_keeps_relevant_sentences(self):
+        """Over budget, the sentences matching the question are kept in their original order"""
+        filler = " ".join(f"Unrelated sentence number {i} about billing plans." for i in range(20))
+        documents = [doc(f"{filler} STUN finds the public address of a client. More words here."),
+                     doc("TURN relays media when STUN fails.", source="turn.txt")]
+        packer = ContextPacker(max_tokens=60)
+        stats = {}
+        packed = packer.pack("What does STUN find?", documents, stats)
+        text = " ".join(d.page_content for d in packed)
+        self.assertIn("STUN finds the public address of a client.", text)
+        self.assertIn(GAP.strip(), text)
+        self.assertLessEqual(stats["tokens_out"], 60)
+        self.assertEqual(stats["saved"], stats["tokens_in"] - stats["tokens_out"])
+        self.assertEqual(packer.stats["queries"], 1)
+
+    def test_concurrent_queries_keep_their_own_stats(self):
+        """Stats returned to each caller belong to its own query while threads share the packer"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        packer = ContextPacker(max_tokens=None)
+
+        def pack(n):
+            stats = {}
+            packer.pack("q", [doc(f"Sentence {i} of query {n}.", source=f"{n}-{i}.txt") for i in range(n)], stats)
+            return n, stats["chunks"]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(pack, [1 + i % 7 for i in range(200)]))
+        self.assertTrue(all(n == chunks for n, chunks in results))
+        self.assertEqual(packer.stats["queries"], 200)
+
+
+class TestPackedQAChain(unittest.TestCase):
+    """Test cases for packing in create_qa_chain"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = HashingEmbeddings(size=64)
+        documents = [doc("Dial *69 to call back the last caller. It works on every extension."),
+                     doc("It works on every extension. Dial *67 to hide your number.")]
+        chroma_vectorize_data.create_vector_store(documents, self.tmp.name, embeddings=self.embeddings,
+                                                  backend="local")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chain_answers_from_packed_context(self):
+        """The chain retrieves through the packer and still exposes the vector store"""
+        qa_chain = chroma_context_agent.create_qa_chain(self.tmp.name, embeddings=self.embeddings,
+                                                        llm=FakeListChatModel(responses=["Dial *69."]))
+        self.assertIsInstance(qa_chain.retriever, PackedRetriever)
+        self.assertIsNotNone(qa_chain.retriever.vectorstore)
+        sources = []
+        answer = "".join(chroma_context_agent.stream_answer(qa_chain, "how do I call back", sources))
+        self.assertEqual(answer, "Dial *69.")
+        self.assertEqual(len(sources), 1)
+        self.assertEqual(sources[0].page_content.count("It works on every extension."), 1)
+        self.assertGreater(packing_stats(sources)["saved"], 0)
+
+    def test_packing_can_be_disabled(self):
+        qa_chain = chroma_context_agent.create_qa_chain(self.tmp.name, embeddings=self.embeddings,
+                                                        llm=FakeListChatModel(responses=["ok"]), pack_context=False)
+        self.assertNotIsInstance(qa_chain.retriever, PackedRetriever)
+
+
+if __name__ == '__main__':
+    unittest.main()
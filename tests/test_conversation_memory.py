@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for conversation_memory.py
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import conversation_memory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conversation_memory import ConversationMemory, llm_summarizer
+
+
+def turn(i):
+    return (f"Question {i}: how do I set up feature number {i} on my Siperb account?",
+            f"Feature {i} is enabled under Settings. Open the dashboard, pick feature {i} and save. "
+            f"It takes effect within a minute for every extension on the account.")
+
+
+class TestConversationMemory(unittest.TestCase):
+    """Test cases for the bounded history and the retrieval query"""
+
+    def test_history_stays_under_budget(self):
+        """However long the session, the history and retrieval query stay bounded"""
+        memory = ConversationMemory(max_tokens=200, summary_tokens=60, query_tokens=32)
+        sizes = []
+        for i in range(50):
+            memory.add(*turn(i))
+            self.assertLessEqual(memory.tokens(), 200)
+            self.assertLessEqual(memory.count_tokens(memory.retrieval_query("and what about it?")), 32)
+            sizes.append(memory.count_tokens(memory.history()))
+        # The cost per turn is flat once the budget is reached
+        self.assertLess(max(sizes[10:]) - min(sizes[10:]), 60)
+        self.assertIn("Question 49", memory.history())
+        self.assertIn("[CONVERSATION SUMMARY]", memory.history())
+
+    def test_extractive_summary_keeps_first_sentences(self):
+        """Folded turns are summarized by their first sentence"""
+        memory = ConversationMemory(max_tokens=200, summary_tokens=60)
+        for i in range(5):
+            memory.add(*turn(i))
+        self.assertRegex(memory.summary, r"Assistant: Feature \d is enabled under Settings\.")
+        self.assertNotIn("dashboard", memory.summary)
+        self.assertNotIn("Question 4", memory.summary)
+
+    def test_llm_summarizer(self):
+        """The summarizer gets the previous summary and the folded turns"""
+        prompts = []
+        memory = ConversationMemory(max_tokens=200, summary_tokens=60,
+                                    summarize=llm_summarizer(lambda prompt: prompts.append(prompt) or " Summary. "))
+        for i in range(5):
+            memory.add(*turn(i))
+        self.assertEqual(memory.summary, "Summary.")
+        self.assertIn("Question 0", prompts[0])
+        self.assertIn("Summary.", prompts[-1])
+
+    def test_retrieval_query(self):
+        """Follow-ups are prefixed with the previous question, standalone questions are kept"""
+        memory = ConversationMemory()
+        self.assertEqual(memory.retrieval_query("What is STUN?"), "What is STUN?")
+        memory.add("What is STUN?", "STUN finds the public address of a client.")
+        self.assertEqual(memory.retrieval_query("How do I configure it?"), "What is STUN? How do I configure it?")
+        self.assertEqual(memory.retrieval_query("Which codecs does Siperb support?"),
+                         "Which codecs does Siperb support?")
+
+    def test_long_message_is_clipped(self):
+        """A single huge answer can't push the history over budget"""
+        memory = ConversationMemory(max_tokens=100, summary_tokens=20)
+        memory.add("Tell me everything", "word " * 1000)
+        self.assertLessEqual(memory.tokens(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent crawler in WebScrapper/AdvancedScrap.py
+"""
+
+import unittest
+import sys
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add the scraper directory to path to import the crawler module
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WebScrapper"))
+import AdvancedScrap
+from crawl_store import CrawlStore
+
+SITE = {
+    "/kb": '<title>KB</title><a href="/kb/a">A</a> <a href="/kb/b">B</a> <a href="/other">Out</a>',
+    "/kb/a": '<title>A</title><a href="/kb/a/deep">Deep</a> <a href="/kb/missing">Missing</a> <a href="/kb#top">Top</a>',
+    "/kb/b": '<title>B</title><a href="/kb">Back</a> <a href="http://example.com/kb/x">External</a>',
+    "/kb/a/deep": '<title>Deep</title><a href="/kb/a/deeper">Deeper</a>',
+    "/kb/a/deeper": '<title>Deeper</title>',
+    "/other": '<title>Other</title>',
+}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves SITE with ETags, tracking requests in flight and full responses"""
+
+    latency = 0.0
+    active = 0
+    peak = 0
+    full_responses = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(cls.latency)
+        with cls.lock:
+            cls.active -= 1
+
+        body = SITE.get(self.path)
+        etag = '"' + hashlib.md5((body or "").encode()).hexdigest() + '"'
+        if body and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        with cls.lock:
+            cls.full_responses += 1
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write((body or "not found").encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConcurrentCrawler(unittest.TestCase):
+    """Test cases for async_crawl"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        SiteHandler.latency = 0.0
+        SiteHandler.peak = 0
+        SiteHandler.full_responses = 0
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def crawl(self, **kwargs):
+        return asyncio.run(AdvancedScrap.async_crawl(self.base + "/kb", recursive=True, **kwargs))
+
+    def test_scope_and_depth(self):
+        """Only in-scope pages up to max_depth are fetched, 404s are reported"""
+        results, stats = self.crawl(max_depth=2, workers=4)
+        urls = {result["url"].replace(self.base, "") for result in results}
+        self.assertEqual(urls, {"/kb", "/kb/a", "/kb/b", "/kb/a/deep"})
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["pages"], 4)
+        self.assertGreater(stats["pages_per_sec"], 0)
+
+    def test_matches_sequential_crawl(self):
+        """The concurrent crawler finds the same pages as simple_scrape"""
+        AdvancedScrap.visited_urls.clear()
+        AdvancedScrap.failed_urls.clear()
+        sequential = AdvancedScrap.simple_scrape(self.base + "/kb", recursive=True, max_depth=3)
+        results, _ = self.crawl(max_depth=3, workers=4)
+        self.assertEqual(sorted(r["url"] for r in results), sorted(r["url"] for r in sequential))
+
+    def test_per_host_limit_and_speedup(self):
+        """Requests overlap up to the per-host limit and never beyond it"""
+        SiteHandler.latency = 0.2
+        results, stats = self.crawl(max_depth=3, workers=8, per_host=2)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(SiteHandler.peak, 2)
+        # Sequential fetching of the 6 URLs would take at least 1.2s
+        self.assertLess(stats["seconds"], 1.1)
+
+    def test_politeness_delay(self):
+        """Request starts to one host are spaced by the delay"""
+        _, stats = self.crawl(max_depth=1, workers=8, per_host=8, delay=0.1)
+        self.assertGreaterEqual(stats["seconds"], 0.2)
+
+    def test_max_pages(self):
+        """The frontier stops growing at max_pages"""
+        results, _ = self.crawl(max_depth=3, workers=2, max_pages=2)
+        self.assertEqual(len(results), 2)
+
+    def test_conditional_recrawl_skips_unchanged_pages(self):
+        """A second crawl gets 304s and leaves the saved pages untouched"""
+        output_dir = os.path.join(self.tmp.name, "output")
+        store = AdvancedScrap.open_store(output_dir)
+        self.crawl(max_depth=3, workers=4, output_dir=output_dir, store=store)
+        saved = os.path.join(output_dir, "kb_a.txt")
+        mtime = os.stat(saved).st_mtime_ns
+
+        SiteHandler.full_responses = 0
+        results, stats = self.crawl(max_depth=3, workers=4, output_dir=output_dir, store=store)
+        self.assertEqual(stats["pages"], 5)
+        self.assertEqual(stats["unchanged"], 5)
+        self.assertEqual(SiteHandler.full_responses, 1)  # only the 404
+        self.assertEqual(os.stat(saved).st_mtime_ns, mtime)
+        self.assertIn("Deeper", [r["title"] for r in results])
+
+    def test_other_extractor_extracts_again(self):
+        """Pages recorded with another extractor are fetched and extracted again, then skipped"""
+        from extractors import get_extractor
+
+        store = CrawlStore(os.path.join(self.tmp.name, "state.sqlite3"))
+        self.crawl(max_depth=3, workers=4, store=store)
+        SiteHandler.full_responses = 0
+        results, stats = self.crawl(max_depth=3, workers=4, store=store, extractor=get_extractor("main"))
+        self.assertEqual(stats["unchanged"], 0)
+        self.assertEqual(SiteHandler.full_responses, 6)
+        kb = [r for r in results if r["url"] == self.base + "/kb"][0]
+        # bs4 keeps the <title> text in the content, the lxml extractors don't
+        self.assertFalse(kb["content"].startswith("KB"), kb["content"])
+
+        results, stats = self.crawl(max_depth=3, workers=4, store=store, extractor=get_extractor("main"))
+        self.assertEqual(stats["unchanged"], 5)
+        self.assertEqual(stats["unchanged"], 5)
+
+    def test_template_filter_sees_unchanged_pages(self):
+        """With -strip-templates a re-crawl of partly unchanged pages matches a fresh crawl"""
+        from extractors import get_extractor
+
+        footer = "<p>Shared footer text that repeats on every page of the site.</p>"
+        original = dict(SITE)
+        try:
+            for path in SITE:
+                SITE[path] += footer
+            store = CrawlStore(os.path.join(self.tmp.name, "state.sqlite3"))
+            self.crawl(max_depth=3, workers=1, store=store, extractor=get_extractor("lxml", strip_templates=True))
+            SITE["/kb/a/deeper"] = "<title>Deeper</title><p>Rewritten page.</p>" + footer
+
+            recrawl, stats = self.crawl(max_depth=3, workers=1, store=store,
+                                        extractor=get_extractor("lxml", strip_templates=True))
+            fresh, _ = self.crawl(max_depth=3, workers=1, extractor=get_extractor("lxml", strip_templates=True))
+            self.assertEqual(stats["unchanged"], 4)
+            self.assertEqual(recrawl, fresh)
+            deeper = [r for r in recrawl if r["url"].endswith("/deeper")][0]
+            self.assertNotIn("Shared footer", deeper["content"])
+        finally:
+            SITE.clear()
+            SITE.update(original)
+
+    def test_interrupted_crawl_resumes(self):
+        """Pages finished before an interruption are not fetched again"""
+        store = CrawlStore(os.path.join(self.tmp.name, "state.sqlite3"))
+        SiteHandler.latency = 0.2
+
+        async def interrupted():
+            task = asyncio.create_task(AdvancedScrap.async_crawl(
+                self.base + "/kb", recursive=True, max_depth=3, workers=1, store=store))
+            while not store.is_done(self.base + "/kb"):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(interrupted())
+        SiteHandler.latency = 0.0
+        SiteHandler.full_responses = 0
+        results, _ = self.crawl(max_depth=3, workers=4, store=store)
+        self.assertNotIn(self.base + "/kb", [r["url"] for r in results])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(SiteHandler.full_responses, 5)
+        self.assertEqual(store.seen(), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for dedup.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the dedup module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from dedup import ChunkDeduplicator
+
+BASE = ("Asterisk is an open source framework for building communications applications. "
+        "It turns an ordinary computer into a communications server that powers IP PBX systems, "
+        "VoIP gateways, conference servers and other custom solutions used by small businesses, "
+        "large businesses, call centers, carriers and government agencies worldwide.")
+OTHER = ("STUN lets a client behind a NAT discover its public address and port so that the "
+         "session description it sends advertises an address the other side can reach.")
+
+
+def chunks(*texts):
+    return [(str(i), Document(page_content=text)) for i, text in enumerate(texts)]
+
+
+class TestChunkDeduplicator(unittest.TestCase):
+    """Test cases for the dedup stage"""
+
+    def test_exact_duplicates_after_normalization(self):
+        """Case and whitespace differences are exact duplicates"""
+        dedup = ChunkDeduplicator(threshold=None)
+        kept = list(dedup.filter(chunks(BASE, "  " + BASE.upper(), OTHER)))
+        self.assertEqual([i for i, _ in kept], ["0", "2"])
+        self.assertEqual(dedup.stats["exact_duplicates"], 1)
+
+    def test_near_duplicates(self):
+        """A copy with one changed word is removed by both methods, different text is kept"""
+        near = BASE.replace("worldwide", "around the world")
+        for method in ("minhash", "simhash"):
+            dedup = ChunkDeduplicator(threshold=0.8, method=method)
+            kept = list(dedup.filter(chunks(BASE, near, OTHER)))
+            self.assertEqual([i for i, _ in kept], ["0", "2"], method)
+            self.assertEqual(dedup.stats["near_duplicates"], 1, method)
+            self.assertEqual(dedup.removed, 1)
+
+    def test_threshold_is_configurable(self):
+        """A strict threshold keeps a moderately edited copy"""
+        edited = BASE.replace("small businesses, large businesses", "startups, enterprises")
+        self.assertEqual(len(list(ChunkDeduplicator(threshold=0.6).filter(chunks(BASE, edited)))), 1)
+        self.assertEqual(len(list(ChunkDeduplicator(threshold=0.99).filter(chunks(BASE, edited)))), 2)
+
+    def test_create_vector_store_skips_duplicates(self):
+        """Duplicate chunks across sources are not embedded or recorded in the manifest"""
+        documents = [Document(page_content=BASE, metadata={"source": "a.txt"}),
+                     Document(page_content=BASE, metadata={"source": "b.txt"}),
+                     Document(page_content=OTHER, metadata={"source": "c.txt"})]
+        with tempfile.TemporaryDirectory() as path:
+            dedup = ChunkDeduplicator()
+            stats = chroma_vectorize_data.create_vector_store(
+                documents, path, embeddings=DeterministicFakeEmbedding(size=16), backend="local", dedup=dedup)
+            self.assertEqual(stats["chunks"], 2)
+            self.assertEqual(dedup.removed, 1)
+            manifest = chroma_vectorize_data.load_manifest(path)
+            self.assertEqual(manifest["sources"][os.path.abspath("b.txt")]["chunks"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for document loading in file_loaders.py and chroma_vectorize_data.py
+"""
+
+import unittest
+import sys
+import os
+import json
+import types
+import shutil
+import tempfile
+
+# Add parent directory to path to import the vectorize module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from langchain_core.documents import Document
+from chroma_vectorize_data import iter_documents, iter_source_groups
+from file_loaders import find_files
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PDF = os.path.join(ROOT, "Bricklaying_and_Plastering_N1_sample_chapter.pdf")
+
+
+class TestDocumentLoading(unittest.TestCase):
+    """Test cases for iter_documents and iter_source_groups"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_json_directory_is_streamed(self):
+        """JSON files are yielded lazily, pretty-printed like the original loader"""
+        raw = json.dumps({"url": "https://example.com", "content": "hello"})
+        self.write("a.json", raw)
+        self.write("b.json", "[1, 2, 3]")
+        documents = iter_documents(self.dir)
+        self.assertIsInstance(documents, types.GeneratorType)
+
+        documents = list(documents)
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(documents[0].page_content, json.dumps(json.loads(raw), indent=2))
+        self.assertTrue(documents[0].metadata["source"].endswith("a.json"))
+
+    def test_invalid_json_is_skipped(self):
+        """A broken JSON file is reported and skipped"""
+        path = self.write("broken.json", "{not json")
+        self.assertEqual(chroma_vectorize_data.load_documents(path), [])
+
+    def test_mixed_formats_are_found_recursively(self):
+        """Supported files in nested directories are found in sorted order"""
+        self.write("b.txt", "text")
+        self.write("a.json", "{}")
+        self.write("nested/page.html", "<html><title>T</title><body><p>Hi</p></body></html>")
+        self.write("nested/notes.md", "# Notes")
+        self.write("nested/image.png", "not a document")
+        shutil.copy(SAMPLE_PDF, os.path.join(self.dir, "nested", "sample.pdf"))
+
+        names = [os.path.relpath(f, self.dir) for f in find_files(self.dir)]
+        self.assertEqual(names, ["a.json", "b.txt", os.path.join("nested", "notes.md"),
+                                 os.path.join("nested", "page.html"), os.path.join("nested", "sample.pdf")])
+
+        documents = list(iter_documents(self.dir, workers=1, verbose=False))
+        html = [d for d in documents if d.metadata["source"].endswith("page.html")][0]
+        self.assertEqual(html.page_content, "T Hi")
+        self.assertEqual(html.metadata["title"], "T")
+        self.assertTrue(any(d.metadata["source"].endswith("sample.pdf") for d in documents))
+
+    def test_process_pool_keeps_order(self):
+        """Parsing on a process pool yields the same documents in the same order"""
+        for i in range(6):
+            self.write(f"doc{i}.txt", f"document {i}")
+        shutil.copy(SAMPLE_PDF, os.path.join(self.dir, "sample.pdf"))
+
+        serial = list(iter_documents(self.dir, workers=1, verbose=False))
+        parallel = list(iter_documents(self.dir, workers=2, verbose=False))
+        self.assertEqual([d.page_content for d in serial], [d.page_content for d in parallel])
+        self.assertEqual([d.metadata["source"] for d in serial], [d.metadata["source"] for d in parallel])
+
+    def test_source_groups(self):
+        """Consecutive documents of one source form one group"""
+        documents = [
+            Document(page_content="page 1", metadata={"source": "a.pdf"}),
+            Document(page_content="page 2", metadata={"source": "a.pdf"}),
+            Document(page_content="text", metadata={"source": "b.txt"}),
+        ]
+        groups = list(iter_source_groups(iter(documents)))
+        self.assertEqual([source for source, _ in groups], ["a.pdf", "b.txt"])
+        self.assertEqual(len(groups[0][1]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
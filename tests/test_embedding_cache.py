@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for embedding_cache.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the cache module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_cache import CachedEmbeddings
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embedding that counts how many texts were embedded"""
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test cases for CachedEmbeddings"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hits_are_served_from_disk(self):
+        """A second cache instance reads vectors written by the first"""
+        first = CachedEmbeddings(CountingEmbedding(size=4), model="fake", path=self.path)
+        vectors = first.embed_documents(["alpha", "beta", "alpha"])
+        self.assertEqual(first.embeddings.embedded, 2)
+        first.close()
+
+        inner = CountingEmbedding(size=4)
+        second = CachedEmbeddings(inner, model="fake", path=self.path)
+        cached = second.embed_documents(["beta", "alpha"])
+        self.assertEqual(inner.embedded, 0)
+        for got, expected in zip(cached, [vectors[1], vectors[0]]):
+            for a, b in zip(got, expected):
+                self.assertAlmostEqual(a, b, places=5)
+        self.assertEqual(second.stats()["hits"], 2)
+        self.assertEqual(second.stats()["misses"], 0)
+
+    def test_key_uses_model_and_normalized_text(self):
+        """Whitespace differences share an entry but models do not"""
+        inner = CountingEmbedding(size=4)
+        cache = CachedEmbeddings(inner, model="fake", path=self.path)
+        cache.embed_documents(["hello  world"])
+        cache.embed_documents(["hello world\n"])
+        self.assertEqual(inner.embedded, 1)
+
+        other = CachedEmbeddings(inner, model="other", path=self.path)
+        other.embed_documents(["hello world"])
+        self.assertEqual(inner.embedded, 2)
+
+    def test_counters_under_concurrent_calls(self):
+        """Hits and misses from concurrent workers add up to every text looked up"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        cache = CachedEmbeddings(CountingEmbedding(size=4), model="fake", path=self.path)
+        batches = [[f"text {i % 10}", f"text {i % 7}"] for i in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(cache.embed_documents, batches))
+            list(pool.map(cache.embed_query, [f"text {i % 10}" for i in range(200)]))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"] + stats["misses"], 600)
+
+    def test_size_based_eviction(self):
+        """The cache evicts least recently used vectors past max_bytes"""
+        # 4 float32 values per vector = 16 bytes, room for 3 vectors
+        cache = CachedEmbeddings(CountingEmbedding(size=4), model="fake",
+                                 path=self.path, max_bytes=48)
+        cache.embed_documents([f"text {i}" for i in range(10)])
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 48)
+        self.assertGreater(stats["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
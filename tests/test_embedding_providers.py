@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for embedding_providers.py and onnx_embeddings.py
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the provider modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from embedding_providers import (EMBEDDING_FILENAME, EmbeddingMismatchError, describe_embeddings,
+                                 embeddings_for_store, make_embeddings)
+from embedding_cache import CachedEmbeddings
+from hashing_embeddings import HashingEmbeddings
+from onnx_embeddings import DEFAULT_ONNX_MODEL, OnnxEmbeddings, mean_pool, onnx_model_id, onnx_model_path
+
+
+class TestEmbeddingProviders(unittest.TestCase):
+    """Test cases for provider selection and the embeddings recorded with a store"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = os.path.join(self.tmp.name, "store")
+        self.documents = [Document(page_content=f"Feature code *{60 + i} does thing {i}.",
+                                   metadata={"source": f"doc{i}.txt"}) for i in range(5)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_make_embeddings(self):
+        """Providers are created by name, unknown names are rejected"""
+        embeddings = make_embeddings("hashing", dimension=32)
+        self.assertIsInstance(embeddings, HashingEmbeddings)
+        self.assertEqual(len(embeddings.embed_query("dial *69")), 32)
+        with self.assertRaises(ValueError):
+            make_embeddings("word2vec")
+
+    def test_describe_unwraps_cache(self):
+        """The cached embedding function is described by the one it wraps"""
+        cached = CachedEmbeddings(HashingEmbeddings(size=16), path=os.path.join(self.tmp.name, "cache.sqlite3"))
+        self.assertEqual(describe_embeddings(cached),
+                         {"provider": "hashing", "model": "hashing-16-2gram", "dimension": 16})
+        cached.close()
+
+    def test_store_records_embeddings(self):
+        """Ingest records the provider and dimension, loading without embeddings uses them"""
+        chroma_vectorize_data.create_vector_store(self.documents, self.store, embeddings=HashingEmbeddings(size=48),
+                                                  backend="local", lexical=False)
+        with open(os.path.join(self.store, EMBEDDING_FILENAME)) as f:
+            self.assertEqual(json.load(f), {"provider": "hashing", "model": "hashing-48-2gram", "dimension": 48})
+
+        self.assertEqual(embeddings_for_store(self.store).dimension, 48)
+        store = chroma_vectorize_data.loadVectorstore(self.store)
+        top = store.similarity_search("Feature code *62 does thing 2.", k=1)[0]
+        self.assertEqual(top.metadata["source"], "doc2.txt")
+
+    def test_mismatched_embeddings_are_rejected(self):
+        """Querying or updating a store with other embeddings raises instead of returning noise"""
+        chroma_vectorize_data.create_vector_store(self.documents, self.store, embeddings=HashingEmbeddings(size=48),
+                                                  backend="local", lexical=False)
+        with self.assertRaises(EmbeddingMismatchError):
+            chroma_vectorize_data.loadVectorstore(self.store, HashingEmbeddings(size=64))
+        with self.assertRaises(EmbeddingMismatchError):
+            chroma_vectorize_data.update_vector_store(self.documents, self.tmp.name, self.store,
+                                                      embeddings=HashingEmbeddings(size=64), backend="local")
+        # The same provider passes the check
+        chroma_vectorize_data.loadVectorstore(self.store, HashingEmbeddings(size=48))
+
+    def test_update_uses_recorded_embeddings(self):
+        """An incremental update without embeddings embeds with the recorded provider"""
+        chroma_vectorize_data.create_vector_store(self.documents[:3], self.store,
+                                                  embeddings=HashingEmbeddings(size=48), backend="local",
+                                                  lexical=False)
+        stats = chroma_vectorize_data.update_vector_store(self.documents, self.tmp.name, self.store, backend="local",
+                                                          lexical=False)
+        self.assertEqual(stats["added"], 2)
+
+
+class TestOnnxEmbeddings(unittest.TestCase):
+    """Test cases for the in-process ONNX model"""
+
+    def test_mean_pool_ignores_padding(self):
+        """Padded positions don't change the pooled vector"""
+        hidden = np.array([[[1.0, 0.0], [0.0, 1.0], [9.0, 9.0]]], dtype=np.float32)
+        pooled = mean_pool(hidden, np.array([[1, 1, 0]]))
+        np.testing.assert_allclose(pooled, [[np.sqrt(0.5), np.sqrt(0.5)]], rtol=1e-6)
+
+    def test_model_directory_is_recorded_as_absolute_path(self):
+        """A model given as a directory is recorded so embeddings_for_store can load it again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                os.makedirs("models/custom")
+                self.assertEqual(onnx_model_id("models/custom/"), os.path.abspath("models/custom"))
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(onnx_model_id(DEFAULT_ONNX_MODEL), DEFAULT_ONNX_MODEL)
+
+    def test_missing_model(self):
+        """A missing model raises with the path it was looked up at"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(FileNotFoundError):
+                OnnxEmbeddings(tmp)
+
+    @unittest.skipUnless(os.path.exists(os.path.join(onnx_model_path(DEFAULT_ONNX_MODEL), "model.onnx")),
+                         "ONNX model not downloaded")
+    def test_batched_matches_single(self):
+        """Sorting and batching return the same vectors, in input order"""
+        embeddings = OnnxEmbeddings(batch_size=2, threads=2)
+        texts = ["short", "a much longer sentence about SIP trunks", "what is STUN?"]
+        batched = np.array(embeddings.embed_documents(texts))
+        single = np.array([embeddings.embed_query(text) for text in texts])
+        np.testing.assert_allclose(batched, single, atol=1e-5)
+        self.assertEqual(batched.shape[1], embeddings.dimension)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for WebScrapper/extractors.py
+"""
+
+import unittest
+import sys
+import os
+
+# Add the scraper directory and the repo root to path to import the extractors and the benchmark
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "WebScrapper"))
+sys.path.append(ROOT)
+from extractors import get_extractor, bs4_extract
+from benchmarks import extract_benchmark
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "html", "kb_article_what-is-stun.html")
+
+
+class TestExtractors(unittest.TestCase):
+    """Test cases for the extractor layer"""
+
+    def setUp(self):
+        with open(FIXTURE, 'r') as f:
+            self.html = f.read()
+        self.url = "https://acme.example/kb/article/what-is-stun/"
+
+    def test_bs4_keeps_original_output(self):
+        """The default extractor returns the whole page text on one line"""
+        result, links = bs4_extract(self.url, self.html)
+        self.assertIn("We use cookies", result["content"])
+        self.assertNotIn("\n", result["content"])
+        self.assertIn("https://acme.example/pricing", links)
+
+    def test_main_content_drops_site_chrome(self):
+        """Navigation, cookie banner, sidebar, footer and scripts are removed, the article stays"""
+        result, links = get_extractor("main")(self.url, self.html)
+        content = result["content"]
+        self.assertTrue(content.startswith("What is STUN?"))
+        self.assertIn("XOR-MAPPED-ADDRESS", content)
+        for chrome in ("We use cookies", "Log in", "Popular articles", "All rights reserved", "dataLayer"):
+            self.assertNotIn(chrome, content)
+        # Links are still collected from the whole page for crawling
+        self.assertIn("https://acme.example/kb/article/feature-codes/", links)
+
+    def test_template_blocks_removed_after_min_pages(self):
+        """A block repeated on min_pages pages of a host is dropped from then on"""
+        extractor = get_extractor("lxml", strip_templates=True)
+        page = "<html><body><div>Repeated promo block about our product</div><p>Unique text {}</p></body></html>"
+        outputs = [extractor(f"https://acme.example/{i}", page.format(i))[0]["content"] for i in range(4)]
+        self.assertIn("Repeated promo block", outputs[1])
+        self.assertNotIn("Repeated promo block", outputs[2])
+        self.assertEqual(outputs[3], "Unique text 3")
+        # Another site has its own template statistics
+        other = extractor("https://other.example/0", page.format(0))[0]["content"]
+        self.assertIn("Repeated promo block", other)
+
+    def test_unknown_extractor(self):
+        with self.assertRaises(ValueError):
+            get_extractor("regex")
+
+    def test_benchmark_reports_removed_characters(self):
+        """The benchmark runs on the fixtures and the lxml extractors remove text"""
+        results = extract_benchmark.run(extract_benchmark.load_fixtures(extract_benchmark.DEFAULT_FIXTURES), runs=1)
+        by_name = {result["extractor"]: result for result in results}
+        self.assertEqual(by_name["bs4"]["chars_removed"], 0)
+        self.assertGreater(by_name["main"]["chars_removed"], 0)
+        self.assertGreater(by_name["lxml+templates"]["chars_removed"], by_name["lxml"]["chars_removed"])
+
+
+if __name__ == '__main__':
+    unittest.main()
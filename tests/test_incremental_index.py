@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental re-indexing in chroma_vectorize_data.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from typing import Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import Chroma
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Add parent directory to path to import the vectorize module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from text_splitter import make_splitter
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embedding that counts how many texts were embedded, and stops the run after `limit`"""
+    embedded: int = 0
+    limit: Optional[int] = None
+
+    def embed_documents(self, texts):
+        if self.limit is not None and self.embedded + len(texts) > self.limit:
+            raise KeyboardInterrupt
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+class TestIncrementalIndex(unittest.TestCase):
+    """Test cases for update_vector_store"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp.name, "input")
+        self.output_dir = os.path.join(self.tmp.name, "store")
+        os.makedirs(self.input_dir)
+        for name in ["a", "b", "c"]:
+            self.write(name, f"Document {name}. " * 150)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.input_dir, f"{name}.txt"), "w") as f:
+            f.write(text)
+
+    def documents(self):
+        documents = []
+        for name in sorted(os.listdir(self.input_dir)):
+            path = os.path.join(self.input_dir, name)
+            with open(path) as f:
+                documents.append(Document(
+                    page_content=f.read(), metadata={"source": path}))
+        return documents
+
+    def update(self, **kwargs):
+        embeddings = CountingEmbedding(size=8)
+        documents = self.documents()
+        stats = chroma_vectorize_data.update_vector_store(
+            documents, self.input_dir, self.output_dir, embeddings=embeddings, **kwargs)
+        return stats, embeddings.embedded
+
+    def stored_count(self):
+        store = Chroma(
+            persist_directory=self.output_dir,
+            embedding_function=DeterministicFakeEmbedding(size=8))
+        return store._collection.count()
+
+    def test_unchanged_corpus_embeds_nothing(self):
+        """Second run over the same files does not embed anything"""
+        stats, embedded = self.update()
+        self.assertGreater(embedded, 0)
+        self.assertEqual(stats["sources_changed"], 3)
+
+        stats, embedded = self.update()
+        self.assertEqual(embedded, 0)
+        self.assertEqual(stats["added"], 0)
+        self.assertEqual(stats["deleted"], 0)
+
+    def test_changed_and_removed_sources(self):
+        """Only the changed file is embedded and removed files are deleted"""
+        self.update()
+        total = self.stored_count()
+
+        self.write("a", "Document a. " * 150 + "A new closing paragraph.")
+        os.remove(os.path.join(self.input_dir, "c.txt"))
+        stats, embedded = self.update()
+
+        self.assertEqual(stats["sources_changed"], 1)
+        self.assertEqual(stats["sources_removed"], 1)
+        self.assertEqual(embedded, stats["added"])
+        self.assertLess(stats["added"], total)
+
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertEqual(len(manifest["sources"]), 2)
+        expected = sum(len(s["chunks"]) for s in manifest["sources"].values())
+        self.assertEqual(self.stored_count(), expected)
+
+    def test_interrupted_update_resumes(self):
+        """Sources written before an interruption are checkpointed and not embedded again"""
+        documents = self.documents()
+        per_source = len(chroma_vectorize_data.chunk_ids(
+            make_splitter().split_documents(documents[:1])))
+        self.assertGreater(per_source, 1)
+        with self.assertRaises(KeyboardInterrupt):
+            chroma_vectorize_data.update_vector_store(
+                documents, self.input_dir, self.output_dir, embeddings=CountingEmbedding(size=8, limit=per_source + 1),
+                batch_size=1, workers=1, checkpoint_seconds=0)
+        done = chroma_vectorize_data.load_manifest(self.output_dir)["sources"]
+        self.assertEqual(list(done), [documents[0].metadata["source"]])
+
+        stats, embedded = self.update()
+        self.assertEqual(stats["sources_changed"], 2)
+        self.assertEqual(stats["unchanged"], per_source)
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertEqual(self.stored_count(), sum(len(s["chunks"]) for s in manifest["sources"].values()))
+
+    def test_duplicate_is_restored_when_its_kept_copy_is_removed(self):
+        """A chunk dropped as a duplicate is embedded again once the source holding the kept copy is gone"""
+        from dedup import ChunkDeduplicator
+
+        os.remove(os.path.join(self.input_dir, "c.txt"))
+        self.write("b", "Document a. " * 150)
+        self.update(dedup=ChunkDeduplicator(threshold=None))
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        b = os.path.join(self.input_dir, "b.txt")
+        self.assertEqual(manifest["sources"][b]["chunks"], [])
+        kept = len(manifest["sources"][os.path.join(self.input_dir, "a.txt")]["chunks"])
+
+        os.remove(os.path.join(self.input_dir, "a.txt"))
+        stats, embedded = self.update(dedup=ChunkDeduplicator(threshold=None))
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertEqual(stats["restored"], kept)
+        self.assertEqual(embedded, kept)
+        self.assertEqual(len(manifest["sources"][b]["chunks"]), kept)
+        for duplicate in manifest["sources"][b].get("duplicates", {}).values():
+            self.assertIn(duplicate["kept"], manifest["sources"][b]["chunks"])
+        self.assertEqual(self.stored_count(), kept)
+
+    def test_dedup_compares_changed_sources_with_the_store(self):
+        """A changed source duplicating a stored, unchanged one is not embedded twice"""
+        from dedup import ChunkDeduplicator
+
+        self.update(dedup=ChunkDeduplicator(threshold=None))
+        total = self.stored_count()
+        self.write("c", "Document a. " * 150)
+        stats, embedded = self.update(dedup=ChunkDeduplicator(threshold=None))
+        self.assertEqual(embedded, 0)
+        self.assertLess(self.stored_count(), total)
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertTrue(manifest["sources"][os.path.join(self.input_dir, "c.txt")]["duplicates"])
+
+    def test_tokenizer_is_recorded_and_checked(self):
+        """An update counting tokens differently from the store is refused instead of mixing chunks"""
+        self.update(splitter=make_splitter(tokenizer="regex"))
+        self.assertEqual(chroma_vectorize_data.load_manifest(self.output_dir)["tokenizer"], "regex")
+        self.assertEqual(chroma_vectorize_data.recorded_tokenizer(self.output_dir), "regex")
+        self.write("a", "Document a changed. " * 150)
+        tiktoken = make_splitter()
+        tiktoken.tokenizer = "tiktoken"
+        with self.assertRaises(ValueError):
+            self.update(splitter=tiktoken)
+
+    def test_splitter_settings_are_recorded_and_checked(self):
+        """An update cutting chunks with other parameters is refused, the default splitter uses the store's"""
+        self.update(splitter=make_splitter(chunk_tokens=64, overlap_tokens=8, tokenizer="regex"))
+        self.assertEqual(chroma_vectorize_data.load_manifest(self.output_dir)["splitter"],
+                         {"kind": "tokens", "chunk_tokens": 64, "overlap_tokens": 8})
+        self.write("a", "Document a changed. " * 150)
+        for other in (make_splitter(chunk_tokens=128, overlap_tokens=8, tokenizer="regex"),
+                      make_splitter(chunk_tokens=64, overlap_tokens=16, tokenizer="regex"),
+                      make_splitter("characters")):
+            with self.assertRaises(ValueError):
+                self.update(splitter=other)
+        stats, _ = self.update()
+        self.assertEqual(stats["sources_changed"], 1)
+
+    def test_source_paths_are_normalized(self):
+        """The same files under a relative, trailing-slash or absolute input path are unchanged"""
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            documents = chroma_vectorize_data.iter_documents("./input/", workers=1, verbose=False)
+            chroma_vectorize_data.update_vector_store(documents, "./input/", self.output_dir,
+                                                      embeddings=CountingEmbedding(size=8))
+            for input_path in ("input", self.input_dir):
+                embeddings = CountingEmbedding(size=8)
+                documents = chroma_vectorize_data.iter_documents(input_path, workers=1, verbose=False)
+                stats = chroma_vectorize_data.update_vector_store(documents, input_path, self.output_dir,
+                                                                  embeddings=embeddings)
+                self.assertEqual((embeddings.embedded, stats["deleted"], stats["sources_removed"]), (0, 0, 0))
+        finally:
+            os.chdir(cwd)
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertEqual(sorted(manifest["sources"]),
+                         [os.path.join(self.input_dir, f"{name}.txt") for name in ["a", "b", "c"]])
+
+    def test_manifest_with_relative_sources_is_kept(self):
+        """A manifest written before sources were normalized doesn't re-embed unchanged files"""
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            self.update()
+            manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+            manifest["sources"] = {os.path.relpath(source): entry for source, entry in manifest["sources"].items()}
+            chroma_vectorize_data.save_manifest(self.output_dir, manifest)
+            stats, embedded = self.update()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual((embedded, stats["deleted"]), (0, 0))
+
+    def test_removed_sources_are_scoped_to_the_input(self):
+        """Only files under the input path, or pages under the start URL, are removed when missing"""
+        scope = chroma_vectorize_data.source_in_scope
+        self.assertTrue(scope(os.path.join(self.input_dir, "a.txt"), self.input_dir + "/"))
+        self.assertFalse(scope(self.input_dir + "2/a.txt", self.input_dir))
+        self.assertFalse(scope("https://example.com/docs/a", self.input_dir))
+        self.assertFalse(scope(os.path.join(self.input_dir, "a.txt"), "https://example.com/docs"))
+        self.assertTrue(scope("https://example.com/docs/a?page=2", "https://example.com/docs/"))
+        self.assertTrue(scope("https://example.com/docs", "https://example.com/docs/"))
+        self.assertTrue(scope("https://example.com/about", "https://example.com"))
+        self.assertFalse(scope("https://example.com/blog/a", "https://example.com/docs"))
+        self.assertFalse(scope("https://example.org/docs/a", "https://example.com/docs"))
+
+        page = Document(page_content="A page about the docs. " * 50, metadata={"source": "https://example.com/docs/a"})
+        chroma_vectorize_data.update_vector_store([page], "https://example.com/docs", self.output_dir,
+                                                  embeddings=CountingEmbedding(size=8))
+        stats, _ = self.update()
+        self.assertEqual(stats["sources_removed"], 0)
+        stats = chroma_vectorize_data.update_vector_store([], "https://example.com/docs", self.output_dir,
+                                                          embeddings=CountingEmbedding(size=8))
+        self.assertEqual(stats["sources_removed"], 1)
+        self.assertEqual(len(chroma_vectorize_data.load_manifest(self.output_dir)["sources"]), 3)
+
+    def test_split_workers(self):
+        """Changed sources split in worker processes give the same chunks"""
+        stats, _ = self.update(split_workers=2)
+        manifest = chroma_vectorize_data.load_manifest(self.output_dir)
+        self.assertEqual(stats["sources_changed"], 3)
+        self.assertEqual(self.stored_count(), sum(len(s["chunks"]) for s in manifest["sources"].values()))
+        stats, embedded = self.update(split_workers=2)
+        self.assertEqual(embedded, 0)
+
+    def test_update_keeps_ann_index(self):
+        """An incremental update of a local store with an IVF index rebuilds the index"""
+        from local_vectorstore import IVF_FILENAME
+
+        for i in range(30):
+            self.write(f"doc{i}", f"Document number {i} about topic {i % 5}.")
+        chroma_vectorize_data.create_vector_store(self.documents(), self.output_dir,
+                                                  embeddings=CountingEmbedding(size=8), backend="local", ann=True)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, IVF_FILENAME)))
+
+        self.write("doc3", "Document number 3 was rewritten.")
+        stats, _ = self.update(backend="local")
+        self.assertEqual(stats["sources_changed"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, IVF_FILENAME)))
+        store = chroma_vectorize_data.loadVectorstore(self.output_dir, CountingEmbedding(size=8))
+        self.assertIsNotNone(store.index)
+
+        self.update(backend="local", ann=False)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, IVF_FILENAME)))
+
+    def test_chunk_ids_are_stable(self):
+        """Chunk IDs only depend on source and content"""
+        documents = self.documents()
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000, chunk_overlap=200)
+        splits = splitter.split_documents(documents)
+        ids = chroma_vectorize_data.chunk_ids(splits)
+        self.assertEqual(ids, chroma_vectorize_data.chunk_ids(splits))
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ingest_pipeline.py against a local fake embedding server
+"""
+
+import unittest
+import unittest.mock
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_community.vectorstores import Chroma
+from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the pipeline module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from ingest_pipeline import TokenBucket, run_pipeline, batched
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """OpenAI compatible /v1/embeddings endpoint returning deterministic vectors"""
+
+    def __init__(self, fail_first=0):
+        super().__init__(("127.0.0.1", 0), FakeEmbeddingHandler)
+        self.fail_first = fail_first
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.requests <= self.server.fail_first
+        if fail:
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": {"message": "rate limited"}}).encode())
+            return
+
+        data = [
+            {"object": "embedding", "index": i,
+             "embedding": [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]}
+            for i, text in enumerate(body["input"])
+        ]
+        payload = json.dumps({"object": "list", "data": data, "model": body["model"],
+                              "usage": {"prompt_tokens": 0, "total_tokens": 0}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestIngestPipeline(unittest.TestCase):
+    """Test cases for run_pipeline"""
+
+    def start_server(self, fail_first=0):
+        server = FakeEmbeddingServer(fail_first=fail_first)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        embeddings = OpenAIEmbeddings(
+            model="text-embedding-ada-002", openai_api_base=server.url, openai_api_key="test",
+            check_embedding_ctx_length=False, max_retries=0)
+        return server, embeddings
+
+    def test_batches_are_written_in_order(self):
+        """Every chunk is embedded and written once, in input order"""
+        server, embeddings = self.start_server()
+        chunks = [(str(i), Document(page_content=f"chunk {i}")) for i in range(50)]
+        written = []
+        stats = run_pipeline(chunks, embeddings, lambda ids, docs, vectors: written.extend(ids),
+                             batch_size=8, workers=3)
+        self.assertEqual(written, [str(i) for i in range(50)])
+        self.assertEqual(stats["chunks"], 50)
+        self.assertEqual(stats["batches"], 7)
+        self.assertEqual(server.requests, 7)
+
+    def test_rate_limited_batches_are_retried(self):
+        """429 responses from the server are retried with backoff"""
+        server, embeddings = self.start_server(fail_first=2)
+        chunks = [(str(i), Document(page_content=f"chunk {i}")) for i in range(4)]
+        written = []
+        with unittest.mock.patch("ingest_pipeline.time.sleep"):
+            run_pipeline(chunks, embeddings, lambda ids, docs, vectors: written.extend(vectors),
+                         batch_size=4, workers=1)
+        self.assertEqual(len(written), 4)
+        self.assertEqual(server.requests, 3)
+
+    def test_create_vector_store_with_fake_server(self):
+        """create_vector_store writes all chunks into Chroma"""
+        _, embeddings = self.start_server()
+        documents = [Document(page_content=f"Paragraph {i}. " * 200, metadata={"source": f"doc{i}.txt"})
+                     for i in range(3)]
+        with tempfile.TemporaryDirectory() as output:
+            stats = chroma_vectorize_data.create_vector_store(
+                documents, output, embeddings=embeddings, batch_size=4, workers=2)
+            store = Chroma(persist_directory=output, embedding_function=embeddings)
+            self.assertEqual(store._collection.count(), stats["chunks"])
+            self.assertGreater(stats["chunks_per_sec"], 0)
+
+    def test_token_bucket_limits_rate(self):
+        """Tokens beyond the burst capacity are handed out at the configured rate"""
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_batched(self):
+        """batched keeps the remainder as a final short batch"""
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
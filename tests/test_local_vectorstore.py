@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for local_vectorstore.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the store module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from local_vectorstore import LocalVectorStore
+
+
+class TestLocalVectorStore(unittest.TestCase):
+    """Test cases for LocalVectorStore"""
+
+    def setUp(self):
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.texts = [f"text number {i}" for i in range(20)]
+
+    def test_exact_search_finds_identical_text(self):
+        """A query equal to a stored text is the top result with distance 0"""
+        store = LocalVectorStore.from_texts(self.texts, self.embeddings)
+        results = store.similarity_search_with_score("text number 7", k=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0].page_content, "text number 7")
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+        self.assertLessEqual(results[0][1], results[1][1])
+
+    def test_ivf_recall_matches_exact(self):
+        """Approximate search with all lists probed returns the exact top-k"""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        store = LocalVectorStore(self.embeddings)
+        store.add_vectors(vectors, [str(i) for i in range(500)])
+        store.build_index(n_lists=10, nprobe=10)
+        for query in rng.normal(size=(5, 16)):
+            exact = store.similarity_search_by_vector(query, k=5, approximate=False)
+            approx = store.similarity_search_by_vector(query, k=5, approximate=True)
+            self.assertEqual([d.page_content for d in exact], [d.page_content for d in approx])
+
+    def test_upsert_and_delete(self):
+        """Adding an existing ID replaces it and deleted IDs are not returned"""
+        store = LocalVectorStore(self.embeddings)
+        store.add_texts(["alpha", "beta"], ids=["a", "b"])
+        store.add_texts(["gamma"], ids=["a"])
+        self.assertEqual(len(store), 2)
+        store.delete(["b"])
+        self.assertEqual([d.page_content for d in store.similarity_search("gamma", k=5)], ["gamma"])
+
+    def test_persist_and_load(self):
+        """A persisted store with an IVF index loads back with the same results"""
+        store = LocalVectorStore.from_texts(self.texts, self.embeddings,
+                                            metadatas=[{"n": i} for i in range(20)])
+        store.build_index(n_lists=4, nprobe=4)
+        with tempfile.TemporaryDirectory() as path:
+            store.persist(path)
+            loaded = LocalVectorStore.load(path, self.embeddings)
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            self.assertIsNotNone(loaded.index)
+            result = loaded.similarity_search("text number 3", k=1)[0]
+            self.assertEqual(result.metadata, {"n": 3})
+
+    def test_local_backend_in_vectorize_script(self):
+        """create_vector_store can build a local store that loadVectorstore detects"""
+        documents = [Document(page_content=f"Paragraph {i}. " * 150, metadata={"source": f"doc{i}.txt"})
+                     for i in range(3)]
+        with tempfile.TemporaryDirectory() as path:
+            stats = chroma_vectorize_data.create_vector_store(
+                documents, path, embeddings=self.embeddings, backend="local")
+            store = chroma_vectorize_data.loadVectorstore(path, self.embeddings)
+            self.assertIsInstance(store, LocalVectorStore)
+            self.assertEqual(len(store), stats["chunks"])
+            self.assertEqual(len(chroma_vectorize_data.similaritySearch(store, "Paragraph 1.")), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pinecone_upsert.py and the Pinecone ingest path against the in-memory stand-in
+"""
+
+import unittest
+import unittest.mock
+import sys
+import os
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the upsert module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pinecone_vectorize_data
+from pinecone_upsert import BulkUpserter, InMemoryClient, InMemoryIndex, TEXT_KEY
+
+DOCUMENTS = [
+    Document(page_content=" ".join(f"Paragraph {i} of {name} covers SIP trunking and codecs." for i in range(40)),
+             metadata={"source": f"{name}.txt"})
+    for name in ("stun", "turn", "ice")
+]
+
+
+class TestBulkUpserter(unittest.TestCase):
+    """Test cases for the bulk upsert engine"""
+
+    def test_batches_and_retries(self):
+        """Records are sent in batch_size requests and failed requests are retried"""
+        index = InMemoryIndex(dimension=2, fail_first=2)
+        upserter = BulkUpserter(index, batch_size=3, workers=2, base_delay=0.01)
+        documents = [Document(page_content=f"chunk {i}", metadata={"source": "a.txt"}) for i in range(10)]
+        with unittest.mock.patch("sys.stderr"):
+            upserter.submit([f"id-{i}" for i in range(10)], documents, [[1.0, float(i)] for i in range(10)])
+            stats = upserter.close()
+
+        self.assertEqual((stats["vectors"], stats["requests"], stats["retries"]), (10, 4, 2))
+        record = index.fetch(["id-7"])["vectors"]["id-7"]
+        self.assertEqual(record["metadata"], {"source": "a.txt", TEXT_KEY: "chunk 7"})
+        self.assertEqual(index.describe_index_stats()["total_vector_count"], 10)
+
+    def test_failure_after_retries_is_raised(self):
+        upserter = BulkUpserter(InMemoryIndex(dimension=3), batch_size=2, retries=0)
+        upserter.submit(["a"], [Document(page_content="x")], [[1.0, 2.0]])
+        with self.assertRaises(ValueError):
+            upserter.close()
+
+
+class TestPineconeIngest(unittest.TestCase):
+    """Test cases for pinecone_vectorize_data.create_vector_store with a pluggable client"""
+
+    def setUp(self):
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+
+    def test_ingest_creates_index_and_is_idempotent(self):
+        """A re-run, or a run with failing requests, upserts the same ids instead of duplicating"""
+        client = InMemoryClient()
+        stats = pinecone_vectorize_data.create_vector_store(DOCUMENTS, "kb", "local", embeddings=self.embeddings,
+                                                            client=client, batch_size=5, upsert_workers=3)
+        index = client.Index("kb")
+        self.assertEqual(index.dimension, 8)
+        self.assertGreater(stats["chunks"], 3)
+        self.assertEqual(stats["upsert"]["vectors"], stats["chunks"])
+        count = index.describe_index_stats()["total_vector_count"]
+        self.assertEqual(count, stats["chunks"])
+
+        client.fail_first = index.fail_first = index.requests + 2
+        with unittest.mock.patch("sys.stderr"), unittest.mock.patch("ingest_pipeline.time.sleep"):
+            stats = pinecone_vectorize_data.create_vector_store(DOCUMENTS, "kb", "local",
+                                                                embeddings=self.embeddings, client=client,
+                                                                batch_size=5, upsert_workers=3)
+        self.assertEqual(stats["upsert"]["retries"], 2)
+        self.assertEqual(index.describe_index_stats()["total_vector_count"], count)
+
+        # The stored text is what the LangChain Pinecone store reads back
+        query = self.embeddings.embed_query(DOCUMENTS[0].page_content)
+        match = index.query(query, top_k=1)["matches"][0]
+        self.assertIn("covers SIP trunking", match["metadata"][TEXT_KEY])
+
+
+if __name__ == '__main__':
+    unittest.main()
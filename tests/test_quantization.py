@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for quantization.py and quantized search in local_vectorstore.py
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the quantization module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from local_vectorstore import LocalVectorStore, _normalize
+from quantization import QUANTIZER_FILENAME, fit_quantizer, make_quantizer, quantized_search
+
+
+def vectors(count=2000, dimension=64, seed=0):
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(count, 8)).astype(np.float32)
+    return _normalize(latent @ rng.normal(size=(8, dimension)).astype(np.float32)
+                      + 0.1 * rng.normal(size=(count, dimension)).astype(np.float32))
+
+
+class TestQuantization(unittest.TestCase):
+    """Test cases for int8 and product quantization"""
+
+    def setUp(self):
+        self.vectors = vectors()
+        self.store = LocalVectorStore(DeterministicFakeEmbedding(size=64))
+        self.store.add_vectors(self.vectors, [f"text {i}" for i in range(len(self.vectors))],
+                               ids=[str(i) for i in range(len(self.vectors))])
+        self.queries = self.vectors[:20]
+
+    def ids(self, query, k=10):
+        return [doc.id for doc, _ in self.store.similarity_search_by_vector_with_score(query, k=k)]
+
+    def test_codes_are_compact(self):
+        self.assertEqual(fit_quantizer("int8", self.vectors).bytes_per_vector(), 64)
+        self.assertEqual(fit_quantizer("pq", self.vectors, subspaces=8).bytes_per_vector(), 8)
+        # Fewer training vectors than centroids still gives valid codes
+        small = fit_quantizer("pq", self.vectors[:50], subspaces=4)
+        self.assertEqual(small.codes.shape, (4, 50))
+        with self.assertRaises(ValueError):
+            make_quantizer("fp4")
+
+    def test_reranked_search_matches_exact(self):
+        """With re-ranking both quantizers return the exact top results with exact distances"""
+        exact = [self.store.similarity_search_by_vector_with_score(q, k=5) for q in self.queries]
+        for method, kwargs in (("int8", {}), ("pq", {"subspaces": 8})):
+            self.store.quantize(method, rerank=10, **kwargs)
+            for query, expected in zip(self.queries, exact):
+                found = self.store.similarity_search_by_vector_with_score(query, k=5)
+                self.assertEqual([d.id for d, _ in found][:3], [d.id for d, _ in expected][:3])
+                self.assertAlmostEqual(found[0][1], expected[0][1], places=5)
+        self.store.add_vectors(self.vectors[:1], ["new"])
+        self.assertIsNone(self.store.quantizer)
+
+    def test_few_candidates_are_scored_exactly(self):
+        """When every candidate would be re-ranked the codes are not scanned"""
+        small = self.vectors[:30]
+        quantizer = fit_quantizer("int8", small)
+        quantizer.scores = None
+        rows, scores = quantized_search(quantizer, small, small[3], k=4, rerank=10)
+        expected = np.argsort(-(small @ small[3]))[:4]
+        self.assertEqual(list(rows), list(expected))
+        self.assertAlmostEqual(float(scores[0]), 1.0, places=5)
+        rows, _ = quantized_search(quantizer, small, small[3], k=2, rerank=10, rows=np.array([9, 3, 5]))
+        self.assertEqual(list(rows), [3, 9] if small[9] @ small[3] > small[5] @ small[3] else [3, 5])
+
+    def test_benchmark_counts_rerank_vectors_as_resident(self):
+        """Re-ranking keeps the float32 vectors resident next to the codes"""
+        from benchmarks import quantization_benchmark
+
+        results = {r["configuration"]: r for r in quantization_benchmark.run(self.vectors[:500], self.queries,
+                                                                             subspaces=8)}
+        float_bytes = self.vectors[:500].nbytes
+        self.assertEqual(results["exact"]["resident_bytes"], float_bytes)
+        self.assertLess(results["int8"]["resident_bytes"], float_bytes / 2)
+        self.assertGreater(results["int8+rerank"]["resident_bytes"], float_bytes)
+        self.assertGreater(results["pq+rerank"]["resident_bytes"], float_bytes)
+
+    def test_persist_and_load(self):
+        self.store.quantize("pq", subspaces=8, rerank=4)
+        expected = [self.ids(q) for q in self.queries]
+        with tempfile.TemporaryDirectory() as path:
+            self.store.persist(path)
+            with open(os.path.join(path, "local_store.json")) as f:
+                self.assertEqual(json.load(f)["quantization"], "pq")
+            loaded = LocalVectorStore.load(path, self.store.embeddings)
+            self.assertEqual((loaded.quantizer.method, loaded.rerank), ("pq", 4))
+            self.store = loaded
+            self.assertEqual([self.ids(q) for q in self.queries], expected)
+
+    def test_ingest_quantizes_and_update_keeps_method(self):
+        embeddings = DeterministicFakeEmbedding(size=32)
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "a.txt")
+            store_dir = os.path.join(tmp, "store")
+            docs = [Document(page_content="Codec negotiation. " * 200, metadata={"source": source})]
+            chroma_vectorize_data.create_vector_store(docs, store_dir, embeddings=embeddings, backend="local",
+                                                      quantize="int8")
+            self.assertTrue(os.path.exists(os.path.join(store_dir, QUANTIZER_FILENAME)))
+
+            docs = [Document(page_content="Jitter buffers. " * 200, metadata={"source": source})]
+            chroma_vectorize_data.update_vector_store(docs, tmp, store_dir, embeddings=embeddings, backend="local")
+            store = LocalVectorStore.load(store_dir, embeddings)
+            self.assertEqual(store.quantizer.method, "int8")
+            self.assertIn("Jitter", store.similarity_search("Jitter buffers.", k=1)[0].page_content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for query_server.py and query_client.py
+"""
+
+import unittest
+import sys
+import os
+import time
+import asyncio
+import threading
+import urllib.request
+
+from aiohttp import web
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the server and client modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import query_client
+from query_server import STREAM_ERROR, create_app
+
+
+class FakeQAChain:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, inputs):
+        self.calls += 1
+        return {"result": f"Answer to {inputs['query']}"}
+
+    def stream_answer(self, query, source_documents=None):
+        yield from ["Answer ", "to ", query]
+
+
+class EndlessStream:
+    """Chat stream that fails on request, or never ends and records when it is closed"""
+
+    def __init__(self):
+        self.pulled = 0
+        self.closed = threading.Event()
+
+    def __call__(self, prompt, system):
+        if prompt == "fail":
+            yield "partial"
+            raise RuntimeError("model went away")
+        if prompt != "endless":
+            yield from [system, ": ", prompt, " ✓"]
+            return
+        try:
+            while True:
+                self.pulled += 1
+                yield "token "
+                time.sleep(0.01)
+        finally:
+            self.closed.set()
+
+
+class FakeVectorStore:
+    def similarity_search_with_score(self, query, k=4):
+        return [(Document(page_content=f"{query} {i}", metadata={"i": i}), i / 10) for i in range(k)]
+
+
+class TestQueryServer(unittest.TestCase):
+    """Test cases for the resident query server"""
+
+    def setUp(self):
+        self.qa_chain = FakeQAChain()
+        self.stream = EndlessStream()
+        app = create_app(self.qa_chain, lambda prompt, system: f"{system}: {prompt}",
+                         vectorstore=FakeVectorStore(), stream_chat_fn=self.stream)
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def test_health(self):
+        """The client sees a running server as available"""
+        self.assertTrue(query_client.is_available(self.url))
+        self.assertFalse(query_client.is_available("http://127.0.0.1:9"))
+
+    def test_answer_reuses_loaded_chain(self):
+        """Several questions are answered by the same loaded chain"""
+        for question in ["one", "two"]:
+            self.assertEqual(query_client.answer(question, url=self.url), f"Answer to {question}")
+        self.assertEqual(self.qa_chain.calls, 2)
+
+    def test_retrieve_and_chat(self):
+        """Retrieval returns scored chunks and chat passes the system message"""
+        documents = query_client.retrieve("sip", k=2, url=self.url)
+        self.assertEqual([d["content"] for d in documents], ["sip 0", "sip 1"])
+        self.assertEqual(documents[1]["metadata"], {"i": 1})
+        self.assertEqual(query_client.chat("hi", system="sys", url=self.url), "sys: hi")
+
+    def test_streaming_endpoints(self):
+        """Streamed answers arrive as text chunks that join to the full answer"""
+        self.assertEqual("".join(query_client.stream_answer("sip", url=self.url)), "Answer to sip")
+        self.assertEqual("".join(query_client.stream_chat("hi", system="sys", url=self.url)), "sys: hi ✓")
+
+    def test_error_mid_stream_ends_with_marker(self):
+        """An exception in the model stream ends the answer with an error marker"""
+        self.assertEqual("".join(query_client.stream_chat("fail", url=self.url)), "partial" + STREAM_ERROR)
+
+    def test_disconnect_stops_the_producer(self):
+        """The model stream is closed soon after the client hangs up"""
+        request = urllib.request.Request(self.url + "/chat/stream", data=b'{"prompt": "endless"}',
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            self.assertTrue(response.read1(64))
+        self.assertTrue(self.stream.closed.wait(5))
+        pulled = self.stream.pulled
+        time.sleep(0.1)
+        self.assertEqual(self.stream.pulled, pulled)
+
+    def test_unreachable_server(self):
+        """Connection failures raise QueryServerUnavailable"""
+        with self.assertRaises(query_client.QueryServerUnavailable):
+            query_client.answer("question", url="http://127.0.0.1:9")
+
+
+if __name__ == '__main__':
+    unittest.main()
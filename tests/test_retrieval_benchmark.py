@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for hashing_embeddings.py and benchmarks/retrieval_benchmark.py
+"""
+
+import unittest
+import sys
+import os
+import io
+import contextlib
+
+import numpy as np
+
+# Add the repo root to path to import the embeddings and the benchmark
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from hashing_embeddings import HashingEmbeddings
+from benchmarks import retrieval_benchmark
+
+CORPUS = os.path.join(ROOT, "examples", "Siperb", "input")
+
+
+class TestHashingEmbeddings(unittest.TestCase):
+    """Test cases for the offline embeddings"""
+
+    def test_deterministic_and_normalized(self):
+        """The same text always gets the same unit vector"""
+        first = HashingEmbeddings(size=64).embed_query("Dial *69 to call back")
+        second = HashingEmbeddings(size=64).embed_documents(["Dial *69 to call back"])[0]
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 64)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+
+    def test_shared_words_score_higher(self):
+        """Texts sharing words are closer than unrelated texts"""
+        embeddings = HashingEmbeddings()
+        query = np.array(embeddings.embed_query("what is a STUN server"))
+        related, unrelated = np.array(embeddings.embed_documents(
+            ["A STUN server tells a client its public address", "Shall I compare thee to a summer's day"]))
+        self.assertGreater(query @ related, query @ unrelated)
+
+    def test_empty_text(self):
+        """Text without words embeds to the zero vector"""
+        self.assertEqual(HashingEmbeddings(size=8).embed_query("  ... "), [0.0] * 8)
+
+
+class TestRetrievalBenchmark(unittest.TestCase):
+    """Test cases for the retrieval benchmark"""
+
+    def test_relevant_keys(self):
+        """Relevance filters on source file name and contained text"""
+        from langchain_core.documents import Document
+        chunks = [Document(page_content="dial *69", metadata={"source": "/x/feature-codes.txt"}),
+                  Document(page_content="dial *72", metadata={"source": "/x/feature-codes.txt"}),
+                  Document(page_content="dial *69", metadata={"source": "/x/other.txt"})]
+        keys = retrieval_benchmark.relevant_keys({"sources": ["feature-codes.txt"], "contains": "*69"}, chunks)
+        self.assertEqual(keys, {("feature-codes.txt", "dial *69")})
+
+    def test_run_reports_every_metric(self):
+        """A small run reports quality, latency, build time and size per configuration"""
+        queries = retrieval_benchmark.load_queries(retrieval_benchmark.DEFAULT_QUERIES)
+        configurations = [c for c in retrieval_benchmark.CONFIGURATIONS if c[0] in ("local", "bm25")]
+        report = retrieval_benchmark.run(CORPUS, queries, k=4, repeat=1, concurrency=2,
+                                         configurations=configurations, dimension=64)
+        self.assertEqual([r["configuration"] for r in report["results"]], ["local", "bm25"])
+        for result in report["results"]:
+            for metric in ("recall@4", "mrr", "p50_ms", "p95_ms", "p99_ms", "qps", "build_seconds", "size_bytes"):
+                self.assertIn(metric, result)
+            self.assertGreater(result["size_bytes"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        # Keyword-heavy labelled queries are easy for BM25
+        self.assertGreater(report["results"][1]["recall@4"], 0.5)
+
+    def test_unknown_configuration_is_an_error(self):
+        """--only with a name that is not a configuration exits instead of running everything"""
+        argv = sys.argv
+        sys.argv = ["retrieval_benchmark.py", CORPUS, "--only", "local", "locl+pq"]
+        try:
+            with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit) as raised:
+                retrieval_benchmark.main()
+        finally:
+            sys.argv = argv
+        self.assertNotEqual(raised.exception.code, 0)
+        self.assertIn("locl+pq", stderr.getvalue())
+
+    def test_sampled_queries_are_relevant_to_their_chunk(self):
+        """Queries sampled from the corpus are found in at least one chunk"""
+        from file_loaders import load_documents
+        from text_splitter import make_splitter
+        chunks = make_splitter().split_documents(load_documents(CORPUS))
+        queries = retrieval_benchmark.sample_queries(chunks, count=5)
+        self.assertTrue(queries)
+        for query in queries:
+            self.assertTrue(retrieval_benchmark.relevant_keys(query, chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
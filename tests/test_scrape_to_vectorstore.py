@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Unit tests for scrape_to_vectorstore.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add parent directory to path to import the pipeline module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from scrape_to_vectorstore import crawl_documents, scrape_to_vectorstore
+
+ARTICLE = "<p>" + "Session border controllers protect SIP trunks. " * 60 + "</p>"
+SITE = {
+    "/kb/": '<title>KB</title><nav><a href="/kb/stun">STUN</a> <a href="/kb/sdp">SDP</a></nav><main><p>Index</p></main>',
+    "/kb/stun": f'<title>What is STUN?</title><nav>Menu</nav><main>{ARTICLE}</main>',
+    "/kb/sdp": '<title>SDP</title><main><p>SDP describes media sessions.</p></main>',
+}
+SERVER_ERROR = "server error"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = SITE.get(self.path)
+        if body == SERVER_ERROR:
+            self.send_response(500)
+            self.end_headers()
+            return
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write((body or "not found").encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestScrapeToVectorstore(unittest.TestCase):
+    """Test cases for the crawl-to-store pipeline"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/kb/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        from extractors import get_extractor
+
+        self.site = dict(SITE)
+        self.addCleanup(lambda: (SITE.clear(), SITE.update(self.site)))
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.extractor = get_extractor("main")
+
+    def test_crawl_documents_streams_pages_with_metadata(self):
+        """Each page becomes a Document with url/title metadata and only the page text"""
+        stats = {}
+        documents = list(crawl_documents(self.url, stats=stats, workers=2, queue_size=1,
+                                         extractor=self.extractor))
+        self.assertEqual(stats["pages"], 3)
+        by_url = {doc.metadata["url"]: doc for doc in documents}
+        stun = by_url[self.url + "stun"]
+        self.assertEqual(stun.metadata["title"], "What is STUN?")
+        self.assertEqual(stun.metadata["source"], stun.metadata["url"])
+        self.assertTrue(stun.page_content.startswith("Session border controllers"))
+        self.assertNotIn("Menu", stun.page_content)
+
+    def test_scrape_into_chroma_and_incremental_rerun(self):
+        """One call builds the store, an incremental re-run embeds nothing new"""
+        with tempfile.TemporaryDirectory() as path:
+            stats = scrape_to_vectorstore(self.url, path, embeddings=self.embeddings,
+                                          crawl_workers=2, extractor=self.extractor)
+            self.assertEqual(stats["crawl"]["pages"], 3)
+            self.assertGreater(stats["chunks"], 3)
+
+            store = chroma_vectorize_data.loadVectorstore(path, self.embeddings)
+            results = store.similarity_search("Session border controllers", k=10)
+            self.assertIn("What is STUN?", {doc.metadata["title"] for doc in results})
+            self.assertFalse(any('"url":' in doc.page_content for doc in results))
+
+            stats = scrape_to_vectorstore(self.url, path, embeddings=self.embeddings, incremental=True,
+                                          crawl_workers=2, extractor=self.extractor)
+            self.assertEqual((stats["added"], stats["deleted"]), (0, 0))
+
+    def sources(self, path):
+        return set(chroma_vectorize_data.load_manifest(path)["sources"])
+
+    def test_incremental_keeps_pages_that_failed_or_were_not_reached(self):
+        """Only pages answering 404, or no longer linked from a complete crawl, are deleted"""
+        def rerun():
+            return scrape_to_vectorstore(self.url, path, embeddings=self.embeddings, incremental=True,
+                                         crawl_workers=2, extractor=self.extractor)
+
+        with tempfile.TemporaryDirectory() as path:
+            scrape_to_vectorstore(self.url, path, embeddings=self.embeddings, crawl_workers=2,
+                                  extractor=self.extractor)
+            sdp, stun = self.url + "sdp", self.url + "stun"
+
+            # A failing page, and the pages not reached because of it, are kept
+            SITE["/kb/sdp"] = SERVER_ERROR
+            self.assertEqual(rerun()["sources_removed"], 0)
+            # Not reached because of --max-pages
+            stats = scrape_to_vectorstore(self.url, path, embeddings=self.embeddings, incremental=True,
+                                          crawl_workers=1, extractor=self.extractor, max_pages=2)
+            self.assertFalse(stats["crawl"]["complete"])
+            self.assertIn(sdp, self.sources(path))
+
+            # A 404 is removed even when the crawl had failures
+            SITE["/kb/stun"] = SERVER_ERROR
+            del SITE["/kb/sdp"]
+            self.assertEqual(rerun()["sources_removed"], 1)
+            self.assertNotIn(sdp, self.sources(path))
+
+            # A page no longer linked is removed once the crawl reached everything
+            SITE["/kb/stun"] = self.site["/kb/stun"]
+            SITE["/kb/"] = '<title>KB</title><main><p>Index</p></main>'
+            self.assertEqual(rerun()["sources_removed"], 1)
+            self.assertEqual(self.sources(path), {self.url})
+
+    def test_slow_consumer_does_not_time_out_the_crawl(self):
+        """Waiting for the splitter doesn't stall requests already in flight"""
+        for i in range(8):
+            SITE[f"/kb/page{i}"] = f"<title>Page {i}</title><main><p>Page number {i}.</p></main>"
+        SITE["/kb/"] = "<main>" + " ".join(f'<a href="/kb/page{i}">{i}</a>' for i in range(8)) + "</main>"
+        stats = {}
+        for _ in crawl_documents(self.url, stats=stats, workers=8, queue_size=1, timeout=0.5,
+                                 extractor=self.extractor):
+            time.sleep(0.25)
+        self.assertEqual((stats["pages"], stats["failed"]), (9, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget tests for the CLI entry points
+"""
+
+import unittest
+import sys
+import os
+import json
+
+# Add parent directory to path to import the benchmark module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import startup_benchmark
+
+
+class TestStartup(unittest.TestCase):
+    """Entry points must stay within their import-time budget"""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(startup_benchmark.DEFAULT_BUDGET) as f:
+            cls.budget = json.load(f)
+        cls.results, cls.failures = startup_benchmark.run(cls.budget, runs=3)
+
+    def test_within_budget(self):
+        """Every entry point imports within its budget"""
+        self.assertEqual(self.failures, [])
+
+    def test_no_heavy_imports(self):
+        """Importing an entry point does not load LangChain, OpenAI, Chroma or NumPy"""
+        for result in self.results:
+            heavy = [p for p in result["packages"] if p in startup_benchmark.HEAVY_PACKAGES]
+            self.assertEqual(heavy, [], f"{result['module']} imports {heavy} at startup")
+
+
+if __name__ == '__main__':
+    unittest.main()
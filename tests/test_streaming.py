@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for streaming.py and the streaming answer paths
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# Add parent directory to path to import the streaming modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ChatAgent
+import chroma_context_agent
+import chroma_vectorize_data
+from answer_cache import cached_qa_chain
+from hashing_embeddings import HashingEmbeddings
+from streaming import print_stream, timed
+
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for printing and timing streams"""
+
+    def test_timed_records_first_token(self):
+        """Empty chunks are skipped and the first real one sets the time to first token"""
+        stats = {}
+        self.assertEqual(list(timed(["", "a", "b"], stats)), ["a", "b"])
+        self.assertEqual(stats["chunks"], 2)
+        self.assertIsNotNone(stats["ttft"])
+        self.assertGreaterEqual(stats["seconds"], stats["ttft"])
+
+    def test_print_stream(self):
+        """Chunks are printed as they arrive and returned joined, timings go to stderr"""
+        out, err = StringIO(), StringIO()
+        with patch('sys.stderr', err):
+            text = print_stream(iter(["Hel", "lo"]), file=out)
+        self.assertEqual(text, "Hello")
+        self.assertEqual(out.getvalue(), "Hello\n")
+        self.assertIn("first token", err.getvalue())
+
+    def test_chat_agent_stream(self):
+        """StreamQuery yields the content deltas of a streaming completion"""
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+                  for text in ["Hi", None, " there"]]
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: iter(chunks) if kwargs.get("stream") else None)))
+        with patch.object(ChatAgent, "GetClient", return_value=client):
+            self.assertEqual(list(ChatAgent.StreamQuery("hello")), ["Hi", " there"])
+
+
+class TestStreamAnswer(unittest.TestCase):
+    """Test cases for streaming RetrievalQA answers"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = HashingEmbeddings(size=64)
+        documents = [Document(page_content="Dial *69 to call back the last caller.", metadata={"source": "codes.txt"}),
+                     Document(page_content="STUN finds the public address of a client.",
+                              metadata={"source": "stun.txt"})]
+        chroma_vectorize_data.create_vector_store(documents, self.tmp.name, embeddings=self.embeddings,
+                                                  backend="local")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def qa_chain(self, answer="Dial *69."):
+        return chroma_context_agent.create_qa_chain(self.tmp.name, embeddings=self.embeddings,
+                                                    llm=FakeListChatModel(responses=[answer]))
+
+    def test_tokens_arrive_in_pieces(self):
+        """The answer is yielded in several chunks, with the retrieved sources"""
+        sources = []
+        tokens = list(chroma_context_agent.stream_answer(self.qa_chain(), "what does *69 do", sources))
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), "Dial *69.")
+        self.assertEqual(sources[0].metadata["source"], "codes.txt")
+
+    def test_cached_chain_streams_then_hits(self):
+        """A miss is streamed and cached, the repeated question is answered from the cache"""
+        qa_chain = cached_qa_chain(self.qa_chain(), self.tmp.name, semantic=False)
+        first = list(chroma_context_agent.stream_answer(qa_chain, "what does *69 do"))
+        self.assertIsNone(qa_chain.last_cache)
+        second = list(chroma_context_agent.stream_answer(qa_chain, "What does *69 do?"))
+        self.assertEqual(qa_chain.last_cache, "exact_hits")
+        self.assertEqual(second, ["".join(first)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for text_splitter.py
+"""
+
+import unittest
+import sys
+import os
+
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the splitter module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from text_splitter import TokenTextSplitter, RegexEncoding, split_groups, make_splitter, get_encoding
+
+SENTENCES = " ".join(f"Sentence number {i} talks about SIP registration and media." for i in range(60))
+
+
+class TestTokenTextSplitter(unittest.TestCase):
+    """Test cases for the token-budget splitter"""
+
+    def setUp(self):
+        self.splitter = TokenTextSplitter(chunk_tokens=64, overlap_tokens=24)
+
+    def test_chunks_fit_budget_and_end_on_sentences(self):
+        """Every chunk is within the token budget and ends at a sentence boundary"""
+        chunks = self.splitter.split_text(SENTENCES)
+        self.assertGreater(len(chunks), 5)
+        for chunk in chunks:
+            self.assertLessEqual(self.splitter.count_tokens(chunk), 64)
+            self.assertTrue(chunk.endswith("media."), chunk)
+
+    def test_overlap_repeats_trailing_sentence(self):
+        """The next chunk starts with the last sentence of the previous one"""
+        first, second = self.splitter.split_text(SENTENCES)[:2]
+        last_sentence = first.rsplit(". ", 1)[-1]
+        self.assertTrue(second.startswith(last_sentence), (last_sentence, second[:80]))
+
+    def test_heading_starts_new_chunk(self):
+        """A heading after a reasonably full chunk starts the next chunk"""
+        text = "# Intro\n\n" + SENTENCES[:300] + "\n\n## Registration\n\nShort section about registration."
+        chunks = self.splitter.split_text(text)
+        self.assertTrue(chunks[-1].startswith("## Registration"))
+        self.assertNotIn("## Registration", chunks[-2])
+
+    def test_oversized_sentence_is_windowed(self):
+        """A single sentence over budget is cut into token windows"""
+        chunks = self.splitter.split_text("word " * 400)
+        self.assertGreater(len(chunks), 3)
+        self.assertTrue(all(self.splitter.count_tokens(c) <= 64 for c in chunks))
+
+    def test_regex_encoding_round_trips(self):
+        text = "  Hello, world!\n\nTokenization of  spaced text.  "
+        encoding = RegexEncoding()
+        self.assertEqual(encoding.decode(encoding.encode_ordinary(text)), text)
+
+    def test_parallel_matches_sequential(self):
+        """Process-pool splitting returns the same chunks and metadata, in order"""
+        documents = [Document(page_content=SENTENCES[i * 50:], metadata={"source": f"{i}.txt"}) for i in range(6)]
+        sequential = self.splitter.split_documents(documents)
+        parallel = TokenTextSplitter(chunk_tokens=64, overlap_tokens=24, workers=2).split_documents(documents)
+        self.assertEqual([(d.page_content, d.metadata) for d in sequential],
+                         [(d.page_content, d.metadata) for d in parallel])
+
+        groups = [(doc.metadata["source"], [doc]) for doc in documents]
+        sources = [source for source, _, _ in split_groups(self.splitter, iter(groups), workers=2)]
+        self.assertEqual(sources, [source for source, _ in groups])
+
+    def test_tokenizer_is_resolved_once(self):
+        """"auto" becomes a concrete tokenizer that split workers reuse, "tiktoken" never falls back"""
+        self.assertIn(self.splitter.tokenizer, ("tiktoken", "regex"))
+        regex = make_splitter(tokenizer="regex")
+        self.assertIsInstance(regex.encoder, RegexEncoding)
+        self.assertEqual(regex.tokenizer_name, "regex")
+        if isinstance(get_encoding(), RegexEncoding):
+            with self.assertRaises(RuntimeError):
+                make_splitter(tokenizer="tiktoken")
+        with self.assertRaises(ValueError):
+            make_splitter(tokenizer="words")
+
+    def test_make_splitter(self):
+        self.assertIsInstance(make_splitter("tokens"), TokenTextSplitter)
+        self.assertEqual(make_splitter("characters")._chunk_size, 1000)
+        with self.assertRaises(ValueError):
+            make_splitter("words")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for vector_file.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+
+# Add parent directory to path to import the vector file module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chroma_vectorize_data
+from local_vectorstore import LocalVectorStore
+from vector_file import VectorFile, VectorFileStore, export_collection, is_vector_file
+
+
+class TestVectorFile(unittest.TestCase):
+    """Test cases for exporting and memory-mapping vector files"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.documents = [Document(page_content=f"Paragraph {i}. " * 150, metadata={"source": f"doc{i}.txt"})
+                          for i in range(3)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, backend):
+        store_dir = os.path.join(self.tmp.name, backend)
+        chroma_vectorize_data.create_vector_store(
+            self.documents, store_dir, embeddings=self.embeddings, backend=backend)
+        return store_dir
+
+    def test_export_local_store_matches_search(self):
+        """A vector file exported from a local store returns the same results"""
+        store_dir = self.build("local")
+        path = os.path.join(self.tmp.name, "store.vsf")
+        count = export_collection(store_dir, path)
+
+        local = LocalVectorStore.load(store_dir, self.embeddings)
+        self.assertEqual(count, len(local))
+        self.assertTrue(is_vector_file(path))
+        mapped = chroma_vectorize_data.loadVectorstore(path, self.embeddings)
+        self.assertIsInstance(mapped, VectorFileStore)
+
+        query = local.texts[2]
+        expected = local.similarity_search_with_score(query, k=3)
+        got = mapped.similarity_search_with_score(query, k=3)
+        self.assertEqual([d.id for d, _ in expected], [d.id for d, _ in got])
+        self.assertEqual(got[0][0].metadata, expected[0][0].metadata)
+        for (_, a), (_, b) in zip(expected, got):
+            self.assertAlmostEqual(a, b, places=5)
+
+    def test_export_records_embeddings(self):
+        """A vector file carries the embedding info of its store and is queried with the same embeddings"""
+        from hashing_embeddings import HashingEmbeddings
+        from embedding_providers import EmbeddingMismatchError
+
+        store_dir = os.path.join(self.tmp.name, "hashing")
+        chroma_vectorize_data.create_vector_store(self.documents, store_dir, embeddings=HashingEmbeddings(size=32),
+                                                  backend="local")
+        path = os.path.join(self.tmp.name, "store.vsf")
+        export_collection(store_dir, path)
+        self.assertEqual(VectorFile(path).embedding_info["dimension"], 32)
+
+        mapped = chroma_vectorize_data.loadVectorstore(path)
+        self.assertIsInstance(mapped.embeddings, HashingEmbeddings)
+        self.assertEqual(mapped.similarity_search(self.documents[1].page_content, k=1)[0].metadata["source"],
+                         "doc1.txt")
+        with self.assertRaises(EmbeddingMismatchError):
+            chroma_vectorize_data.loadVectorstore(path, self.embeddings)
+
+    def test_export_chroma_collection(self):
+        """A Chroma collection is exported with all vectors and records"""
+        store_dir = self.build("chroma")
+        path = os.path.join(self.tmp.name, "chroma.vsf")
+        count = export_collection(store_dir, path)
+
+        vector_file = VectorFile(path)
+        self.assertEqual(len(vector_file), count)
+        self.assertEqual(vector_file.vectors.shape, (count, 16))
+        # Vectors are a view on the mapping, not a copy
+        self.assertFalse(vector_file.vectors.flags["OWNDATA"])
+        self.assertFalse(vector_file.vectors.flags["WRITEABLE"])
+        record = vector_file.record(0)
+        self.assertEqual(set(record), {"id", "text", "metadata"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+TextSplitter - Token-budget chunking shared by the ingest scripts.
+
+Text is cut into headings, lines and sentences, all units are tokenized in one
+batch call, and units are packed into chunks of at most `chunk_tokens` model
+tokens. A chunk never ends mid-sentence unless a single sentence is over
+budget, and a heading starts a new chunk once the current one is reasonably
+full. Consecutive chunks share up to `overlap_tokens` of trailing sentences.
+
+Token counts use tiktoken, or a regex approximation (about 4 characters per
+token) so ingest works offline. The tokenizer is chosen once, when the
+splitter is created: "auto" falls back to the approximation with a warning if
+tiktoken's encoding can't be loaded, and split worker processes then use the
+same tokenizer as the parent, failing rather than switching on their own.
+
+Usage:
+    splitter = make_splitter("tokens", chunk_tokens=256, overlap_tokens=50)
+    chunks = splitter.split_documents(documents)
+"""
+
+import re
+import sys
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_ENCODING = "cl100k_base"  # text-embedding-ada-002 and gpt-3.5/4
+
+PARAGRAPH = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=\S)")
+HEADING = re.compile(r"^(#{1,6}\s+\S.*|[A-Z][A-Z0-9 ,.'&:()-]{2,60}|(\d+\.)+\d*\s+[A-Z].{0,80}|[A-Z][^.!?]{0,60}:)$")
+
+
+class RegexEncoding:
+    """Offline stand-in for a tiktoken encoding, pieces of up to 4 word characters."""
+
+    name = "regex"
+    PIECE = re.compile(r"\s*\w{1,4}|\s*[^\w\s]|\s+")
+
+    def encode_ordinary(self, text: str) -> List[str]:
+        return self.PIECE.findall(text)
+
+    def encode_ordinary_batch(self, texts: List[str], num_threads: int = 1) -> List[List[str]]:
+        return [self.PIECE.findall(text) for text in texts]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+TOKENIZERS = ("auto", "tiktoken", "regex")
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(name: str = DEFAULT_ENCODING, tokenizer: str = "auto"):
+    """
+    Encoding used to count tokens.
+
+    Args:
+        name: tiktoken encoding name
+        tokenizer: "tiktoken" (raises when the encoding can't be loaded), "regex" (RegexEncoding),
+            or "auto" for tiktoken with a RegexEncoding fallback, warned about once per process
+    """
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer '{tokenizer}', choose {', '.join(TOKENIZERS)}")
+    if tokenizer == "regex":
+        return RegexEncoding()
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        if tokenizer == "tiktoken":
+            raise RuntimeError(f"tiktoken encoding '{name}' unavailable ({type(e).__name__}), "
+                               f"use the regex tokenizer to approximate token counts") from e
+        print(f"⚠️  tiktoken encoding '{name}' unavailable ({type(e).__name__}), approximating token counts",
+              file=sys.stderr)
+        return RegexEncoding()
+
+
+def _units(text: str) -> List[Tuple[str, str, bool]]:
+    """Split text into (separator before, text, is heading) units."""
+    units = []
+    for paragraph in PARAGRAPH.split(text):
+        separator = "\n\n"
+        for line in paragraph.strip().split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if HEADING.match(line):
+                units.append((separator, line, True))
+            else:
+                for sentence in SENTENCE_END.split(line):
+                    units.append((separator, sentence, False))
+                    separator = " "
+            separator = "\n"
+    return units
+
+
+class TokenTextSplitter:
+    """
+    Sentence- and heading-aware splitter with a token budget per chunk.
+
+    Args:
+        chunk_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens of trailing sentences repeated at the start of the next chunk
+        encoding: tiktoken encoding name
+        min_fill: Fraction of the budget a chunk must reach before a heading starts a new one
+        workers: Processes used by split_documents for many documents, None to split in-process
+        tokenizer: "auto", "tiktoken" or "regex", "auto" is resolved to one of the others here
+    """
+
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 50, encoding: str = DEFAULT_ENCODING,
+                 min_fill: float = 0.5, workers: Optional[int] = None, tokenizer: str = "auto"):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = encoding
+        self.min_fill = min_fill
+        self.workers = workers
+        if tokenizer == "auto":
+            # Decided once here, worker processes get the resolved tokenizer with the pickled splitter
+            tokenizer = "regex" if isinstance(get_encoding(encoding), RegexEncoding) else "tiktoken"
+        get_encoding(encoding, tokenizer)
+        self.tokenizer = tokenizer
+
+    @property
+    def encoder(self):
+        return get_encoding(self.encoding, self.tokenizer)
+
+    @property
+    def tokenizer_name(self) -> str:
+        """Tokenizer recorded in the index manifest, chunks only match for the same one."""
+        return f"tiktoken:{self.encoding}" if self.tokenizer == "tiktoken" else self.tokenizer
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoder.encode_ordinary(text))
+
+    def _windows(self, text: str) -> List[str]:
+        """Hard-split an over-budget unit into overlapping token windows."""
+        tokens = self.encoder.encode_ordinary(text)
+        step = self.chunk_tokens - self.overlap_tokens
+        return [self.encoder.decode(tokens[start:start + self.chunk_tokens]).strip()
+                for start in range(0, max(len(tokens) - self.overlap_tokens, 1), step)]
+
+    def split_text(self, text: str) -> List[str]:
+        units = _units(text)
+        if not units:
+            return []
+        counts = [len(tokens) for tokens in self.encoder.encode_ordinary_batch([u[1] for u in units])]
+
+        chunks = []
+        current = deque()  # (unit index, tokens)
+        current_tokens = 0
+        carried = 0
+
+        def flush(overlap: bool):
+            nonlocal current_tokens, carried
+            if len(current) > carried:
+                parts = [units[i][0] + units[i][1] for i, _ in current]
+                chunks.append("".join(parts).strip())
+            # Keep trailing sentences as overlap for the next chunk
+            tail, tail_tokens = [], 0
+            while overlap and current and tail_tokens + current[-1][1] <= self.overlap_tokens:
+                tail_tokens += current[-1][1]
+                tail.insert(0, current.pop())
+            current.clear()
+            current.extend(tail)
+            current_tokens, carried = tail_tokens, len(tail)
+
+        for index, ((_, unit_text, heading), count) in enumerate(zip(units, counts)):
+            if heading and current_tokens >= self.min_fill * self.chunk_tokens:
+                flush(overlap=False)
+            if count > self.chunk_tokens:
+                flush(overlap=False)
+                chunks.extend(self._windows(unit_text))
+                continue
+            if current_tokens + count > self.chunk_tokens:
+                flush(overlap=True)
+                while current and current_tokens + count > self.chunk_tokens:
+                    current_tokens -= current.popleft()[1]
+                    carried -= 1
+            current.append((index, count))
+            current_tokens += count
+        flush(overlap=False)
+        return chunks
+
+    def split_documents(self, documents: Iterable) -> list:
+        """Split Documents, keeping each chunk's metadata equal to its document's."""
+        from langchain_core.documents import Document
+
+        documents = list(documents)
+        texts = [doc.page_content for doc in documents]
+        if self.workers and self.workers > 1 and len(documents) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunk_lists = list(pool.map(self.split_text, texts,
+                                            chunksize=max(1, len(texts) // (4 * self.workers))))
+        else:
+            chunk_lists = [self.split_text(text) for text in texts]
+        return [Document(page_content=chunk, metadata=dict(doc.metadata))
+                for doc, chunks in zip(documents, chunk_lists) for chunk in chunks]
+
+
+def _split_group(splitter, group):
+    source, documents = group
+    return source, documents, splitter.split_documents(documents)
+
+
+def split_groups(splitter, groups: Iterable[Tuple[str, list]],
+                 workers: Optional[int] = None) -> Iterator[Tuple[str, list, list]]:
+    """
+    Split (source, documents) groups, in a process pool when `workers` > 1.
+
+    At most `2 * workers` groups are in flight and results come back in input
+    order, so a lazy stream of sources stays lazy.
+
+    Yields:
+        (source, documents, chunks)
+    """
+    if not workers or workers <= 1:
+        for group in groups:
+            yield _split_group(splitter, group)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for group in groups:
+            in_flight.append(pool.submit(_split_group, splitter, group))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def splitter_settings(splitter) -> Optional[dict]:
+    """
+    Parameters that decide where `splitter` cuts chunks, as make_splitter arguments.
+
+    Returns:
+        {"kind", "chunk_tokens", "overlap_tokens"} or {"kind", "chunk_size", "chunk_overlap"},
+        None for other splitters
+    """
+    if isinstance(splitter, TokenTextSplitter):
+        return {"kind": "tokens", "chunk_tokens": splitter.chunk_tokens, "overlap_tokens": splitter.overlap_tokens}
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    if isinstance(splitter, RecursiveCharacterTextSplitter):
+        return {"kind": "characters", "chunk_size": splitter._chunk_size, "chunk_overlap": splitter._chunk_overlap}
+    return None
+
+
+def make_splitter(kind: str = "tokens", chunk_tokens: int = 256, overlap_tokens: int = 50,
+                  chunk_size: int = 1000, chunk_overlap: int = 200, tokenizer: str = "auto"):
+    """
+    Create the splitter used by the ingest scripts.
+
+    Args:
+        kind: "tokens" (TokenTextSplitter) or "characters" (the previous RecursiveCharacterTextSplitter)
+        chunk_tokens: Token budget per chunk for "tokens"
+        overlap_tokens: Token overlap for "tokens"
+        chunk_size: Characters per chunk for "characters"
+        chunk_overlap: Character overlap for "characters"
+        tokenizer: "auto", "tiktoken" or "regex" token counting for "tokens"
+    """
+    if kind == "tokens":
+        return TokenTextSplitter(chunk_tokens=chunk_tokens, overlap_tokens=overlap_tokens, tokenizer=tokenizer)
+    if kind == "characters":
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    raise ValueError(f"Unknown splitter '{kind}', choose tokens or characters")
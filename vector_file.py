@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+VectorFile - A memory-mapped, zero-copy file format for persisted collections.
+
+Layout (little endian):
+    header    64 bytes: magic, version, count, dimension, block offsets and sizes
+    vectors   count x dimension float32, L2-normalized, 64-byte aligned
+    offsets   (count + 1) uint64 offsets into the records block
+    records   one UTF-8 JSON object per vector: {"id", "text", "metadata"}
+    embedding UTF-8 JSON of the embedding provider, model and dimension (version 2),
+              the embedding.json of the exported store
+
+A query process `mmap`s the file and searches the vector block in place, so
+opening a store costs no parsing or copying and every process that opens the
+same file shares one copy of the vectors through the page cache.
+
+Usage:
+    python3 vector_file.py export <persist_directory> -o store.vsf
+    python3 vector_file.py query store.vsf -q "what is SIP?"  # embeds with the recorded provider
+"""
+
+import os
+import io
+import mmap
+import json
+import struct
+import argparse
+import tempfile
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from embedding_providers import add_embedding_arguments, check_embeddings, embeddings_from_args
+from local_vectorstore import LocalVectorStore, _normalize, _top_k, _top_k_rows
+
+MAGIC = b"VSTF"
+VERSION = 2
+# magic, version, dimension, count, vectors offset, offsets offset, records offset, records size,
+# embedding info size (0 in version 1, whose header is zero padded)
+HEADER = struct.Struct("<4sIIxxxxQQQQQQ")
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_vector_file(path: str, records: Iterable[Tuple[str, str, dict, List[float]]],
+                      count: int, dimension: int, embedding_info: Optional[dict] = None) -> None:
+    """
+    Write a vector file from a stream of records.
+
+    Args:
+        path: Output file
+        records: (id, text, metadata, vector) tuples
+        count: Number of records
+        dimension: Vector dimension
+        embedding_info: Optional provider, model and dimension of the embeddings, see embedding_providers.py
+    """
+    vectors_offset = _align(HEADER_SIZE)
+    offsets_offset = vectors_offset + count * dimension * 4
+    written = 0
+    offsets = [0]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryFile(dir=directory) as records_tmp, \
+            tempfile.NamedTemporaryFile(dir=directory, delete=False) as out:
+        out.write(b"\0" * vectors_offset)
+        for chunk_id, text, metadata, vector in records:
+            block = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, dimension))
+            out.write(block.astype("<f4").tobytes())
+            payload = json.dumps({"id": chunk_id, "text": text, "metadata": metadata or {}}).encode("utf-8")
+            records_tmp.write(payload)
+            offsets.append(offsets[-1] + len(payload))
+            written += 1
+        if written != count:
+            os.unlink(out.name)
+            raise ValueError(f"Expected {count} records but got {written}")
+
+        out.write(np.asarray(offsets, dtype="<u8").tobytes())
+        records_offset = offsets_offset + len(offsets) * 8
+        records_tmp.seek(0)
+        while True:
+            data = records_tmp.read(io.DEFAULT_BUFFER_SIZE * 64)
+            if not data:
+                break
+            out.write(data)
+        info = json.dumps(embedding_info).encode("utf-8") if embedding_info else b""
+        out.write(info)
+
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, dimension, count, vectors_offset,
+                              offsets_offset, records_offset, offsets[-1], len(info)))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(out.name, path)
+
+
+class VectorFile:
+    """
+    Read-only, memory-mapped view of a vector file.
+
+    `vectors` is a NumPy array backed directly by the mapping; records are
+    decoded lazily when a result is returned.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.dimension, self.count, vectors_offset,
+         offsets_offset, self._records_offset, records_size, info_size) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a vector file")
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported vector file version {version}")
+        info_offset = self._records_offset + records_size
+        # Provider, model and dimension of the embeddings, None for files exported without them
+        self.embedding_info = json.loads(self._mmap[info_offset:info_offset + info_size]) if info_size else None
+        self.vectors = np.frombuffer(self._mmap, dtype="<f4", count=self.count * self.dimension,
+                                     offset=vectors_offset).reshape(self.count, self.dimension)
+        self._offsets = np.frombuffer(self._mmap, dtype="<u8", count=self.count + 1, offset=offsets_offset)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, position: int) -> dict:
+        start = self._records_offset + int(self._offsets[position])
+        end = self._records_offset + int(self._offsets[position + 1])
+        return json.loads(self._mmap[start:end])
+
+    def search(self, query, k: int = 4) -> List[Tuple[int, float]]:
+        """Exact cosine top-k over the mapped vectors, returning (position, similarity) pairs."""
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        scores = self.vectors @ query
+        top = _top_k(scores, k)
+        return [(int(p), float(scores[p])) for p in top]
+
+    def batch_search(self, queries, k: int = 4) -> List[List[Tuple[int, float]]]:
+        """Exact cosine top-k for many queries with one matrix product."""
+        queries = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        sims = _normalize(queries) @ self.vectors.T
+        return [[(int(p), float(row[p])) for p in rows] for rows, row in zip(_top_k_rows(sims, k), sims)]
+
+    def close(self) -> None:
+        self.vectors = None
+        self._offsets = None
+        self._mmap.close()
+
+
+class VectorFileStore(VectorStore):
+    """
+    Read-only vector store over a memory-mapped vector file.
+
+    Scores are cosine distances, so lower is better as with Chroma.
+    """
+
+    def __init__(self, path: str, embedding: Embeddings):
+        self.file = VectorFile(path)
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("Vector files are read-only, re-export the collection instead")
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        return [(self._document(position), 1.0 - similarity)
+                for position, similarity in self.file.search(embedding, k)]
+
+    def batch_similarity_search_by_vector_with_score(self, embeddings, k: int = 4) -> List[List[Tuple[Document, float]]]:
+        return [[(self._document(position), 1.0 - similarity) for position, similarity in hits]
+                for hits in self.file.batch_search(embeddings, k)]
+
+    def _document(self, position: int) -> Document:
+        record = self.file.record(position)
+        return Document(page_content=record["text"], metadata=record["metadata"], id=record["id"])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   **kwargs: Any) -> "VectorFileStore":
+        raise NotImplementedError("Build a Chroma or local store and export it with vector_file.py")
+
+
+def read_embedding_info(path: str) -> Optional[dict]:
+    """The embedding info recorded in a vector file, None if it has none."""
+    file = VectorFile(path)
+    try:
+        return file.embedding_info
+    finally:
+        file.close()
+
+
+def is_vector_file(path: str) -> bool:
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(4) == MAGIC
+
+
+def _iter_chroma_records(persist_directory: str, page_size: int = 1000) -> Tuple[int, Iterator]:
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_directory)
+    collection = client.get_collection("langchain")
+    count = collection.count()
+
+    def records():
+        for offset in range(0, count, page_size):
+            page = collection.get(include=["embeddings", "documents", "metadatas"],
+                                  limit=page_size, offset=offset)
+            for chunk_id, vector, text, metadata in zip(page["ids"], page["embeddings"],
+                                                        page["documents"], page["metadatas"]):
+                yield chunk_id, text, metadata, vector
+
+    return count, records()
+
+
+def export_collection(persist_directory: str, output_path: str) -> int:
+    """
+    Export a persisted Chroma or local store to a vector file, with the embedding
+    info recorded for the store.
+
+    Args:
+        persist_directory: Directory of the persisted store
+        output_path: Vector file to write
+
+    Returns:
+        Number of exported vectors
+    """
+    if LocalVectorStore.exists(persist_directory):
+        store = LocalVectorStore.load(persist_directory, embedding=None)
+        count = len(store)
+        dimension = store.vectors.shape[1] if count else 0
+        records = zip(store.ids, store.texts, store.metadatas, store.vectors)
+    else:
+        count, records = _iter_chroma_records(persist_directory)
+        records = iter(records)
+        first = next(records, None)
+        dimension = len(first[3]) if first else 0
+        records = _prepend(first, records)
+    from embedding_providers import load_embedding_info
+
+    info = load_embedding_info(persist_directory)
+    if info is not None and dimension:
+        info = dict(info, dimension=info.get("dimension") or dimension)
+    write_vector_file(output_path, records, count, dimension, embedding_info=info)
+    return count
+
+
+def _prepend(first, rest: Iterator) -> Iterator:
+    if first is not None:
+        yield first
+    yield from rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export or query memory-mapped vector files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='Export a persisted Chroma or local store')
+    export.add_argument('persist_directory', help='Directory of the persisted store')
+    export.add_argument('-o', '--output', required=True, help='Vector file to write')
+    query = subparsers.add_parser('query', help='Similarity search a vector file')
+    query.add_argument('path', help='Vector file')
+    query.add_argument('-q', '--query', required=True, help='The query text')
+    query.add_argument('-k', type=int, default=4, help='Number of results')
+    add_embedding_arguments(query)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        count = export_collection(args.persist_directory, args.output)
+        print(f"Exported {count} vectors to '{args.output}'")
+        return 0
+
+    embeddings = embeddings_from_args(args, store=args.path)
+    check_embeddings(args.path, embeddings)
+    store = VectorFileStore(args.path, embeddings)
+    for doc, score in store.similarity_search_with_score(args.query, k=args.k):
+        print(f"{score:.4f}  {doc.page_content[:200]}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())